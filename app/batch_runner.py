@@ -0,0 +1,56 @@
+"""
+Headless batch runner for the HOR → DEMATEL → DANP → Suppliers → Optimizer
+→ Allocation pipeline (no Streamlit required).
+
+Usage:
+    python app/batch_runner.py data/templates
+    python app/batch_runner.py units/ --workers 4 --out data/output/batch
+    python app/batch_runner.py bu1/ bu2/ --formats xlsx,pdf
+"""
+import argparse
+import sys
+from pathlib import Path
+
+APP = Path(__file__).resolve().parent
+if str(APP) not in sys.path:
+    sys.path.insert(0, str(APP))
+
+import pandas as pd  # noqa: E402
+
+# Same copy-on-write mode as the dashboard (inherited by forked workers)
+pd.set_option("mode.copy_on_write", True)
+
+from modules.batch import FORMATS, discover_datasets, run_batch, timing_summary  # noqa: E402
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Run the analytics pipeline for one or more template directories")
+    ap.add_argument('paths', nargs='+', help="dataset directories (or parents of dataset directories)")
+    ap.add_argument('--out', default=str(APP.parent / 'data' / 'output' / 'batch'),
+                    help="output root; each dataset writes to <out>/<dataset name>")
+    ap.add_argument('--workers', type=int, default=1, help="parallel worker processes")
+    ap.add_argument('--formats', default=','.join(FORMATS),
+                    help=f"comma-separated subset of {','.join(FORMATS)}")
+    args = ap.parse_args(argv)
+
+    formats = tuple(f.strip() for f in args.formats.split(',') if f.strip())
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        ap.error(f"unknown format(s): {', '.join(sorted(unknown))}")
+
+    datasets = discover_datasets(args.paths)
+    if not datasets:
+        ap.error("no dataset directories found (expected hor_events.csv)")
+
+    results = run_batch(datasets, Path(args.out), workers=args.workers, formats=formats)
+
+    summary = timing_summary(results)
+    print(summary.to_string(index=False))
+    for r in results:
+        if r['status'] != 'OK':
+            print(f"\n[ERROR] {r['dataset']}:\n{r['error']}", file=sys.stderr)
+    return 0 if all(r['status'] == 'OK' for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,27 +1,104 @@
 
 import pandas as pd, numpy as np, pulp
-def optimize_allocation(plants_df: pd.DataFrame, suppliers_df: pd.DataFrame, ranking_df: pd.DataFrame, qwt=1.0, cwt=0.0):
+
+from .transport import transportation_simplex
+
+ALLOCATION_BACKENDS = ('pulp', 'transport')
+
+
+def optimize_allocation(plants_df: pd.DataFrame, suppliers_df: pd.DataFrame, ranking_df: pd.DataFrame, qwt=1.0, cwt=0.0,
+                        backend='pulp', return_report=False):
+    """
+    Allocate plant demand to suppliers (maximize quality - cost)
+
+    backend:
+        'pulp'      - generic LP through PuLP/CBC
+        'transport' - dedicated transportation simplex on NumPy arrays
+                      (modules.transport), no LP solver needed
+
+    With return_report=True returns (allocation, report); report holds
+    status, total_demand, total_capacity and shortfall (> 0 when total
+    capacity is below total demand, in which case the allocation is empty).
+    """
+    if backend not in ALLOCATION_BACKENDS:
+        raise ValueError(f"backend must be one of {ALLOCATION_BACKENDS}, got {backend!r}")
+    empty = pd.DataFrame(columns=['supplier_id','plant_id','quantity'])
+    report = {'status': 'Not Solved', 'backend': backend, 'total_demand': 0.0, 'total_capacity': 0.0, 'shortfall': 0.0}
+
+    def done(df):
+        return (df, report) if return_report else df
+
     if plants_df is None or suppliers_df is None or ranking_df is None or plants_df.empty or suppliers_df.empty or ranking_df.empty:
-        return pd.DataFrame(columns=['supplier_id','plant_id','quantity'])
+        return done(empty)
 
     q = ranking_df.set_index('supplier_id')['score']
-    sup = suppliers_df.copy().join(q, on='supplier_id', rsuffix='_score')
+    sup = suppliers_df.join(q, on='supplier_id', rsuffix='_score')
     sup['score'] = sup['score'].fillna(sup['quality_score'] if 'quality_score' in sup.columns else 0.0)
     max_score = sup['score'].max() or 1.0
     sup['Qn'] = sup['score']/max_score
+
+    demand = pd.to_numeric(plants_df['demand'], errors='coerce').fillna(0.0).to_numpy(float)
+    capacity = pd.to_numeric(sup['capacity'], errors='coerce').fillna(0.0).to_numpy(float)
+    report.update(total_demand=float(demand.sum()), total_capacity=float(capacity.sum()),
+                  shortfall=float(max(0.0, demand.sum() - capacity.sum())))
+    if report['shortfall'] > 1e-9:
+        report['status'] = 'Infeasible'
+        return done(empty)
+
+    if backend == 'transport':
+        return done(_allocate_transport(plants_df, sup, demand, capacity, qwt, cwt, report))
+
     plant_ids = plants_df['plant_id'].tolist(); supplier_ids = sup['supplier_id'].tolist()
+    coef = (qwt*sup['Qn'] - cwt*sup['unit_cost']).to_numpy(float)
     prob = pulp.LpProblem("Allocation", pulp.LpMaximize)
     x = {(s,p): pulp.LpVariable(f"x_{s}_{p}", lowBound=0) for s in supplier_ids for p in plant_ids}
-    prob += pulp.lpSum((qwt*sup.set_index('supplier_id').loc[s,'Qn'] - cwt*sup.set_index('supplier_id').loc[s,'unit_cost']) * x[(s,p)]
-                       for s in supplier_ids for p in plant_ids)
-    for p in plant_ids:
-        prob += pulp.lpSum(x[(s,p)] for s in supplier_ids) >= float(plants_df.set_index('plant_id').loc[p,'demand'])
-    for s in supplier_ids:
-        prob += pulp.lpSum(x[(s,p)] for p in plant_ids) <= float(sup.set_index('supplier_id').loc[s,'capacity'])
+    prob += pulp.lpSum(coef[i] * x[(s,p)] for i, s in enumerate(supplier_ids) for p in plant_ids)
+    for j, p in enumerate(plant_ids):
+        prob += pulp.lpSum(x[(s,p)] for s in supplier_ids) >= float(demand[j])
+    for i, s in enumerate(supplier_ids):
+        prob += pulp.lpSum(x[(s,p)] for p in plant_ids) <= float(capacity[i])
     prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    report['status'] = pulp.LpStatus[prob.status]
     rows = []
     for (s,p), var in x.items():
         val = var.value()
         if val and val>1e-6:
             rows.append(dict(supplier_id=s, plant_id=p, quantity=float(val)))
-    return pd.DataFrame(rows).sort_values(['plant_id','supplier_id'])
+    if not rows:
+        return done(empty)
+    return done(pd.DataFrame(rows).sort_values(['plant_id','supplier_id']))
+
+
+def _allocate_transport(plants_df, sup, demand, capacity, qwt, cwt, report):
+    """
+    Same LP as the PuLP model, solved as a balanced transportation problem
+
+    Demand rows are >=, so capacity left after meeting demand may still be
+    shipped: it goes to a dummy plant whose profit is max(0, best plant
+    profit). Dummy flow with positive profit is then added to that plant
+    (over-delivery the LP would also choose); the rest is unused capacity.
+    """
+    S, P = len(sup), len(demand)
+    profit_s = (qwt*sup['Qn'] - cwt*pd.to_numeric(sup['unit_cost'], errors='coerce')).fillna(0.0).to_numpy(float)
+    profit = np.repeat(profit_s[:, None], P, axis=1)
+
+    best_plant = profit.argmax(axis=1)
+    dummy = np.maximum(profit[np.arange(S), best_plant], 0.0)
+    cost = -np.column_stack([profit, dummy])
+    supply = np.maximum(capacity, 0.0)
+    dem = np.append(np.maximum(demand, 0.0), 0.0)
+    dem[-1] = max(0.0, supply.sum() - dem[:-1].sum())
+
+    X, info = transportation_simplex(supply, dem, cost)
+    report.update(status=info['status'], iterations=info['iterations'])
+    Q = X[:, :P]
+    over = (X[:, P] > 1e-9) & (dummy > 0)
+    Q[over, best_plant[over]] += X[over, P]
+
+    si, pi = np.nonzero(Q > 1e-6)
+    if not len(si):
+        return pd.DataFrame(columns=['supplier_id','plant_id','quantity'])
+    out = pd.DataFrame({'supplier_id': sup['supplier_id'].to_numpy(object)[si],
+                        'plant_id': plants_df['plant_id'].to_numpy(object)[pi],
+                        'quantity': Q[si, pi]})
+    return out.sort_values(['plant_id','supplier_id'])
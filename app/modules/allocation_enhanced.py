@@ -1,5 +1,7 @@
 
-import pandas as pd, numpy as np, pulp
+import pandas as pd, numpy as np
+
+from .lp_matrix import solve_lp
 
 def optimize_allocation_enhanced(plants_df: pd.DataFrame, suppliers_df: pd.DataFrame, ranking_df: pd.DataFrame,
                                  qwt=1.0, cwt=0.0, rwt=0.0, preferred_regions=None,
@@ -19,8 +21,8 @@ def optimize_allocation_enhanced(plants_df: pd.DataFrame, suppliers_df: pd.DataF
     if total_demand<=0: return pd.DataFrame(columns=['supplier_id','plant_id','quantity','region'])
 
     q = ranking_df.set_index('supplier_id')['score']
-    sup = suppliers_df.copy()
-    sup = sup.join(q, on='supplier_id', rsuffix='_score')
+    # join returns a new frame: suppliers_df is never written to
+    sup = suppliers_df.join(q, on='supplier_id', rsuffix='_score')
     sup['score'] = sup['score'].fillna(sup['quality_score'] if 'quality_score' in sup.columns else 0.0)
 
     # normalize quality and compute region bonus
@@ -31,68 +33,108 @@ def optimize_allocation_enhanced(plants_df: pd.DataFrame, suppliers_df: pd.DataF
     sup['emission_score'] = pd.to_numeric(sup.get('emission_score', 0.0), errors='coerce').fillna(0.0)
 
     # apply exclusions & quality floor by setting capacity 0
-    sup = sup.copy()
     sup.loc[sup['supplier_id'].isin(excluded_suppliers), 'capacity'] = 0
     sup.loc[sup['Qn'] < float(min_quality_norm), 'capacity'] = 0
 
-    plant_ids = plants_df['plant_id'].tolist()
-    supplier_ids = sup['supplier_id'].tolist()
+    lp = allocation_lp(plants_df, sup, qwt=qwt, cwt=cwt, rwt=rwt, ewt=ewt,
+                       max_share_supplier=max_share_supplier,
+                       max_share_per_plant_supplier=max_share_per_plant_supplier,
+                       min_total_supplier=min_total_supplier,
+                       region_min_shares=region_min_shares, region_max_shares=region_max_shares,
+                       max_total_emission=max_total_emission)
+    _, xv = solve_lp(lp)
+    if xv is None:
+        return pd.DataFrame(columns=['supplier_id','plant_id','quantity','region'])
 
-    prob = pulp.LpProblem("AllocationEnhanced", pulp.LpMaximize)
-    x = {(s,p): pulp.LpVariable(f"x_{s}_{p}", lowBound=0) for s in supplier_ids for p in plant_ids}
+    k = np.flatnonzero(xv > 1e-6)
+    si, pi = k // lp['n_plants'], k % lp['n_plants']
+    out = pd.DataFrame({'supplier_id': lp['supplier_ids'][si], 'plant_id': lp['plant_ids'][pi],
+                        'quantity': xv[k], 'region': lp['regions'][si]})
+    return out.sort_values(['plant_id','supplier_id'])
 
-    # Objective (maximize quality + region bonus - cost - emission penalty)
-    prob += pulp.lpSum((qwt*sup.set_index('supplier_id').loc[s,'Qn']
-                        + rwt*sup.set_index('supplier_id').loc[s,'region_bonus']
-                        - cwt*sup.set_index('supplier_id').loc[s,'unit_cost']
-                        - ewt*sup.set_index('supplier_id').loc[s,'emission_score']) * x[(s,p)]
-                       for s in supplier_ids for p in plant_ids)
 
-    # Demand per plant
-    for p in plant_ids:
-        prob += pulp.lpSum(x[(s,p)] for s in supplier_ids) >= float(plants_df.set_index('plant_id').loc[p,'demand'])
+def allocation_lp(plants_df: pd.DataFrame, sup: pd.DataFrame, qwt=1.0, cwt=0.0, rwt=0.0, ewt=0.0,
+                  max_share_supplier=1.0, max_share_per_plant_supplier=1.0, min_total_supplier=0.0,
+                  region_min_shares=None, region_max_shares=None, max_total_emission=None) -> dict:
+    """
+    Allocation LP in matrix form (see modules.lp_matrix.solve_lp)
 
-    # Capacity per supplier
-    for s in supplier_ids:
-        prob += pulp.lpSum(x[(s,p)] for p in plant_ids) <= float(sup.set_index('supplier_id').loc[s,'capacity'])
+    sup is the prepared supplier frame (supplier_id, capacity, unit_cost,
+    Qn, region, region_bonus, emission_score). Variable k = s*P + p is the
+    quantity supplier s ships to plant p. All coefficients are computed
+    once per supplier/plant as vectors, so building is O(S*P).
 
-    # Global max share per supplier
-    if max_share_supplier < 1.0:
-        for s in supplier_ids:
-            prob += pulp.lpSum(x[(s,p)] for p in plant_ids) <= max_share_supplier * total_demand
+    The per-(supplier, plant) share cap is folded into the variable upper
+    bounds and the global share cap into the capacity row.
+    """
+    region_min_shares = region_min_shares or {}
+    region_max_shares = region_max_shares or {}
+
+    demand = pd.to_numeric(plants_df['demand'], errors='coerce').fillna(0.0).to_numpy(float)
+    total_demand = float(demand.sum())
+    S, P = len(sup), len(demand)
+    n = S * P
+
+    def col(name):
+        return pd.to_numeric(sup[name], errors='coerce').fillna(0.0).to_numpy(float)
+
+    capacity, unit_cost, emission = col('capacity'), col('unit_cost'), col('emission_score')
+    Qn = sup['Qn'].to_numpy(float)
+    bonus = sup['region_bonus'].to_numpy(float)
+    region = sup['region'].to_numpy(object)
+
+    # Objective (maximize quality + region bonus - cost - emission penalty)
+    c_sup = qwt*Qn + rwt*bonus - cwt*unit_cost - ewt*emission
+    c = np.repeat(c_sup, P)
 
-    # Max share per plant per supplier
+    ub = np.full(n, np.inf)
     if max_share_per_plant_supplier < 1.0:
-        for s in supplier_ids:
-            for p in plant_ids:
-                prob += x[(s,p)] <= max_share_per_plant_supplier * float(plants_df.set_index('plant_id').loc[p,'demand'])
+        ub = np.tile(max_share_per_plant_supplier * demand, S)
+
+    var = np.arange(n)
+    var_sup, var_plant = var // P, var % P
+    rows, cols, vals, senses, rhs = [], [], [], [], []
+
+    def add_rows(row_of_var, sense, b, idx=var, coef=None):
+        m0 = len(senses)
+        rows.append(m0 + row_of_var)
+        cols.append(idx)
+        vals.append(np.ones(len(idx)) if coef is None else coef)
+        senses.extend([sense] * len(b))
+        rhs.append(np.asarray(b, dtype=float))
+
+    # Demand per plant
+    add_rows(var_plant, '>=', demand)
+
+    # Capacity per supplier, tightened by the global max share
+    cap = capacity.copy()
+    if max_share_supplier < 1.0:
+        cap = np.minimum(cap, max_share_supplier * total_demand)
+    add_rows(var_sup, '<=', cap)
 
     # Min total per supplier (absolute)
     if min_total_supplier > 0.0:
-        for s in supplier_ids:
-            prob += pulp.lpSum(x[(s,p)] for p in plant_ids) >= min_total_supplier
+        add_rows(var_sup, '>=', np.full(S, float(min_total_supplier)))
 
     # Region min/max shares (fractions of total demand)
-    region_map = sup.set_index('supplier_id')['region'].to_dict()
-    regions = set(region_map.values())
-    for r in regions:
-        idx = [s for s in supplier_ids if region_map.get(s,"")==r]
-        if not idx: continue
-        if r in region_min_shares and region_min_shares[r] is not None and region_min_shares[r] > 0:
-            prob += pulp.lpSum(x[(s,p)] for s in idx for p in plant_ids) >= float(region_min_shares[r]) * total_demand
-        if r in region_max_shares and region_max_shares[r] is not None and region_max_shares[r] < 1.0:
-            prob += pulp.lpSum(x[(s,p)] for s in idx for p in plant_ids) <= float(region_max_shares[r]) * total_demand
+    for r in pd.unique(region):
+        idx = np.flatnonzero(np.isin(var_sup, np.flatnonzero(region == r)))
+        if not len(idx): continue
+        lo, hi = region_min_shares.get(r), region_max_shares.get(r)
+        if lo is not None and lo > 0:
+            add_rows(np.zeros(len(idx), dtype=int), '>=', [float(lo) * total_demand], idx=idx)
+        if hi is not None and hi < 1.0:
+            add_rows(np.zeros(len(idx), dtype=int), '<=', [float(hi) * total_demand], idx=idx)
 
     # Total emission cap (optional)
     if max_total_emission is not None:
-        prob += pulp.lpSum(sup.set_index('supplier_id').loc[s,'emission_score'] * x[(s,p)]
-                           for s in supplier_ids for p in plant_ids) <= float(max_total_emission)
-
-    prob.solve(pulp.PULP_CBC_CMD(msg=False))
-
-    rows = []
-    for (s,p), var in x.items():
-        val = var.value()
-        if val and val>1e-6:
-            rows.append(dict(supplier_id=s, plant_id=p, quantity=float(val), region=region_map.get(s,"")))
-    return pd.DataFrame(rows).sort_values(['plant_id','supplier_id'])
+        add_rows(np.zeros(n, dtype=int), '<=', [float(max_total_emission)], coef=emission[var_sup])
+
+    return {
+        'c': c, 'lb': np.zeros(n), 'ub': ub, 'maximize': True,
+        'rows': np.concatenate(rows), 'cols': np.concatenate(cols), 'vals': np.concatenate(vals),
+        'senses': senses, 'rhs': np.concatenate(rhs),
+        'supplier_ids': sup['supplier_id'].to_numpy(object),
+        'plant_ids': plants_df['plant_id'].to_numpy(object),
+        'regions': region, 'n_plants': P,
+    }
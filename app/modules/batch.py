@@ -0,0 +1,210 @@
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .dataset import Dataset
+from .loader import load_templates, read_template_csv
+from .processing import danp_from_T, dataset_dematel, dataset_hor, dataset_scores
+from .optimizer import epsilon_constraint_TE, weighted_sum_selection
+from .allocation_enhanced import optimize_allocation_enhanced
+from .insights import auto_insights
+
+FORMATS = ('xlsx', 'parquet', 'pdf')
+
+# Same defaults as the dashboard sliders
+ALLOC_DEFAULTS = dict(qwt=1.0, cwt=0.2, rwt=0.5, ewt=0.0)
+BUDGET_SHARE = 0.6
+FRONTIER_POINTS = 10
+
+
+class _Timer:
+    """Collect wall-clock seconds per named stage"""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    def __call__(self, stage, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.timings[stage] = self.timings.get(stage, 0.0) + time.perf_counter() - t0
+
+
+def discover_datasets(paths) -> List[Path]:
+    """
+    Expand paths into dataset directories
+
+    A path holding hor_events.csv is a dataset; otherwise its immediate
+    subdirectories that hold one are used.
+    """
+    found = []
+    for p in map(Path, paths):
+        if (p / 'hor_events.csv').exists():
+            found.append(p)
+        elif p.is_dir():
+            found += sorted(d for d in p.iterdir() if d.is_dir() and (d / 'hor_events.csv').exists())
+    return list(dict.fromkeys(found))
+
+
+def run_dataset(tpl_dir: Path, out_dir: Path, formats=FORMATS) -> Dict:
+    """
+    Run the full pipeline for one templates directory and write its outputs
+
+    Returns:
+        Dict with dataset, status, error, outputs and per-stage timings
+    """
+    tpl_dir, out_dir = Path(tpl_dir), Path(out_dir)
+    timer = _Timer()
+    res = {'dataset': str(tpl_dir), 'status': 'OK', 'error': '', 'outputs': [], 'timings': timer.timings}
+
+    try:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        frames = timer('load', load_templates, tpl_dir)
+        ds = timer('intern', Dataset.from_frames, frames)
+        del frames
+
+        weighted, ARP, detail = timer('hor', dataset_hor, ds)
+        dem = timer('dematel', dataset_dematel, ds)
+        danp = timer('danp', danp_from_T, ds.subcriteria, ds.criteria, dem.get('T'))
+        ranking, _ = timer('supplier_scores', dataset_scores, ds, danp.get('gw'))
+
+        sel, totals, frontier = pd.DataFrame(), {}, pd.DataFrame()
+        if detail is not None and not detail.empty:
+            budget_cost = float(detail['Cost'].sum() * BUDGET_SHARE)
+            budget_mh = float(detail['manhours'].sum() * BUDGET_SHARE)
+            sel, totals = timer('action_selection', weighted_sum_selection,
+                                detail, budget_cost, budget_mh, w_te=1.0, w_cost=0.1, w_mh=0.1)
+            te_sum = detail['TE'].sum()
+            targets = np.linspace(te_sum * 0.2, te_sum * 0.95, FRONTIER_POINTS)
+            frontier = timer('pareto_frontier', epsilon_constraint_TE, detail, budget_cost, budget_mh, targets)
+
+        alloc = pd.DataFrame()
+        plants_p, alloc_sup_p = tpl_dir / 'allocation_plants.csv', tpl_dir / 'allocation_suppliers.csv'
+        if plants_p.exists() and alloc_sup_p.exists() and ranking is not None and len(ranking) > 0:
+            plants_df = read_template_csv(plants_p)
+            alloc_sup = read_template_csv(alloc_sup_p)
+            for col, default in [('capacity', 0), ('unit_cost', 0.0), ('emission_score', 0.0)]:
+                if col not in alloc_sup.columns:
+                    alloc_sup[col] = default
+            if 'region' in ds.suppliers.columns and 'region' not in alloc_sup.columns:
+                alloc_sup = alloc_sup.merge(ds.suppliers[['supplier_id', 'region']], on='supplier_id', how='left')
+            alloc = timer('allocation', optimize_allocation_enhanced, plants_df, alloc_sup, ranking, **ALLOC_DEFAULTS)
+
+        tables = {
+            'Weighted_SxR': weighted,
+            'ARP': ARP.rename('ARP').to_frame() if ARP is not None and len(ARP) > 0 else None,
+            'ETD': detail,
+            'DEMATEL_A': dem.get('A'),
+            'DEMATEL_T': dem.get('T'),
+            'DANP_weights': danp['gw'].rename('weight').to_frame() if len(danp.get('gw', [])) > 0 else None,
+            'Supplier_Ranking': ranking,
+            'Action_Selection': sel,
+            'Pareto_Frontier': frontier,
+            'Allocation': alloc,
+        }
+        tables = {k: v for k, v in tables.items() if v is not None and not v.empty}
+
+        if 'xlsx' in formats:
+            res['outputs'].append(timer('export_xlsx', _write_excel, out_dir / 'dashboard_exports.xlsx', tables))
+        if 'parquet' in formats:
+            res['outputs'] += timer('export_parquet', _write_parquet, out_dir, tables)
+        if 'pdf' in formats:
+            res['outputs'].append(timer('export_pdf', _write_story, out_dir / 'dashboard_story.pdf',
+                                        weighted, ARP, detail, dem, danp, ranking, alloc, totals))
+    except Exception as e:
+        res['status'] = 'ERROR'
+        res['error'] = f"{e}\n{traceback.format_exc()}"
+
+    res['outputs'] = [str(p) for p in res['outputs'] if p]
+    return res
+
+
+def _write_excel(path: Path, tables: Dict[str, pd.DataFrame]) -> Path:
+    with pd.ExcelWriter(path, engine='xlsxwriter') as w:
+        for name, df in tables.items():
+            df.to_excel(w, sheet_name=name[:31], index=not _has_default_index(df))
+    return path
+
+
+def _write_parquet(out_dir: Path, tables: Dict[str, pd.DataFrame]) -> List[Path]:
+    """One .parquet per table; skipped when no parquet engine is installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        print("[info] parquet export skipped: pyarrow is not installed")
+        return []
+    paths = []
+    for name, df in tables.items():
+        p = out_dir / f"{name}.parquet"
+        out = df.copy()
+        out.columns = out.columns.astype(str)
+        out.to_parquet(p, index=not _has_default_index(df))
+        paths.append(p)
+    return paths
+
+
+def _write_story(path: Path, weighted, ARP, detail, dem, danp, ranking, alloc, totals) -> Optional[Path]:
+    from .pdf_story import build_story
+
+    has_detail = detail is not None and not detail.empty
+    kpis = {
+        'Total TE': f"{detail['TE'].sum():.1f}" if has_detail else 'n/a',
+        'Top ETD': f"{detail['ETD'].max():.2f}" if has_detail else 'n/a',
+        'Top Supplier': ranking.iloc[0]['supplier_id'] if ranking is not None and len(ranking) > 0 else 'n/a',
+        'Selected TE': f"{totals.get('TE', 0.0):.1f}" if totals else 'n/a',
+    }
+    paragraphs = auto_insights(weighted, ARP, detail, dem, danp, ranking, alloc if len(alloc) else None)
+    if not paragraphs:
+        paragraphs = ['📊 Summary not available due to limited data.']
+    build_story(path, 'Executive Narrative Report', kpis, paragraphs)
+    return path
+
+
+def _has_default_index(df: pd.DataFrame) -> bool:
+    return isinstance(df.index, pd.RangeIndex) and df.index.name is None
+
+
+def run_batch(datasets, out_root: Path, workers: int = 1, formats=FORMATS) -> List[Dict]:
+    """
+    Run many datasets, in parallel worker processes when workers > 1
+
+    Each dataset writes to out_root/<dataset dir name>.
+    """
+    out_root = Path(out_root)
+    jobs, used = [], set()
+    for d in map(Path, datasets):
+        name = d.name or 'dataset'
+        base, k = name, 1
+        while name in used:
+            k += 1
+            name = f"{base}_{k}"
+        used.add(name)
+        jobs.append((d, out_root / name))
+
+    if workers <= 1 or len(jobs) <= 1:
+        return [run_dataset(d, o, formats) for d, o in jobs]
+
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futs = {ex.submit(run_dataset, d, o, formats): d for d, o in jobs}
+        for f in as_completed(futs):
+            results.append(f.result())
+    order = {str(d): i for i, (d, _) in enumerate(jobs)}
+    return sorted(results, key=lambda r: order.get(r['dataset'], 0))
+
+
+def timing_summary(results: List[Dict]) -> pd.DataFrame:
+    """Seconds per stage (columns) for each dataset (rows), plus a total"""
+    rows = []
+    for r in results:
+        row = {'dataset': r['dataset'], 'status': r['status']}
+        row.update({k: round(v, 4) for k, v in r['timings'].items()})
+        row['total'] = round(sum(r['timings'].values()), 4)
+        rows.append(row)
+    return pd.DataFrame(rows).fillna(0.0)
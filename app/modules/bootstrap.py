@@ -0,0 +1,107 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .processing import build_dematel, danp_from_T, respondent_tensor, total_relation_batch
+
+
+def danp_bootstrap(respondents: pd.DataFrame, subcriteria: pd.DataFrame,
+                   criteria: pd.DataFrame, edges: pd.DataFrame,
+                   n_boot: int = 1000, confidence: float = 0.95,
+                   workers: int = 1, seed: Optional[int] = None) -> Dict:
+    """
+    Bootstrap percentile intervals for the DANP global weights
+
+    Respondents (the respondent_ids in edges) are resampled with
+    replacement. Each replicate's weighted sums are a multinomial-count
+    combination of the per-respondent tensors from respondent_tensor, so
+    all B replicate A matrices come from one matrix product as a B×n×n
+    stack. X = A·alpha per replicate, and T = X(I-X)^-1 uses one batched
+    np.linalg.solve over the stack. The DANP step (danp_from_T) then runs
+    per replicate, split over ``workers`` processes when workers > 1.
+
+    Returns:
+        Dict with
+            'gw'         - point estimate from all respondents
+            'intervals'  - DataFrame indexed by sub_id: weight, mean, std,
+                           low, high (percentile interval at ``confidence``)
+            'replicates' - B×n DataFrame of replicate weights (NaN rows for
+                           replicates whose DANP step failed)
+            'n_boot', 'n_respondents', 'failed'
+    """
+    empty = {
+        'gw': pd.Series(dtype=float),
+        'intervals': pd.DataFrame(columns=['weight', 'mean', 'std', 'low', 'high']),
+        'replicates': pd.DataFrame(),
+        'n_boot': 0, 'n_respondents': 0, 'failed': 0,
+    }
+    if subcriteria is None or subcriteria.empty or criteria is None or criteria.empty:
+        return empty
+    if respondents is None or respondents.empty or edges is None or edges.empty:
+        return empty
+
+    subs = subcriteria['sub_id'].tolist()
+    n = len(subs)
+    point = danp_from_T(subcriteria, criteria, build_dematel(respondents, subcriteria, edges).get('T'))['gw']
+
+    resp_ids, R_sum, R_cnt = respondent_tensor(edges, respondents, subs)
+    k = len(resp_ids)
+    if k == 0 or n == 0:
+        return empty
+
+    # Replicate = multinomial counts over respondents → B×n×n stacks
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(k, np.full(k, 1.0 / k), size=int(n_boot)).astype(float)
+    A_sum = (counts @ R_sum.reshape(k, n * n)).reshape(-1, n, n)
+    CNT = (counts @ R_cnt.reshape(k, n * n)).reshape(-1, n, n)
+    A = np.divide(A_sum, CNT, out=np.zeros_like(A_sum), where=CNT != 0)
+
+    # Same alpha normalization as build_dematel, per replicate
+    max_val = np.maximum(A.sum(axis=2).max(axis=1), A.sum(axis=1).max(axis=1))
+    alpha = np.where(max_val > 0, 1.0 / np.where(max_val > 0, max_val, 1.0), 1.0)
+    X = A * alpha[:, None, None]
+    T = total_relation_batch(X)
+
+    if workers > 1 and len(T) > 1:
+        parts = np.array_split(T, workers)
+        with ProcessPoolExecutor(max_workers=workers) as ex:
+            gws = list(ex.map(_danp_weights, [subcriteria] * len(parts), [criteria] * len(parts),
+                              [subs] * len(parts), parts))
+        G = np.vstack(gws)
+    else:
+        G = _danp_weights(subcriteria, criteria, subs, T)
+
+    replicates = pd.DataFrame(G, columns=subs)
+    lo_q, hi_q = 50 * (1 - confidence), 50 * (1 + confidence)
+    ok = ~np.isnan(G).any(axis=1)
+    Gok = G[ok]
+    if len(Gok) == 0:
+        lo = hi = mean = std = np.full(n, np.nan)
+    else:
+        lo, hi = np.percentile(Gok, [lo_q, hi_q], axis=0)
+        mean, std = Gok.mean(axis=0), Gok.std(axis=0, ddof=1) if len(Gok) > 1 else np.zeros(n)
+    intervals = pd.DataFrame({
+        'weight': point.reindex(subs).to_numpy(float) if len(point) else np.full(n, np.nan),
+        'mean': mean, 'std': std, 'low': lo, 'high': hi,
+    }, index=pd.Index(subs, name='sub_id'))
+
+    return {
+        'gw': point,
+        'intervals': intervals,
+        'replicates': replicates,
+        'n_boot': int(n_boot),
+        'n_respondents': k,
+        'failed': int((~ok).sum()),
+    }
+
+
+def _danp_weights(subcriteria: pd.DataFrame, criteria: pd.DataFrame, subs, T: np.ndarray) -> np.ndarray:
+    """danp_from_T global weights for each T in a stack (NaN row on failure)"""
+    G = np.full((len(T), len(subs)), np.nan)
+    for b, t in enumerate(T):
+        gw = danp_from_T(subcriteria, criteria, pd.DataFrame(t, index=subs, columns=subs))['gw']
+        if len(gw):
+            G[b] = gw.reindex(subs).to_numpy(float)
+    return G
@@ -1,7 +1,9 @@
 
+import os, shutil
 import pandas as pd, numpy as np
 from pathlib import Path
 from datetime import datetime
+from .streaming import CHUNK_ROWS
 
 def _log(entries, file, level, msg):
     entries.append(dict(file=file, level=level, message=msg))
@@ -46,6 +48,28 @@ def fix_all(tpl: Path, backup_dir: Path):
         df.to_csv(tpl/name, index=index)
         _log(log, name, "OK", f"fixed & saved ({len(df)} rows × {len(df.columns)} cols)")
 
+    def wr_rows(name, fix):
+        # backup, then fix and rewrite in CHUNK_ROWS pieces so the file is never held whole
+        p = tpl/name
+        if not p.exists():
+            _log(log, name, "WARN", "missing file (skipped)")
+            return
+        tmp = p.with_name(p.name + ".tmp")
+        try:
+            shutil.copyfile(p, backup_path/f"{name}.orig.csv")
+            rows = cols = 0
+            for i, chunk in enumerate(pd.read_csv(p, chunksize=CHUNK_ROWS)):
+                chunk = fix(chunk)
+                chunk.to_csv(tmp, index=False, header=(i == 0), mode="w" if i == 0 else "a")
+                rows += len(chunk); cols = len(chunk.columns)
+            if rows == 0 and not tmp.exists():
+                empty = fix(pd.read_csv(p, nrows=0)); empty.to_csv(tmp, index=False); cols = len(empty.columns)
+            os.replace(tmp, p)
+            _log(log, name, "OK", f"fixed & saved ({rows} rows × {cols} cols)")
+        except Exception as e:
+            if tmp.exists(): tmp.unlink()
+            _log(log, name, "ERROR", f"read error: {e}")
+
     # load masters
     events = rd("hor_events.csv")
     agents = rd("hor_agents.csv")
@@ -57,9 +81,7 @@ def fix_all(tpl: Path, backup_dir: Path):
     respondents = rd("respondents.csv")
     criteria = rd("criteria.csv")
     subcriteria = rd("subcriteria.csv")
-    edges = rd("dematel_edges.csv")
     suppliers = rd("suppliers.csv")
-    ratings = rd("supplier_ratings.csv")
 
     # 1) Trim whitespace for ID-like columns
     def trim_cols(df, cols):
@@ -75,9 +97,7 @@ def fix_all(tpl: Path, backup_dir: Path):
     respondents = trim_cols(respondents, ["respondent_id","name","role"])
     criteria = trim_cols(criteria, ["criterion_id","name"])
     subcriteria = trim_cols(subcriteria, ["sub_id","name","criterion_id"])
-    edges = trim_cols(edges, ["respondent_id","from_sub","to_sub"])
     suppliers = trim_cols(suppliers, ["supplier_id","name","region"])
-    ratings = trim_cols(ratings, ["supplier_id","sub_id","respondent_id","plant_id","time_period","cheese_type"])
 
     # 2) Drop duplicates on primary IDs
     def dedup(df, key, file):
@@ -130,21 +150,24 @@ def fix_all(tpl: Path, backup_dir: Path):
             first = next(iter(valid))
             subcriteria.loc[bad, "criterion_id"] = first
             _log(log, "subcriteria.csv", "WARN", f"fixed {bad.sum()} invalid criterion_id to {first}")
-    if edges is not None:
+    # row-level files are fixed chunk by chunk when written (see wr_rows)
+    def fix_edges(edges):
+        edges = trim_cols(edges, ["respondent_id","from_sub","to_sub"])
         if respondents is not None:
             edges = edges[edges["respondent_id"].isin(respondents["respondent_id"])]
         if subcriteria is not None:
             edges = edges[edges["from_sub"].isin(subcriteria["sub_id"]) & edges["to_sub"].isin(subcriteria["sub_id"])]
         # coerce score 0..4
-        edges["score"] = pd.to_numeric(edges.get("score", 0), errors="coerce").fillna(0).clip(0,4)
-    if ratings is not None:
+        return edges.assign(score=pd.to_numeric(edges.get("score", 0), errors="coerce").fillna(0).clip(0,4))
+    def fix_ratings(ratings):
+        ratings = trim_cols(ratings, ["supplier_id","sub_id","respondent_id","plant_id","time_period","cheese_type"])
         if suppliers is not None:
             ratings = ratings[ratings["supplier_id"].isin(suppliers["supplier_id"])]
         if subcriteria is not None:
             ratings = ratings[ratings["sub_id"].isin(subcriteria["sub_id"])]
         if respondents is not None:
             ratings = ratings[ratings["respondent_id"].isin(respondents["respondent_id"])]
-        ratings["rating"] = pd.to_numeric(ratings.get("rating", 0), errors="coerce").fillna(0).clip(1,5)
+        return ratings.assign(rating=pd.to_numeric(ratings.get("rating", 0), errors="coerce").fillna(0).clip(1,5))
 
     # 5) Write back
     wr("hor_events.csv", events)
@@ -155,8 +178,8 @@ def fix_all(tpl: Path, backup_dir: Path):
     wr("respondents.csv", respondents)
     wr("criteria.csv", criteria)
     wr("subcriteria.csv", subcriteria)
-    wr("dematel_edges.csv", edges)
+    wr_rows("dematel_edges.csv", fix_edges)
     wr("suppliers.csv", suppliers)
-    wr("supplier_ratings.csv", ratings)
+    wr_rows("supplier_ratings.csv", fix_ratings)
 
     return pd.DataFrame(log)
@@ -0,0 +1,281 @@
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .processing import filter_mask, respondent_weights
+
+# Domain name -> (frame, ID column); None reads the frame's index
+DOMAINS = {
+    'event': ('events', 'event_id'),
+    'agent': ('agents', 'agent_id'),
+    'action': ('actions', None),
+    'respondent': ('respondents', 'respondent_id'),
+    'criterion': ('criteria', 'criterion_id'),
+    'sub': ('subcriteria', 'sub_id'),
+    'supplier': ('suppliers', 'supplier_id'),
+}
+
+# Frames in load_templates() order
+FRAMES = ('events', 'agents', 'R', 'actions', 'E', 'respondents', 'criteria',
+          'subcriteria', 'edges', 'suppliers', 'ratings')
+
+# Row-level columns held as codes rather than dims
+RATING_KEYS = ('supplier_id', 'sub_id', 'respondent_id', 'rating')
+
+
+class IdDomain:
+    """
+    Interned IDs of one domain (e.g. all supplier_ids): label <-> int32 code
+
+    Master IDs (from the domain's own table) take codes 0..n_master-1 in
+    first-seen order; IDs that only occur in fact tables (ratings, edges)
+    are appended after them by extend(), so ``code < n_master`` is the
+    foreign-key check and every present ID still has a code. Missing
+    values code to -1. Numeric IDs are compared as strings.
+    """
+
+    __slots__ = ('name', 'labels', 'n_master', '_index')
+
+    def __init__(self, name: str, master=()):
+        self.name = name
+        labels = _as_labels(master)
+        self._index = pd.Index(labels[~labels.isna()].unique(), dtype=object)
+        self.labels = self._index.to_numpy()
+        self.n_master = len(self.labels)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __repr__(self):
+        return f"IdDomain({self.name!r}, {self.n_master} master + {len(self) - self.n_master} extra)"
+
+    def codes(self, values) -> np.ndarray:
+        """int32 codes of values (-1 = missing or unknown)"""
+        codes, uniques = _factorize(values)
+        lookup = np.append(self._lookup(uniques), -1).astype(np.int32)
+        return lookup[codes]                           # code -1 picks the trailing -1
+
+    def _lookup(self, values) -> np.ndarray:
+        return self._index.get_indexer(_as_labels(values))
+
+    def extend(self, values) -> np.ndarray:
+        """Codes of values, interning IDs not seen before as extra labels"""
+        codes, uniques = _factorize(values)
+        lookup = self._lookup(uniques)
+        if (lookup < 0).any():
+            new = _as_labels(uniques[lookup < 0]).unique()
+            self._index = self._index.append(pd.Index(new, dtype=object))
+            self.labels = self._index.to_numpy()
+            lookup = self._lookup(uniques)
+        return np.append(lookup, -1).astype(np.int32)[codes]
+
+    def known(self, values) -> np.ndarray:
+        """Boolean mask of values present in the master table"""
+        codes = self.codes(values)
+        return (codes >= 0) & (codes < self.n_master)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Labels of codes (NaN for -1)"""
+        return np.append(self.labels, np.nan)[codes]
+
+    def take(self, keys, values, at, fill=np.nan) -> np.ndarray:
+        """values keyed by IDs ``keys``, read at IDs ``at`` (a join on codes; last key wins)"""
+        out = np.full(len(self) + 1, fill, dtype=float)
+        k = self.codes(keys)
+        out[np.where(k >= 0, k, len(self))] = np.asarray(values, dtype=float)
+        out[-1] = fill
+        return out[self.codes(at)]
+
+
+class Dataset:
+    """
+    The template tables with every ID domain interned once
+
+    Built from load_templates()' frames (unchanged, so a cached tuple can
+    be shared). Master tables stay as frames; everything the pipeline
+    joins on is precomputed as positional arrays:
+
+        R, E                events × agents and actions × agents, placed by
+                            code exactly as hor_stage1 / hor_stage2 align
+                            them (None when the template is empty)
+        severity, occurrence, difficulty, cost, manhours
+        resp_weight         raw respondent weight per respondent code (last
+                            duplicate wins, 1.0 for respondents only seen in
+                            edges/ratings), as aggregate_edges weighs edges
+        resp_share          normalized respondent weight per code
+                            (processing.respondent_weights), as
+                            supplier_scores weighs ratings
+        edge_resp, edge_from, edge_to, edge_score
+        rating_supplier, rating_sub, rating_resp, rating
+        rating_dims         other ratings columns as (int32 codes, labels)
+
+    The row-level frames (edges, ratings) are not kept: their ID columns
+    shrink from Python strings to 4-byte codes. processing.dataset_hor,
+    dataset_dematel and dataset_scores work on these arrays and share
+    their array steps with hor_stage1/hor_stage2, build_dematel and
+    supplier_scores; only the batch runner (batch.run_dataset) uses them,
+    while the dashboard and PipelineCache call the frame functions, which
+    code their inputs per call. The validator's key checks use IdDomain.
+    Treat a Dataset as read-only.
+    """
+
+    def __init__(self, events=None, agents=None, R=None, actions=None, E=None, respondents=None,
+                 criteria=None, subcriteria=None, edges=None, suppliers=None, ratings=None):
+        frames = dict(zip(FRAMES, (events, agents, R, actions, E, respondents, criteria,
+                                   subcriteria, edges, suppliers, ratings)))
+        self.events, self.agents, self.actions = events, agents, actions
+        self.respondents, self.criteria, self.subcriteria, self.suppliers = respondents, criteria, subcriteria, suppliers
+        self.n_edges = _rows(edges)
+        self.n_ratings = _rows(ratings)
+
+        self.ids: Dict[str, IdDomain] = {}
+        for name, (frame, col) in DOMAINS.items():
+            df = frames[frame]
+            if df is None:
+                master = ()
+            elif col is None:
+                master = df.index
+            else:
+                master = df[col] if col in df.columns else ()
+            self.ids[name] = IdDomain(name, master)
+        ev, ag, act, resp, sub, sup = (self.ids[k] for k in ('event', 'agent', 'action', 'respondent', 'sub', 'supplier'))
+
+        # HOR
+        self.severity = _column(events, 'severity', len(ev), keep_nan=True)
+        self.occurrence = _column(agents, 'occurrence', len(ag), keep_nan=True)
+        self.R = _place(R, ev, ag)
+        self.E = _place(E, act, ag)
+        self.difficulty = np.clip(_column(actions, 'difficulty', len(act), 1.0), 1e-9, None)
+        self.cost = _column(actions, 'cost', len(act), 0.0)
+        self.manhours = _column(actions, 'manhours', len(act), 0.0)
+
+        # Row-level tables: intern first, so extra IDs exist before the weight tables are sized
+        if _has(edges, 'respondent_id'):
+            self.edge_resp = resp.extend(edges['respondent_id'])
+            self.edge_from = sub.extend(edges['from_sub'])
+            self.edge_to = sub.extend(edges['to_sub'])
+            self.edge_score = _column(edges, 'score', len(edges), 0.0, keep_nan=True)
+        else:
+            self.edge_resp = self.edge_from = self.edge_to = np.zeros(0, dtype=np.int32)
+            self.edge_score = np.zeros(0)
+
+        self.rating_dims: Dict[str, tuple] = {}
+        if _has(ratings, 'supplier_id'):
+            self.rating_supplier = sup.extend(ratings['supplier_id'])
+            self.rating_sub = sub.extend(ratings['sub_id'])
+            self.rating_resp = resp.extend(ratings['respondent_id'])
+            self.rating = pd.to_numeric(ratings['rating'], errors='coerce').to_numpy(float)
+            for c in ratings.columns:
+                if c not in RATING_KEYS:
+                    codes, labels = pd.factorize(ratings[c])
+                    self.rating_dims[c] = (codes.astype(np.int32), pd.Index(labels))
+        else:
+            self.rating_supplier = self.rating_sub = self.rating_resp = np.zeros(0, dtype=np.int32)
+            self.rating = np.zeros(0)
+
+        self.resp_weight = np.ones(len(resp))
+        self.resp_share = np.zeros(len(resp))
+        self.has_weights = _has(respondents, 'weight')
+        if self.has_weights:
+            rw = pd.Series(respondents['weight'].to_numpy(dtype=float), index=resp.codes(respondents['respondent_id']))
+            rw = rw[~rw.index.duplicated(keep='last')]
+            rw = rw[rw.index >= 0]
+            self.resp_weight[rw.index.to_numpy()] = rw.to_numpy()
+            share = respondent_weights(respondents)
+            # Duplicate respondent_ids match every weight row in supplier_scores' merge
+            share = share.groupby(resp.codes(share.index)).sum()
+            share = share[share.index >= 0]
+            self.resp_share[share.index.to_numpy()] = share.to_numpy()
+
+    @classmethod
+    def from_frames(cls, frames) -> 'Dataset':
+        """Dataset from load_templates()' tuple or a dict keyed like FRAMES"""
+        if isinstance(frames, dict):
+            return cls(**{k: frames.get(k) for k in FRAMES})
+        return cls(*frames)
+
+    def __repr__(self):
+        return (f"Dataset({len(self.ids['event'])} events, {len(self.ids['agent'])} agents, "
+                f"{len(self.ids['action'])} actions, {len(self.ids['sub'])} subs, "
+                f"{len(self.ids['supplier'])} suppliers, {self.n_edges} edges, {self.n_ratings} ratings)")
+
+    # ------------------------------------------------------------------
+    def rating_mask(self, filters: Optional[Dict] = None) -> Optional[np.ndarray]:
+        """Row mask of ratings for a filter dict (see processing.filter_mask), None = all rows"""
+        keys = {'supplier_id': (self.rating_supplier, self.ids['supplier']),
+                'sub_id': (self.rating_sub, self.ids['sub']),
+                'respondent_id': (self.rating_resp, self.ids['respondent'])}
+        mask = None
+        for col, spec in (filters or {}).items():
+            if col in self.rating_dims:
+                codes, labels = self.rating_dims[col]
+            elif col in keys and self.n_ratings:
+                codes, labels = keys[col][0], pd.Index(keys[col][1].labels)
+            else:
+                continue
+            sel = filter_mask(labels, spec)
+            if sel is None:
+                continue
+            m = np.append(sel, False)[codes]        # code -1 (missing) never matches
+            mask = m if mask is None else mask & m
+        return mask
+
+    def memory_usage(self) -> pd.Series:
+        """Bytes held by the coded arrays"""
+        arrays = {k: v for k, v in vars(self).items() if isinstance(v, np.ndarray)}
+        arrays.update({f"rating_dims.{k}": v[0] for k, v in self.rating_dims.items()})
+        return pd.Series({k: v.nbytes for k, v in arrays.items()}, dtype='int64')
+
+
+def _factorize(values):
+    """(codes, uniques) of values, -1 for missing; categoricals reuse their own codes"""
+    if isinstance(getattr(values, 'dtype', None), pd.CategoricalDtype):
+        cat = values.array if hasattr(values, 'array') else pd.Categorical(values)
+        return cat.codes, cat.categories
+    if not isinstance(values, (pd.Series, pd.Index, np.ndarray)):
+        values = np.asarray(values, dtype=object)
+    codes, uniques = pd.factorize(values)
+    return codes, pd.Index(uniques)
+
+
+def _as_labels(values) -> pd.Index:
+    """Values as an object Index of strings (missing kept as NaN)"""
+    idx = pd.Index(values)
+    if isinstance(idx.dtype, pd.CategoricalDtype):
+        cats = _as_labels(idx.categories).to_numpy()
+        return pd.Index(np.append(cats, np.nan)[idx.codes], dtype=object)
+    if idx.dtype != object:
+        miss = idx.isna()
+        idx = pd.Index(idx.astype(str), dtype=object)
+        if miss.any():
+            idx = idx.where(~miss, np.nan)
+    return idx
+
+
+def _rows(df) -> int:
+    return 0 if df is None else len(df)
+
+
+def _has(df, col) -> bool:
+    return df is not None and not df.empty and col in df.columns
+
+
+def _column(df, col, n, default=0.0, keep_nan=False) -> np.ndarray:
+    """Numeric column as float (NaN -> default unless keep_nan); default everywhere if absent"""
+    if not _has(df, col):
+        return np.full(n, default, dtype=float)
+    v = pd.to_numeric(df[col], errors='coerce').to_numpy(float)
+    return v if keep_nan else np.where(np.isnan(v), default, v)
+
+
+def _place(M: Optional[pd.DataFrame], rows: IdDomain, cols: IdDomain) -> Optional[np.ndarray]:
+    """Matrix frame placed on (rows × cols) master codes; unknown labels dropped, gaps 0 (None if empty)"""
+    if M is None or M.empty:
+        return None
+    out = np.zeros((rows.n_master, cols.n_master))
+    ri, ci = rows.codes(M.index), cols.codes(M.columns)
+    ri_ok, ci_ok = np.flatnonzero((ri >= 0) & (ri < rows.n_master)), np.flatnonzero((ci >= 0) & (ci < cols.n_master))
+    vals = M.apply(pd.to_numeric, errors='coerce').to_numpy(float)[np.ix_(ri_ok, ci_ok)]
+    out[np.ix_(ri[ri_ok], ci[ci_ok])] = np.nan_to_num(vals, nan=0.0)
+    return out
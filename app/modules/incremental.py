@@ -0,0 +1,167 @@
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .processing import aggregate_edges, total_relation
+from .results import DematelResult
+
+
+class IncrementalDematel:
+    """
+    DEMATEL kept current as survey edges arrive
+
+    Keeps the weighted score-sum and weight-count accumulators of
+    aggregate_edges and applies only new edge rows. When a submission
+    changes a few cells of X = alpha·A, (I-X)^-1 is updated with a
+    Sherman–Morrison–Woodbury correction of rank r (changed rows or
+    changed columns, whichever is fewer) in O(n²r) instead of O(n³).
+    T = (I-X)^-1 - I follows for free.
+
+    A full refactorization (total_relation) happens when
+        - alpha changes (the max row/column sum of A moved), since every
+          entry of X is rescaled,
+        - the update rank exceeds ``max_rank``,
+        - the Woodbury capacitance matrix is ill-conditioned,
+        - ``refactor_every`` low-rank updates have accumulated, or
+        - the drift check ‖(I-X)(I-X)^-1 v - v‖∞ on a random probe exceeds
+          ``drift_tol``.
+
+    result() returns the same keys as build_dematel. Respondent weights
+    are looked up when edges are applied; changing an existing
+    respondent's weight later needs a fresh instance.
+    """
+
+    def __init__(self, subcriteria: pd.DataFrame, respondents: Optional[pd.DataFrame] = None,
+                 edges: Optional[pd.DataFrame] = None, max_rank: Optional[int] = None,
+                 refactor_every: int = 64, drift_tol: float = 1e-9, seed: int = 0):
+        self.subs = subcriteria['sub_id'].tolist()
+        n = len(self.subs)
+        self.max_rank = max(1, n // 4) if max_rank is None else int(max_rank)
+        self.refactor_every = int(refactor_every)
+        self.drift_tol = float(drift_tol)
+        self._rng = np.random.default_rng(seed)
+        self.respondents = respondents.copy() if respondents is not None else None
+
+        self.A_sum = np.zeros((n, n))
+        self.CNT = np.zeros((n, n))
+        self.A = np.zeros((n, n))
+        self.alpha = 1.0
+        self.X = np.zeros((n, n))
+        self.ImX_inv = np.eye(n)
+        self.since_refactor = 0
+        self.stats = {'updates': 0, 'lowrank': 0, 'refactor': 0, 'noop': 0}
+
+        if edges is not None and not edges.empty:
+            self.update(edges)
+
+    # ------------------------------------------------------------------
+    def update(self, edges: pd.DataFrame, respondents: Optional[pd.DataFrame] = None) -> Dict:
+        """
+        Apply new edge rows (and optionally new/updated respondent rows)
+
+        Returns:
+            Dict with mode ('lowrank', 'refactor' or 'noop'), rank, reason
+            and drift (probe residual after the update, NaN if not checked)
+        """
+        if respondents is not None and not respondents.empty:
+            self.respondents = (respondents.copy() if self.respondents is None
+                                else pd.concat([self.respondents, respondents], ignore_index=True))
+        self.stats['updates'] += 1
+        info = {'mode': 'noop', 'rank': 0, 'reason': '', 'drift': np.nan}
+        if edges is None or edges.empty or not self.subs:
+            self.stats['noop'] += 1
+            return info
+
+        dS, dC = aggregate_edges(edges, self.respondents, self.subs)
+        changed = (dS != 0) | (dC != 0)
+        if not changed.any():
+            self.stats['noop'] += 1
+            return info
+
+        self.A_sum += dS
+        self.CNT += dC
+        A_new = self.A.copy()
+        cnt = self.CNT[changed]
+        A_new[changed] = np.divide(self.A_sum[changed], cnt, out=np.zeros_like(cnt), where=cnt != 0)
+
+        max_val = max(A_new.sum(axis=1).max(), A_new.sum(axis=0).max())
+        alpha = 1.0 / max_val if max_val > 0 else 1.0
+        X_new = A_new * alpha
+        self.A = A_new
+
+        rows = np.flatnonzero(changed.any(axis=1))
+        cols = np.flatnonzero(changed.any(axis=0))
+        rank = min(len(rows), len(cols))
+        info['rank'] = rank
+
+        if alpha != self.alpha:
+            reason = 'alpha changed'
+        elif rank > self.max_rank:
+            reason = f'rank {rank} > {self.max_rank}'
+        elif self.since_refactor >= self.refactor_every:
+            reason = 'refactor interval'
+        else:
+            reason = self._woodbury(X_new - self.X, rows, cols)
+
+        self.alpha = alpha
+        self.X = X_new
+        if not reason:
+            self.since_refactor += 1
+            info['drift'] = self._drift()
+            if info['drift'] > self.drift_tol:
+                reason = 'drift'
+        if reason:
+            self._refactor()
+            info['mode'], info['reason'] = 'refactor', reason
+            self.stats['refactor'] += 1
+        else:
+            info['mode'] = 'lowrank'
+            self.stats['lowrank'] += 1
+        return info
+
+    def _woodbury(self, dX: np.ndarray, rows: np.ndarray, cols: np.ndarray) -> str:
+        """
+        (I-X-dX)^-1 from (I-X)^-1 with dX = U·V of rank len(rows) or len(cols)
+
+        Returns '' on success, or the reason a refactor is needed.
+        """
+        M = self.ImX_inv
+        if len(rows) <= len(cols):
+            # dX = E_rows · D, D = dX[rows, :]
+            DM = dX[rows] @ M                         # r × n
+            K = np.eye(len(rows)) - DM[:, rows]
+            left, right = M[:, rows], DM
+        else:
+            # dX = C · E_colsᵀ, C = dX[:, cols]
+            MC = M @ dX[:, cols]                      # n × r
+            K = np.eye(len(cols)) - MC[cols, :]
+            left, right = MC, M[cols]
+        if np.linalg.cond(K) > 1e12:
+            return 'ill-conditioned update'
+        self.ImX_inv = M + left @ np.linalg.solve(K, right)
+        return ''
+
+    def _drift(self) -> float:
+        n = len(self.subs)
+        v = self._rng.standard_normal(n)
+        w = self.ImX_inv @ v
+        return float(np.abs(w - self.X @ w - v).max() / max(np.abs(v).max(), 1e-300))
+
+    def _refactor(self):
+        _, self.ImX_inv, _ = total_relation(self.X)
+        self.since_refactor = 0
+
+    # ------------------------------------------------------------------
+    @property
+    def T(self) -> np.ndarray:
+        return self.ImX_inv - np.eye(len(self.subs))
+
+    def result(self) -> DematelResult:
+        """Current matrices as a DematelResult (same keys as build_dematel)"""
+        n = len(self.subs)
+        ImX = np.eye(n) - self.X
+        cond = float(np.abs(ImX).sum(axis=0).max() * np.abs(self.ImX_inv).sum(axis=0).max()) if n else np.nan
+        # update() replaces A and (I-X)^-1 rather than writing into them, so they can be shared
+        return DematelResult(self.subs, self.A, self.alpha, inv=self.ImX_inv,
+                             solver='incremental', cond=cond, iterations=0)
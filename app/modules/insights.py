@@ -1,4 +1,6 @@
 
+from collections.abc import Mapping
+
 import pandas as pd, numpy as np
 
 def auto_insights(weighted, ARP, detail, dem, danp, ranking, alloc):
@@ -35,7 +37,7 @@ def auto_insights(weighted, ARP, detail, dem, danp, ranking, alloc):
 
     # DANP
     try:
-        gw = danp.get('gw') if isinstance(danp, dict) else None
+        gw = danp.get('gw') if isinstance(danp, Mapping) else None
         if gw is not None and gw.size>0:
             topw = gw.sort_values(ascending=False).head(5)
             bullets.append(f"DANP: Bobot global tertinggi: {', '.join([f'{i} ({v:.3f})' for i,v in topw.items()])}.")
@@ -0,0 +1,393 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+from .snapshot import load_snapshot, save_snapshot, snapshot_key
+
+# Template files in the order returned by load_templates()
+TEMPLATE_FILES = (
+    'hor_events.csv', 'hor_agents.csv', 'hor_R.csv', 'hor_actions.csv',
+    'hor_effectiveness.csv', 'respondents.csv', 'criteria.csv',
+    'subcriteria.csv', 'dematel_edges.csv', 'suppliers.csv',
+    'supplier_ratings.csv'
+)
+
+# Indonesian → English headers of the two row-level (potentially large) files
+EDGES_COLUMNS = {
+    'id_responden': 'respondent_id',
+    'dari_sub': 'from_sub',
+    'ke_sub': 'to_sub',
+    'skor': 'score',
+    'pengaruh': 'influence'
+}
+
+RATINGS_COLUMNS = {
+    'id_pemasok': 'supplier_id',
+    'id_subkriteria': 'sub_id',
+    'penilaian': 'rating',
+    'id_responden': 'respondent_id',
+    'jenis_keju': 'cheese_type',
+    'id_pabrik': 'plant_id',
+    'periode_waktu': 'time_period'
+}
+
+# ID and label columns (English and Indonesian headers) are parsed as
+# strings; numeric columns keep pandas' inference
+ID_COLUMNS = (
+    'event_id', 'agent_id', 'action_id', 'respondent_id', 'criterion_id', 'sub_id',
+    'from_sub', 'to_sub', 'supplier_id', 'region', 'cheese_type', 'plant_id', 'time_period',
+    'id_kejadian', 'id_agen', 'id_aksi', 'id_responden', 'id_kriteria', 'id_subkriteria',
+    'dari_sub', 'ke_sub', 'id_pemasok', 'wilayah', 'jenis_keju', 'id_pabrik', 'periode_waktu',
+)
+TEMPLATE_DTYPES = {c: str for c in ID_COLUMNS}
+
+# Matrix templates: first column is the row index, headers are IDs
+MATRIX_FILES = ('hor_R.csv', 'hor_effectiveness.csv')
+
+# Row-level templates and their header maps; load_templates(row_level=False)
+# skips them (see streaming for chunked aggregates, load_row_level to read one)
+ROW_LEVEL_FILES = {
+    'dematel_edges.csv': EDGES_COLUMNS,
+    'supplier_ratings.csv': RATINGS_COLUMNS,
+}
+
+
+def template_fingerprint(tpl: Path, content: bool = False) -> Tuple:
+    """
+    Cheap identity of the template set, for cache keys
+
+    (file, size, mtime_ns) per TEMPLATE_FILES entry, or (file, blake2b
+    digest) with ``content=True``; missing files give (file, None). Any
+    edit (Data Wizard, Auto Fix, manual) changes the fingerprint.
+    """
+    tpl = Path(tpl)
+    out = []
+    for name in TEMPLATE_FILES:
+        p = tpl / name
+        try:
+            if content:
+                h = hashlib.blake2b(digest_size=16)
+                with open(p, 'rb') as f:
+                    for block in iter(lambda: f.read(1 << 20), b''):
+                        h.update(block)
+                out.append((name, h.hexdigest()))
+            else:
+                st = p.stat()
+                out.append((name, st.st_size, st.st_mtime_ns))
+        except FileNotFoundError:
+            out.append((name, None))
+    return tuple(out)
+
+
+def read_template_csv(path: Path) -> pd.DataFrame:
+    """
+    One row-level template CSV with the ID columns parsed as strings
+    (TEMPLATE_DTYPES), so its IDs join with the loaded templates, e.g.
+    allocation_suppliers.csv against the supplier ranking
+    """
+    return pd.read_csv(path, dtype=TEMPLATE_DTYPES)
+
+
+def load_row_level(tpl: Path, name: str) -> pd.DataFrame:
+    """One ROW_LEVEL_FILES template read whole, with English headers"""
+    return _rename_if_present(read_template_csv(Path(tpl) / name), ROW_LEVEL_FILES[name])
+
+
+def read_templates(tpl: Path, workers: Optional[int] = None,
+                   row_level: bool = True) -> Dict[str, pd.DataFrame]:
+    """
+    Parse every TEMPLATE_FILES entry concurrently (thread pool, explicit
+    ID dtypes); errors such as a missing file are raised as by read_csv.
+    With ``row_level=False`` the ROW_LEVEL_FILES entries are None.
+    """
+    tpl = Path(tpl)
+
+    def read(name):
+        if not row_level and name in ROW_LEVEL_FILES:
+            return None
+        if name in MATRIX_FILES:
+            return pd.read_csv(tpl / name, index_col=0)
+        return read_template_csv(tpl / name)
+
+    workers = workers or min(len(TEMPLATE_FILES), 4 * (os.cpu_count() or 1))
+    with ThreadPoolExecutor(max_workers=workers) as ex:
+        futures = {name: ex.submit(read, name) for name in TEMPLATE_FILES}
+        return {name: f.result() for name, f in futures.items()}
+
+
+def _notify(notify, level, msg):
+    """Forward a loader message to the UI (st.warning/info/caption) or stdout"""
+    if notify is not None:
+        notify(level, msg)
+    elif level != 'caption':
+        print(f"[{level}] {msg}")
+
+
+def _rename_if_present(df, mapping):
+    """Rename columns safely without errors"""
+    if df is None or not isinstance(df, pd.DataFrame):
+        return df
+    ren = {src: dst for src, dst in mapping.items() if src in df.columns}
+    return df.rename(columns=ren) if ren else df
+
+
+def _normalize_all_to_english(events, agents, actions, respondents,
+                              criteria, subcriteria, edges,
+                              suppliers, ratings):
+    """Normalize Indonesian column names to English"""
+    # Events
+    events = _rename_if_present(events, {
+        'id_kejadian': 'event_id',
+        'nama_kejadian': 'event_name',
+        'tingkat_keparahan': 'severity'
+    })
+    
+    # Agents
+    agents = _rename_if_present(agents, {
+        'id_agen': 'agent_id',
+        'nama_agen': 'agent_name',
+        'frekuensi': 'occurrence'
+    })
+    
+    # Actions
+    actions = _rename_if_present(actions, {
+        'id_aksi': 'action_id',
+        'nama_aksi': 'action_name',
+        'biaya': 'cost',
+        'jam_kerja': 'manhours',
+        'tingkat_kesulitan': 'difficulty',
+        'gunakan_manual': 'use_manual'
+    })
+    
+    # Respondents
+    respondents = _rename_if_present(respondents, {
+        'id_responden': 'respondent_id',
+        'nama_responden': 'respondent_name',
+        'bobot': 'weight'
+    })
+    
+    # Criteria & Subcriteria
+    criteria = _rename_if_present(criteria, {
+        'id_kriteria': 'criterion_id',
+        'nama_kriteria': 'criterion_name'
+    })
+    
+    subcriteria = _rename_if_present(subcriteria, {
+        'id_subkriteria': 'sub_id',
+        'nama_subkriteria': 'sub_name',
+        'id_kriteria': 'criterion_id'
+    })
+    
+    # DEMATEL edges
+    edges = _rename_if_present(edges, EDGES_COLUMNS)
+    
+    # Suppliers
+    suppliers = _rename_if_present(suppliers, {
+        'id_pemasok': 'supplier_id',
+        'nama_pemasok': 'supplier_name',
+        'wilayah': 'region'
+    })
+    
+    # Ratings
+    ratings = _rename_if_present(ratings, RATINGS_COLUMNS)
+    
+    return (events, agents, actions, respondents,
+            criteria, subcriteria, edges, suppliers, ratings)
+
+
+def _norm_ids(x):
+    # seragamkan ID: string, trim spasi, hilangkan BOM, huruf besar-kecil disamakan
+    return (x.astype(str)
+              .str.replace('\ufeff', '', regex=False)
+              .str.strip())
+
+def align_effectiveness(E, actions, agents, *, fill=0.0, notify=None):
+    """Selaraskan E (rows=action_id, cols=agent_id) ke master.
+       Auto-detect transpose, buang ID nyasar, isi yang hilang."""
+    if E is None or E.empty or actions is None or actions.empty or agents is None or agents.empty:
+        return pd.DataFrame()
+
+    # master ids
+    if 'action_id' in actions.columns:
+        act_ids = _norm_ids(actions['action_id'])
+    else:
+        act_ids = _norm_ids(actions.index.to_series())
+    agt_ids = _norm_ids(agents['agent_id'])
+
+    # normalisasi E
+    E = E.copy()
+    # kalau masih ada kolom 'action_id' di E (format long/terekspor Excel)
+    if 'action_id' in E.columns:
+        E = E.set_index('action_id')
+    E.index   = _norm_ids(E.index.to_series())
+    E.columns = _norm_ids(pd.Index(E.columns))
+
+    # --- Heuristik orientasi (apakah E kebalik?) ---
+    hits_row_act = len(set(E.index)   & set(act_ids))
+    hits_col_ag  = len(set(E.columns) & set(agt_ids))
+    hits_row_ag  = len(set(E.index)   & set(agt_ids))
+    hits_col_act = len(set(E.columns) & set(act_ids))
+    if hits_row_ag > hits_row_act and hits_col_act > hits_col_ag:
+        # kemungkinan besar E = agents x actions -> balikkan
+        E = E.T
+        # normalisasi ulang kolom/index pasca-transpose
+        E.index   = _norm_ids(E.index.to_series())
+        E.columns = _norm_ids(pd.Index(E.columns))
+
+    # --- Hitung mismatch SEBELUM perbaikan (sekadar info) ---
+    before_miss_rows  = sorted(set(act_ids) - set(E.index))
+    before_miss_cols  = sorted(set(agt_ids) - set(E.columns))
+    before_extra_rows = sorted(set(E.index)   - set(act_ids))
+    before_extra_cols = sorted(set(E.columns) - set(agt_ids))
+
+    # Tambah baris/kolom yang hilang
+    if before_miss_rows:
+        E = pd.concat([E, pd.DataFrame(fill, index=before_miss_rows, columns=E.columns)], axis=0)
+    for c in before_miss_cols:
+        if c not in E.columns:
+            E[c] = fill
+
+    # Buang yang tidak dikenal & reindex ke urutan master
+    E = E.loc[act_ids.unique(), [c for c in agt_ids.unique() if c in E.columns]]
+
+    # Pastikan numerik
+    E = E.apply(pd.to_numeric, errors='coerce').fillna(fill)
+
+    # --- Cek mismatch SESUDAH perbaikan; warning hanya kalau masih ada ---
+    after_miss_rows = sorted(set(act_ids) - set(E.index))
+    after_miss_cols = sorted(set(agt_ids) - set(E.columns))
+    if after_miss_rows or after_miss_cols:
+        _notify(notify, 'warning',
+            f"E masih tidak selaras setelah perbaikan. "
+            f"Missing actions(row): {len(after_miss_rows)}, missing agents(col): {len(after_miss_cols)}"
+        )
+        # Tampilkan contoh ID yang hilang (maks 5) agar mudah koreksi CSV
+        if after_miss_rows:
+            _notify(notify, 'caption', "Contoh action_id yang hilang: " + ", ".join(after_miss_rows[:5]))
+        if after_miss_cols:
+            _notify(notify, 'caption', "Contoh agent_id yang hilang: " + ", ".join(after_miss_cols[:5]))
+    else:
+        # Kalau ingin tahu kondisi awalnya, tampilkan sebagai info sekali
+        if before_miss_rows or before_miss_cols or before_extra_rows or before_extra_cols:
+            _notify(notify, 'info',
+                f"E awalnya tidak selaras "
+                f"(missing rows {len(before_miss_rows)}, missing cols {len(before_miss_cols)}, "
+                f"extra rows {len(before_extra_rows)}, extra cols {len(before_extra_cols)}) — "
+                f"sudah diperbaiki otomatis."
+            )
+
+    return E
+
+def align_R(R, events, agents, *, fill=0, notify=None):
+    """Selaraskan R (rows=event_id, cols=agent_id). Auto-transpose bila perlu."""
+    if R is None or R.empty or events is None or events.empty or agents is None or agents.empty:
+        return pd.DataFrame()
+
+    ev_ids = _norm_ids(events['event_id'] if 'event_id' in events.columns else events.index.to_series())
+    ag_ids = _norm_ids(agents['agent_id'])
+
+    R = R.copy()
+    R.index   = _norm_ids(R.index.to_series())
+    R.columns = _norm_ids(pd.Index(R.columns))
+
+    # Heuristik orientasi
+    hit_row_ev = len(set(R.index)   & set(ev_ids))
+    hit_col_ag = len(set(R.columns) & set(ag_ids))
+    hit_row_ag = len(set(R.index)   & set(ag_ids))
+    hit_col_ev = len(set(R.columns) & set(ev_ids))
+    if hit_row_ag > hit_row_ev and hit_col_ev > hit_col_ag:
+        R = R.T
+        R.index   = _norm_ids(R.index.to_series())
+        R.columns = _norm_ids(pd.Index(R.columns))
+
+    # Reindex aman
+    R = R.reindex(index=ev_ids.unique()).reindex(columns=ag_ids.unique()).fillna(fill)
+    R = R.apply(pd.to_numeric, errors='coerce').fillna(fill)
+    return R
+
+
+def snapshot_root(tpl: Path) -> Path:
+    """Snapshot directory next to the templates: data/templates → data/templates.snapshot"""
+    tpl = Path(tpl)
+    return tpl.parent / f"{tpl.name}.snapshot"
+
+
+def load_templates(tpl: Path, notify: Optional[Callable[[str, str], None]] = None,
+                   workers: Optional[int] = None, snapshot: bool = False,
+                   row_level: bool = True):
+    """
+    Load, normalize and align all template CSVs from a directory
+    
+    Files are parsed concurrently (see read_templates). Callers that cache
+    the result should key it on template_fingerprint(tpl).
+    
+    With ``snapshot=True`` the normalized, aligned frames are also written
+    as a binary snapshot (modules.snapshot) in snapshot_root(tpl), keyed on
+    the fingerprint; later calls on unchanged templates memory-map it
+    instead of parsing and aligning, and replay the original messages.
+    
+    No Streamlit dependency: messages go through ``notify(level, msg)``
+    (level is 'warning', 'info' or 'caption') or are printed.
+    
+    With ``row_level=False`` the row-level files (ROW_LEVEL_FILES) are not
+    read and edges / ratings are None, for callers that aggregate them
+    chunk by chunk (modules.streaming).
+    
+    Returns:
+        Tuple of (events, agents, R, actions, E, respondents, criteria,
+        subcriteria, edges, suppliers, ratings)
+    """
+    tpl = Path(tpl)
+    names = [f[:-len('.csv')] for f in TEMPLATE_FILES]
+    if not snapshot:
+        return _load_csv(tpl, notify, workers, row_level)
+    
+    fingerprint = template_fingerprint(tpl)
+    root, key = snapshot_root(tpl), snapshot_key(fingerprint if row_level else (fingerprint, 'no-row-level'))
+    try:
+        hit = load_snapshot(root, key)
+    except (OSError, ValueError, KeyError) as e:
+        _notify(notify, 'caption', f"Snapshot unreadable, reloading CSVs: {e}")
+        hit = None
+    if hit is not None:
+        frames, messages = hit
+        for level, msg in messages:
+            _notify(notify, level, msg)
+        return tuple(frames.get(n) for n in names)
+    
+    messages = []
+    
+    def record(level, msg):
+        messages.append((level, msg))
+        _notify(notify, level, msg)
+    
+    result = _load_csv(tpl, record, workers, row_level)
+    try:
+        save_snapshot(root, key, {n: df for n, df in zip(names, result) if df is not None}, messages)
+    except (OSError, TypeError, ValueError) as e:
+        _notify(notify, 'caption', f"Snapshot not written: {e}")
+    return result
+
+
+def _load_csv(tpl: Path, notify, workers, row_level=True):
+    (events, agents, R, actions, E, respondents, criteria,
+     subcriteria, edges, suppliers, ratings) = read_templates(tpl, workers, row_level).values()
+    
+    # Normalize column names
+    (events, agents, actions, respondents,
+     criteria, subcriteria, edges, suppliers, ratings) = _normalize_all_to_english(
+        events, agents, actions, respondents, criteria, subcriteria, edges, suppliers, ratings
+    )
+    
+    # Set index for actions safely
+    if 'action_id' in actions.columns:
+        actions = actions.set_index('action_id')
+    else:
+        _notify(notify, 'warning', "⚠️ 'action_id' column not found in hor_actions.csv")
+    
+    R = align_R(R, events, agents, fill=0, notify=notify)
+    E = align_effectiveness(E, actions, agents, fill=0.0, notify=notify)
+    return events, agents, R, actions, E, respondents, criteria, subcriteria, edges, suppliers, ratings
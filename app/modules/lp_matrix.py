@@ -0,0 +1,134 @@
+import os
+import subprocess
+import tempfile
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pulp
+
+SENSE_CODES = {'<=': 'L', '>=': 'G', '==': 'E'}
+
+
+def solve_lp(lp: Dict, msg: bool = False, time_limit: Optional[float] = None) -> Tuple[str, Optional[np.ndarray]]:
+    """
+    Solve an LP given in matrix form with PuLP's bundled CBC binary
+
+    The model is written straight to an MPS file from the arrays, so no
+    pulp.LpVariable / LpAffineExpression objects are created; at 10^5+
+    variables that object construction costs more than the solve.
+
+    lp keys:
+        c            objective coefficients, shape (n,)
+        lb, ub       variable bounds, shape (n,) (ub may hold np.inf)
+        rows, cols,
+        vals         constraint matrix in COO form
+        senses       per-row '<=', '>=' or '=='
+        rhs          per-row right-hand side
+        maximize     bool (default False)
+
+    Returns:
+        (status, x) with status one of PuLP's LpStatus strings
+        ('Optimal', 'Infeasible', 'Unbounded', 'Not Solved') and x the
+        solution vector, or None when no solution was produced.
+    """
+    c = np.asarray(lp['c'], dtype=float)
+    n = len(c)
+    senses = list(lp['senses'])
+    rhs = np.asarray(lp['rhs'], dtype=float)
+    if n == 0:
+        return 'Optimal', np.zeros(0)
+
+    cbc = pulp.PULP_CBC_CMD()
+    if not cbc.available():
+        raise RuntimeError("CBC solver binary not found (is PuLP installed with its bundled CBC?)")
+
+    with tempfile.TemporaryDirectory(prefix='lp_') as tmp:
+        mps, sol = os.path.join(tmp, 'model.mps'), os.path.join(tmp, 'model.sol')
+        with open(mps, 'w') as f:
+            f.write(_mps_text(lp, c, senses, rhs))
+
+        cmd = [cbc.path, mps]
+        if time_limit is not None:
+            cmd += ['sec', str(float(time_limit))]
+        cmd += ['solve', 'solution', sol]
+        subprocess.run(cmd, check=False,
+                       stdout=None if msg else subprocess.DEVNULL,
+                       stderr=None if msg else subprocess.DEVNULL)
+        if not os.path.exists(sol):
+            return 'Not Solved', None
+        return _read_solution(sol, n)
+
+
+def _mps_text(lp: Dict, c: np.ndarray, senses, rhs: np.ndarray) -> str:
+    n, m = len(c), len(senses)
+    rows = np.asarray(lp['rows'], dtype=np.int64)
+    cols = np.asarray(lp['cols'], dtype=np.int64)
+    vals = np.asarray(lp['vals'], dtype=float)
+    lb = np.asarray(lp.get('lb', np.zeros(n)), dtype=float)
+    ub = np.asarray(lp.get('ub', np.full(n, np.inf)), dtype=float)
+    # MPS minimizes; a maximization is written with the objective negated
+    obj = -c if lp.get('maximize', False) else c
+
+    # Same fixed-field layout as pulp's writeMPS. Lines are assembled from
+    # object arrays of pre-formatted names and (deduplicated) values, which
+    # is several times faster than formatting every entry.
+    col_names = np.array(["    %-8s  " % f"C{j}" for j in range(n)], dtype=object)
+    row_names = np.array(["%-8s  " % f"R{i}" for i in range(m)] + ["OBJ       "], dtype=object)
+
+    def values(v):
+        u, inv = np.unique(v, return_inverse=True)
+        return np.array(["% .12e" % x for x in u.tolist()], dtype=object)[inv]
+
+    out = ['NAME          MODEL', 'ROWS', ' N  OBJ']
+    out += [f" {SENSE_CODES[s]}  R{i}" for i, s in enumerate(senses)]
+
+    # COLUMNS must be grouped by column: every column gets its objective
+    # entry (row index -1 → OBJ) followed by its matrix entries
+    keep = vals != 0
+    all_cols = np.concatenate([np.arange(n), cols[keep]])
+    all_rows = np.concatenate([np.full(n, -1), rows[keep]])
+    all_vals = np.concatenate([obj, vals[keep]])
+    order = np.lexsort((all_rows, all_cols))
+    out.append('COLUMNS')
+    out += (col_names[all_cols[order]] + row_names[all_rows[order]] + values(all_vals[order])).tolist()
+
+    out.append('RHS')
+    nz = np.flatnonzero(rhs != 0)
+    out += ("    RHS       " + row_names[nz] + values(rhs[nz])).tolist()
+
+    out.append('BOUNDS')
+    out += [f" MI BND       C{j}" for j in np.flatnonzero(np.isneginf(lb)).tolist()]
+    lo = np.flatnonzero((lb != 0) & np.isfinite(lb))
+    out += (" LO BND   " + col_names[lo] + values(lb[lo])).tolist()
+    up = np.flatnonzero(np.isfinite(ub))
+    out += (" UP BND   " + col_names[up] + values(ub[up])).tolist()
+    out.append('ENDATA')
+    return '\n'.join(out) + '\n'
+
+
+def _read_solution(path: str, n: int) -> Tuple[str, Optional[np.ndarray]]:
+    with open(path) as f:
+        head = f.readline().lower()
+        body = f.readlines()
+
+    if head.startswith('optimal'):
+        status = 'Optimal'
+    elif 'infeasible' in head:
+        status = 'Infeasible'
+    elif 'unbounded' in head:
+        status = 'Unbounded'
+    else:
+        status = 'Not Solved'
+    if status in ('Infeasible', 'Unbounded'):
+        return status, None
+
+    # CBC lists rows first (named R*) then columns (named C*); only the
+    # nonzero columns are printed
+    x = np.zeros(n)
+    for line in body:
+        tok = line.split()
+        if tok and tok[0] == '**':
+            tok = tok[1:]
+        if len(tok) >= 3 and tok[1].startswith('C'):
+            x[int(tok[1][1:])] = float(tok[2])
+    return status, x
@@ -2,18 +2,18 @@
 import pandas as pd
 import numpy as np
 import pulp
+from concurrent.futures import ProcessPoolExecutor
 
 
 def _coerce_numeric_cols(df: pd.DataFrame, cols):
-    """Pastikan kolom numerik valid; NaN -> 0."""
-    df = df.copy()
-    for c in cols:
-        if c in df.columns:
-            df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0.0)
-        else:
-            # jika kolom tidak ada, tambahkan kolom nol agar aman
-            df[c] = 0.0
-    return df
+    """Pastikan kolom numerik valid; NaN -> 0. df asal tidak diubah."""
+    # assign membuat frame baru; kolom lain tetap berbagi data dengan df
+    # (tanpa salinan penuh) bila copy-on-write aktif
+    return df.assign(**{
+        c: pd.to_numeric(df[c], errors="coerce").fillna(0.0) if c in df.columns
+        else 0.0  # jika kolom tidak ada, tambahkan kolom nol agar aman
+        for c in cols
+    })
 
 
 def _lp_value(var):
@@ -25,6 +25,11 @@ def _lp_value(var):
         return 0.0
 
 
+# Batas ukuran agar backend native tetap lebih murah daripada memanggil CBC
+DP_CELL_LIMIT = 20_000_000      # (item × sel tabel DP) maksimum
+BNB_NODE_LIMIT = 50_000         # node branch-and-bound sebelum menyerah ke CBC
+
+
 def weighted_sum_selection(
     detail: pd.DataFrame,
     budget_cost: float,
@@ -32,10 +37,20 @@ def weighted_sum_selection(
     w_te: float = 1.0,
     w_cost: float = 0.0,
     w_mh: float = 0.0,
+    backend: str = "auto",
 ):
     """
     Pilih aksi (biner) memaksimalkan: w_te*TE - w_cost*Cost - w_mh*Manhours
     s.t. Cost <= budget_cost, Manhours <= budget_mh
+
+    backend:
+        "auto" - DP/branch-and-bound native bila cukup kecil, selain itu CBC
+        "dp"   - DP 2 dimensi atas anggaran integer (atau diskalakan 10^k)
+        "bnb"  - branch-and-bound dengan batas relaksasi LP (surrogate)
+        "cbc"  - PuLP/CBC seperti semula
+    "dp"/"bnb" tetap jatuh ke CBC bila tidak berlaku (koefisien negatif,
+    tabel terlalu besar, batas node terlampaui). totals["solver"] mencatat
+    backend yang benar-benar dipakai.
     """
     if detail is None or len(detail) == 0:
         return pd.DataFrame(columns=["TE", "Cost", "manhours"]), dict(
@@ -46,46 +61,250 @@ def weighted_sum_selection(
     detail = _coerce_numeric_cols(detail, ["TE", "Cost", "manhours"])
     # pastikan index unik dan berupa label aksi
     if detail.index.name is None:
-        detail = detail.copy()
-        detail.index.name = "action_id"
+        detail = detail.rename_axis("action_id")
 
-    prob = pulp.LpProblem("ActionSelect", pulp.LpMaximize)
-    x = {k: pulp.LpVariable(str(k), lowBound=0, upBound=1, cat="Binary") for k in detail.index}
+    pos, solver = None, "cbc"
+    if backend != "cbc":
+        te_v = detail["TE"].to_numpy(dtype=float)
+        c_v = detail["Cost"].to_numpy(dtype=float)
+        mh_v = detail["manhours"].to_numpy(dtype=float)
+        val = w_te * te_v - w_cost * c_v - w_mh * mh_v
+        pos, solver = _knapsack_native(val, c_v, mh_v, float(budget_cost), float(budget_mh), backend)
 
-    TE = pulp.lpSum(detail.loc[k, "TE"] * x[k] for k in detail.index)
-    C = pulp.lpSum(detail.loc[k, "Cost"] * x[k] for k in detail.index)
-    MH = pulp.lpSum(detail.loc[k, "manhours"] * x[k] for k in detail.index)
-
-    prob += w_te * TE - w_cost * C - w_mh * MH
-    prob += C <= float(budget_cost)
-    prob += MH <= float(budget_mh)
-
-    prob.solve(pulp.PULP_CBC_CMD(msg=False))
-    status = pulp.LpStatus.get(prob.status, "Unknown")
+    if pos is None:
+        sel, status = _select_cbc(detail, budget_cost, budget_mh, w_te, w_cost, w_mh)
+        solver = "cbc"
+    elif solver == "infeasible":
+        sel, status, solver = [], "Infeasible", "native"
+    else:
+        sel, status = list(detail.index[np.sort(pos)]), "Optimal"
 
     # Kalau infeasible, kembalikan kosong tapi aman
     if status not in ("Optimal", "Feasible"):
         return pd.DataFrame(columns=["TE", "Cost", "manhours"]), dict(
-            TE=0.0, Cost=0.0, Manhours=0.0, status=status
+            TE=0.0, Cost=0.0, Manhours=0.0, status=status, solver=solver
         )
 
-    sel = [k for k, v in x.items() if _lp_value(v) >= 0.99]
-    out = detail.loc[sel].copy() if len(sel) else detail.iloc[0:0].copy()
+    out = detail.loc[sel] if len(sel) else detail.iloc[0:0]
 
     return out, dict(
         TE=float(out["TE"].sum()) if len(out) else 0.0,
         Cost=float(out["Cost"].sum()) if len(out) else 0.0,
         Manhours=float(out["manhours"].sum()) if len(out) else 0.0,
         status=status,
+        solver=solver,
     )
 
 
+def _select_cbc(detail, budget_cost, budget_mh, w_te, w_cost, w_mh):
+    """Model MIP PuLP/CBC; mengembalikan (label terpilih, status)."""
+    prob = pulp.LpProblem("ActionSelect", pulp.LpMaximize)
+    x = {k: pulp.LpVariable(f"x{i}", lowBound=0, upBound=1, cat="Binary") for i, k in enumerate(detail.index)}
+    xs = list(x.values())
+
+    TE = pulp.LpAffineExpression(zip(xs, detail["TE"].to_numpy(dtype=float)))
+    C = pulp.LpAffineExpression(zip(xs, detail["Cost"].to_numpy(dtype=float)))
+    MH = pulp.LpAffineExpression(zip(xs, detail["manhours"].to_numpy(dtype=float)))
+
+    prob += w_te * TE - w_cost * C - w_mh * MH
+    prob += C <= float(budget_cost)
+    prob += MH <= float(budget_mh)
+
+    prob.solve(pulp.PULP_CBC_CMD(msg=False))
+    status = pulp.LpStatus.get(prob.status, "Unknown")
+    return [k for k, v in x.items() if _lp_value(v) >= 0.99], status
+
+
+def _knapsack_native(val, c, m, Bc, Bm, backend="auto"):
+    """
+    Knapsack 0/1 dua kendala (biaya & manhours) tanpa CBC.
+    Mengembalikan (posisi terpilih, "dp"/"bnb"/"native"), ([], "infeasible") bila
+    anggaran negatif, atau (None, None) bila harus diserahkan ke CBC.
+    """
+    if not (np.isfinite(val).all() and np.isfinite(c).all() and np.isfinite(m).all()
+            and np.isfinite(Bc) and np.isfinite(Bm)):
+        return None, None
+    if (c < 0).any() or (m < 0).any():
+        return None, None
+    if Bc < 0 or Bm < 0:
+        return [], "infeasible"
+
+    # Aksi dengan nilai <= 0 tidak pernah memperbaiki objektif; aksi yang
+    # sendirian sudah melewati anggaran tidak mungkin dipilih
+    cand = np.flatnonzero((val > 0) & (c <= Bc) & (m <= Bm))
+    if len(cand) == 0:
+        return np.array([], dtype=int), "native"
+    if c[cand].sum() <= Bc and m[cand].sum() <= Bm:
+        return cand, "native"
+
+    if backend in ("auto", "dp"):
+        ci, Bci = _integer_scale(c[cand], Bc)
+        mi, Bmi = _integer_scale(m[cand], Bm)
+        if ci is not None and mi is not None and len(cand) * (Bci + 1) * (Bmi + 1) <= DP_CELL_LIMIT:
+            return cand[_knapsack_dp(val[cand], ci, mi, Bci, Bmi)], "dp"
+        if backend == "dp":
+            return None, None
+
+    if backend in ("auto", "bnb"):
+        pos = _knapsack_bnb(val[cand], c[cand], m[cand], Bc, Bm, BNB_NODE_LIMIT)
+        if pos is not None:
+            return cand[pos], "bnb"
+
+    return None, None
+
+
+def _integer_scale(w, budget, max_decimals=2):
+    """
+    Skalakan bobot ke integer (×10^k, k <= max_decimals) lalu bagi dengan
+    FPB-nya agar tabel DP sekecil mungkin. (None, None) bila tidak bisa.
+    """
+    for d in range(max_decimals + 1):
+        k = 10 ** d
+        ws = w * k
+        if np.allclose(ws, np.round(ws), rtol=0, atol=1e-9):
+            wi = np.round(ws).astype(np.int64)
+            bi = int(np.floor(budget * k + 1e-9))
+            g = int(np.gcd.reduce(wi[wi > 0])) if (wi > 0).any() else 1
+            g = max(g, 1)
+            return wi // g, bi // g
+    return None, None
+
+
+def _knapsack_dp(val, c, m, Bc, Bm):
+    """DP tervektorisasi atas tabel (biaya × manhours); eksak untuk bobot integer."""
+    n = len(val)
+    dp = np.zeros((Bc + 1, Bm + 1))
+    take = np.zeros((n, Bc + 1, Bm + 1), dtype=bool)
+    for i in range(n):
+        ci, mi = int(c[i]), int(m[i])
+        cand = dp[:Bc + 1 - ci, :Bm + 1 - mi] + val[i]
+        cur = dp[ci:, mi:]
+        better = cand > cur + 1e-12
+        take[i, ci:, mi:] = better
+        dp[ci:, mi:] = np.where(better, cand, cur)
+
+    # Telusur balik dari anggaran penuh
+    sel, rc, rm = [], Bc, Bm
+    for i in range(n - 1, -1, -1):
+        if take[i, rc, rm]:
+            sel.append(i)
+            rc -= int(c[i])
+            rm -= int(m[i])
+    return np.array(sel[::-1], dtype=int)
+
+
+def _knapsack_bnb(val, c, m, Bc, Bm, node_limit):
+    """
+    Branch-and-bound DFS. Batas atas: relaksasi LP (Dantzig) dari kendala
+    surrogate (1-t)*c/Bc + t*m/Bm <= 1, dengan t dipilih yang memberi
+    batas akar terkecil. None bila node_limit terlampaui.
+    """
+    n = len(val)
+    sc, sm = c / max(Bc, 1e-12), m / max(Bm, 1e-12)
+
+    def dantzig(ratio, order, used, k, v, Wp, Vp):
+        r = 1.0 - used
+        j = int(np.searchsorted(Wp, Wp[k] + r, side="right")) - 1
+        b = v + Vp[j] - Vp[k]
+        if j < n:
+            b += (r - (Wp[j] - Wp[k])) * ratio[order[j]]
+        return b
+
+    best_root, setup = np.inf, None
+    for t in (0.0, 0.1, 0.25, 0.5, 0.75, 0.9, 1.0):
+        s = (1.0 - t) * sc + t * sm
+        ratio = np.where(s > 0, val / np.where(s > 0, s, 1.0), np.inf)
+        order = np.argsort(-ratio, kind="stable")
+        Wp = np.concatenate([[0.0], np.cumsum(s[order])])
+        Vp = np.concatenate([[0.0], np.cumsum(val[order])])
+        root = dantzig(ratio, order, 0.0, 0, 0.0, Wp, Vp)
+        if root < best_root:
+            best_root, setup = root, (s, ratio, order, Wp, Vp)
+    s, ratio, order, Wp, Vp = setup
+
+    vo, co, mo, so = val[order], c[order], m[order], s[order]
+    tol = 1e-9
+
+    # Solusi awal: greedy pada urutan rasio
+    best, best_mask, uc, um = 0.0, 0, 0.0, 0.0
+    for k in range(n):
+        if uc + co[k] <= Bc + tol and um + mo[k] <= Bm + tol:
+            uc, um = uc + co[k], um + mo[k]
+            best += vo[k]
+            best_mask |= 1 << k
+
+    stack = [(0, 0.0, 0.0, 0.0, 0.0, 0)]
+    nodes = 0
+    while stack:
+        k, uc, um, us, v, mask = stack.pop()
+        nodes += 1
+        if nodes > node_limit:
+            return None
+        if v > best + tol:
+            best, best_mask = v, mask
+        if k == n:
+            continue
+        if dantzig(ratio, order, us, k, v, Wp, Vp) <= best + tol:
+            continue
+        stack.append((k + 1, uc, um, us, v, mask))
+        if uc + co[k] <= Bc + tol and um + mo[k] <= Bm + tol:
+            stack.append((k + 1, uc + co[k], um + mo[k], us + so[k], v + vo[k], mask | (1 << k)))
+
+    return np.sort(order[[k for k in range(n) if best_mask >> k & 1]]).astype(int)
+
+
+def _frontier_model(te_v, c_v, mh_v, budget_cost, budget_mh):
+    """Bangun model epsilon-constraint sekali; target TE diubah lewat RHS 'te_min'."""
+    # Dinyatakan sebagai minimasi langsung: CBC salah menangani cutoff
+    # MIP start (warm start) pada model maksimasi
+    prob = pulp.LpProblem("Epsilon", pulp.LpMinimize)
+    x = [pulp.LpVariable(f"x{i}", lowBound=0, upBound=1, cat="Binary") for i in range(len(te_v))]
+
+    TE = pulp.LpAffineExpression(zip(x, te_v))
+    C = pulp.LpAffineExpression(zip(x, c_v))
+    MH = pulp.LpAffineExpression(zip(x, mh_v))
+
+    prob += C
+    prob += TE >= 0.0, "te_min"
+    prob += MH <= float(budget_mh), "mh_cap"
+    prob += C <= float(budget_cost), "cost_cap"
+    return prob, x
+
+
+def _solve_frontier_chunk(te_v, c_v, mh_v, budget_cost, budget_mh, targets):
+    """
+    Selesaikan beberapa target TE dengan satu model.
+    Target diproses dari TE terbesar ke terkecil: solusi target yang lebih
+    tinggi selalu feasible untuk target berikutnya, jadi dipakai sebagai
+    warm start. Mengembalikan list (target, status, posisi aksi terpilih).
+    """
+    prob, x = _frontier_model(te_v, c_v, mh_v, budget_cost, budget_mh)
+    te_row = prob.constraints["te_min"]
+    out = []
+    warm = False
+    for te in sorted(targets, reverse=True):
+        te_row.constant = -float(te)          # TE - te >= 0
+        prob.solve(pulp.PULP_CBC_CMD(msg=False, warmStart=warm))
+        status = pulp.LpStatus.get(prob.status, "Unknown")
+        sel = [i for i, v in enumerate(x) if _lp_value(v) >= 0.99]
+        if status in ("Optimal", "Feasible"):
+            for i, v in enumerate(x):
+                v.setInitialValue(1 if i in sel else 0)
+            warm = True
+        out.append((float(te), status, sel))
+    return out
+
+
 def epsilon_constraint_TE(
-    detail: pd.DataFrame, budget_cost: float, budget_mh: float, te_targets
+    detail: pd.DataFrame, budget_cost: float, budget_mh: float, te_targets,
+    workers: int = 1,
 ) -> pd.DataFrame:
     """
     Frontier epsilon-constraint: untuk tiap target TE, minimalkan Cost
     s.t. TE >= target, Cost <= budget_cost, MH <= budget_mh.
+    Model dibangun sekali; antar target hanya RHS TE yang diubah dan solusi
+    sebelumnya dipakai sebagai warm start. workers > 1 membagi target ke
+    beberapa proses (masing-masing dengan modelnya sendiri).
     Mengembalikan DataFrame: [target_TE, status, TE, Cost, MH, actions]
     """
     if detail is None or len(detail) == 0:
@@ -95,8 +314,7 @@ def epsilon_constraint_TE(
 
     detail = _coerce_numeric_cols(detail, ["TE", "Cost", "manhours"])
     if detail.index.name is None:
-        detail = detail.copy()
-        detail.index.name = "action_id"
+        detail = detail.rename_axis("action_id")
 
     # normalisasi list target
     if te_targets is None:
@@ -105,30 +323,34 @@ def epsilon_constraint_TE(
         te_targets = [te_targets]
     te_targets = [float(t) for t in te_targets]
 
-    solutions = []
-    for te in te_targets:
-        prob = pulp.LpProblem("Epsilon", pulp.LpMaximize)
-        x = {k: pulp.LpVariable(str(k), lowBound=0, upBound=1, cat="Binary") for k in detail.index}
-
-        TE = pulp.lpSum(detail.loc[k, "TE"] * x[k] for k in detail.index)
-        C = pulp.lpSum(detail.loc[k, "Cost"] * x[k] for k in detail.index)
-        MH = pulp.lpSum(detail.loc[k, "manhours"] * x[k] for k in detail.index)
+    te_v = detail["TE"].to_numpy(dtype=float)
+    c_v = detail["Cost"].to_numpy(dtype=float)
+    mh_v = detail["manhours"].to_numpy(dtype=float)
+    uniq = sorted(set(te_targets))
 
-        # Minimasi biaya → maksimasi -C
-        prob += -C
-        prob += TE >= float(te)
-        prob += MH <= float(budget_mh)
-        prob += C <= float(budget_cost)
+    solved = {}
+    if workers is not None and workers > 1 and len(uniq) > 1:
+        # Bagi target bergiliran ke tiap proses agar beban merata
+        chunks = [uniq[i::workers] for i in range(min(workers, len(uniq)))]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as ex:
+            futs = [ex.submit(_solve_frontier_chunk, te_v, c_v, mh_v, budget_cost, budget_mh, ch)
+                    for ch in chunks]
+            for f in futs:
+                for te, status, sel in f.result():
+                    solved[te] = (status, sel)
+    elif uniq:
+        for te, status, sel in _solve_frontier_chunk(te_v, c_v, mh_v, budget_cost, budget_mh, uniq):
+            solved[te] = (status, sel)
 
-        prob.solve(pulp.PULP_CBC_CMD(msg=False))
-        status = pulp.LpStatus.get(prob.status, "Unknown")
-
-        sel = [k for k, v in x.items() if _lp_value(v) >= 0.99]
-        if status in ("Optimal", "Feasible") and len(sel) > 0:
-            TE_val = float(detail.loc[sel, "TE"].sum())
-            C_val = float(detail.loc[sel, "Cost"].sum())
-            MH_val = float(detail.loc[sel, "manhours"].sum())
-            acts = ",".join(map(str, sel))
+    labels = detail.index
+    solutions = []
+    for te in te_targets:
+        status, pos = solved[te]
+        if status in ("Optimal", "Feasible") and len(pos) > 0:
+            TE_val = float(te_v[pos].sum())
+            C_val = float(c_v[pos].sum())
+            MH_val = float(mh_v[pos].sum())
+            acts = ",".join(map(str, labels[pos]))
         else:
             # infeasible / kosong → isi aman
             TE_val, C_val, MH_val, acts = (0.0, np.nan, np.nan, "")
@@ -0,0 +1,175 @@
+import hashlib
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from .processing import hor_stage1, hor_stage2, build_dematel, danp_from_T, supplier_scores, respondent_dematel
+from .ratings_cube import RatingsCube
+from .streaming import stream_dematel, stream_ratings
+
+
+def content_hash(obj: Any) -> str:
+    """
+    Stable content hash for pipeline inputs
+
+    DataFrames/Series are hashed from their values, index, column labels and
+    dtypes (not their identity), so two frames with the same content share
+    a key even when they are different objects.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    _feed(h, obj)
+    return h.hexdigest()
+
+
+def _feed(h, obj):
+    if obj is None:
+        h.update(b'None')
+    elif isinstance(obj, pd.DataFrame):
+        h.update(b'DataFrame')
+        h.update(repr((obj.shape, list(obj.columns), [str(t) for t in obj.dtypes])).encode())
+        _feed_pandas(h, obj)
+    elif isinstance(obj, pd.Series):
+        h.update(b'Series')
+        h.update(repr((obj.shape, obj.name, str(obj.dtype))).encode())
+        _feed_pandas(h, obj)
+    elif isinstance(obj, pd.Index):
+        h.update(b'Index')
+        _feed_pandas(h, obj)
+    elif isinstance(obj, np.ndarray):
+        h.update(repr((obj.shape, str(obj.dtype))).encode())
+        h.update(np.ascontiguousarray(obj).tobytes() if obj.dtype != object else pickle.dumps(obj))
+    elif isinstance(obj, dict):
+        h.update(b'dict')
+        for k in sorted(obj, key=repr):
+            _feed(h, k)
+            _feed(h, obj[k])
+    elif isinstance(obj, (list, tuple)):
+        h.update(type(obj).__name__.encode())
+        for v in obj:
+            _feed(h, v)
+    else:
+        h.update(repr(obj).encode())
+
+
+def _feed_pandas(h, obj):
+    try:
+        h.update(pd.util.hash_pandas_object(obj, index=not isinstance(obj, pd.Index)).values.tobytes())
+        if not isinstance(obj, pd.Index):
+            h.update(pd.util.hash_pandas_object(obj.index).values.tobytes())
+    except TypeError:
+        # Unhashable cell values (lists, dicts) - fall back to pickling
+        h.update(pickle.dumps(obj))
+
+
+class PipelineCache:
+    """
+    Content-keyed LRU memo for the HOR → DEMATEL → DANP → ranking stages
+
+    Each stage result is keyed on the stage name plus a hash of its input
+    frames and parameters, so a stage runs at most once per distinct input
+    no matter how many tabs ask for it. Cached results are shared between
+    callers and must be treated as read-only; the stages never write to
+    their input frames, and with pandas copy-on-write enabled (as the
+    dashboard and batch runner do) frames a caller derives from a result
+    (column selections, slices, assign) can be modified without touching
+    the cached one.
+    """
+
+    STAGES = ('hor_stage1', 'hor_stage2', 'build_dematel', 'danp_from_T', 'supplier_scores', 'respondent_dematel', 'ratings_cube')
+
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = int(maxsize)
+        self._store: "OrderedDict[tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits: Dict[str, int] = {s: 0 for s in self.STAGES}
+        self.misses: Dict[str, int] = {s: 0 for s in self.STAGES}
+
+    def run(self, stage: str, fn: Callable, *args, **kwargs):
+        """Return fn(*args, **kwargs), computing it only on a cache miss"""
+        return self.run_keyed(stage, (args, kwargs), fn, *args, **kwargs)
+
+    def run_keyed(self, stage: str, key: Any, fn: Callable, *args, **kwargs):
+        """run() keyed on content_hash(key) instead of fn's arguments, e.g. a file stamp for a path"""
+        key = (stage, content_hash(key))
+
+        with self._lock:
+            if key in self._store:
+                self._store.move_to_end(key)
+                self.hits[stage] = self.hits.get(stage, 0) + 1
+                return self._store[key]
+            self.misses[stage] = self.misses.get(stage, 0) + 1
+
+        result = fn(*args, **kwargs)
+
+        with self._lock:
+            self._store[key] = result
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+        return result
+
+    def stats(self) -> pd.DataFrame:
+        """Hit/miss counters and live entries per stage"""
+        with self._lock:
+            entries = {}
+            for stage, _ in self._store:
+                entries[stage] = entries.get(stage, 0) + 1
+            stages = list(dict.fromkeys(list(self.STAGES) + list(self.hits) + list(self.misses)))
+            return pd.DataFrame({
+                'stage': stages,
+                'hits': [self.hits.get(s, 0) for s in stages],
+                'misses': [self.misses.get(s, 0) for s in stages],
+                'entries': [entries.get(s, 0) for s in stages],
+            })
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            for d in (self.hits, self.misses):
+                for k in d:
+                    d[k] = 0
+
+    # ------------------------------------------------------------------
+    # Stage wrappers (same signatures as modules.processing)
+    # ------------------------------------------------------------------
+    def hor_stage1(self, events, agents, R):
+        return self.run('hor_stage1', hor_stage1, events, agents, R)
+
+    def hor_stage2(self, E, ARP, actions):
+        return self.run('hor_stage2', hor_stage2, E, ARP, actions)
+
+    def build_dematel(self, respondents, subcriteria, edges, **kwargs):
+        return self.run('build_dematel', build_dematel, respondents, subcriteria, edges, **kwargs)
+
+    def respondent_dematel(self, respondents, subcriteria, edges):
+        return self.run('respondent_dematel', respondent_dematel, respondents, subcriteria, edges)
+
+    def danp_from_T(self, subcriteria, criteria, T, **kwargs):
+        return self.run('danp_from_T', danp_from_T, subcriteria, criteria, T, **kwargs)
+
+    def supplier_scores(self, ratings, respondents, gw, suppliers, filters: Optional[Dict] = None):
+        return self.run('supplier_scores', supplier_scores, ratings, respondents, gw, suppliers, filters=filters)
+
+    def ratings_cube(self, ratings, respondents):
+        return self.run('ratings_cube', RatingsCube, ratings, respondents)
+
+    # Streamed variants: the row-level CSV is folded chunk by chunk and the
+    # key uses its size and mtime, so the file is neither loaded nor hashed
+    def stream_dematel(self, path, respondents, subcriteria, **kwargs):
+        return self.run_keyed('build_dematel', (_file_stamp(path), respondents, subcriteria, kwargs),
+                              stream_dematel, path, respondents, subcriteria, **kwargs)
+
+    def stream_ratings(self, path, respondents):
+        return self.run_keyed('ratings_cube', (_file_stamp(path), respondents),
+                              stream_ratings, path, respondents)
+
+
+def _file_stamp(path):
+    """(path, size, mtime_ns) of a file, as in loader.template_fingerprint"""
+    st = os.stat(path)
+    return (str(path), st.st_size, st.st_mtime_ns)
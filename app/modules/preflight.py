@@ -1,7 +1,9 @@
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
+
+from .streaming import CHUNK_ROWS
 
 # Required files and their minimal columns
 REQUIRED_FILES = {
@@ -18,6 +20,9 @@ REQUIRED_FILES = {
     'supplier_ratings.csv': ['supplier_id', 'sub_id', 'respondent_id', 'rating']
 }
 
+# Row-level files that can outgrow memory; preflight reads them in chunks
+ROW_FILES = ('dematel_edges.csv', 'supplier_ratings.csv')
+
 
 def ensure_minimal_templates(tpl_dir: Path):
     """
@@ -193,19 +198,24 @@ def preflight_report(tpl_dir: Path) -> pd.DataFrame:
             continue
         
         try:
-            # Read file
-            if filename.endswith('_R.csv') or filename.endswith('_effectiveness.csv'):
-                df = pd.read_csv(filepath, index_col=0)
+            # Read file (row-level files in chunks, see _scan_rows)
+            if filename in ROW_FILES:
+                columns, n_rows, dups = _scan_rows(filepath)
             else:
-                df = pd.read_csv(filepath)
+                if filename.endswith('_R.csv') or filename.endswith('_effectiveness.csv'):
+                    df = pd.read_csv(filepath, index_col=0)
+                else:
+                    df = pd.read_csv(filepath)
+                columns, n_rows = list(df.columns), len(df)
+                dups = {c: int(df[c].duplicated().sum()) for c in df.columns if c.endswith('_id')}
             
             # Check if empty
-            if df.empty:
+            if n_rows == 0:
                 report.append({
                     'file': filename,
                     'status': 'EMPTY',
                     'rows': 0,
-                    'cols': len(df.columns),
+                    'cols': len(columns),
                     'issues': 'File is empty'
                 })
                 continue
@@ -213,15 +223,13 @@ def preflight_report(tpl_dir: Path) -> pd.DataFrame:
             # Check required columns (skip for matrix files)
             issues = []
             if required_cols:
-                missing_cols = [col for col in required_cols if col not in df.columns]
+                missing_cols = [col for col in required_cols if col not in columns]
                 if missing_cols:
                     issues.append(f"Missing columns: {', '.join(missing_cols)}")
             
             # Check for duplicates in ID columns
-            id_cols = [c for c in df.columns if c.endswith('_id')]
-            for col in id_cols:
-                if df[col].duplicated().any():
-                    dup_count = df[col].duplicated().sum()
+            for col, dup_count in dups.items():
+                if dup_count:
                     issues.append(f"Duplicate {col}: {dup_count} rows")
             
             # Determine status
@@ -233,8 +241,8 @@ def preflight_report(tpl_dir: Path) -> pd.DataFrame:
             report.append({
                 'file': filename,
                 'status': status,
-                'rows': len(df),
-                'cols': len(df.columns),
+                'rows': n_rows,
+                'cols': len(columns),
                 'issues': '; '.join(issues) if issues else 'None'
             })
         
@@ -250,6 +258,23 @@ def preflight_report(tpl_dir: Path) -> pd.DataFrame:
     return pd.DataFrame(report)
 
 
+def _scan_rows(filepath: Path, chunksize: int = CHUNK_ROWS) -> Tuple[List[str], int, Dict[str, int]]:
+    """
+    Columns, row count and duplicate count per *_id column of a CSV,
+    read in chunks; memory grows with the distinct IDs, not the rows
+    """
+    columns = list(pd.read_csv(filepath, nrows=0).columns)
+    id_cols = [c for c in columns if c.endswith('_id')]
+    seen = {c: pd.Index([]) for c in id_cols}
+    n_rows = 0
+    for chunk in pd.read_csv(filepath, chunksize=chunksize, dtype={c: 'category' for c in id_cols}):
+        n_rows += len(chunk)
+        for c in id_cols:
+            seen[c] = seen[c].union(pd.Index(chunk[c].cat.categories).astype(object)
+                                    .append(pd.Index([np.nan] if chunk[c].isna().any() else [])))
+    return columns, n_rows, {c: n_rows - len(seen[c]) for c in id_cols}
+
+
 def check_data_integrity(tpl_dir: Path) -> Dict[str, List[str]]:
     """
     Perform deeper data integrity checks
@@ -2,6 +2,8 @@ import pandas as pd
 import numpy as np
 from typing import Tuple, Dict, Optional
 
+from .results import DanpResult, DematelResult
+
 def safe_reindex(df: pd.DataFrame, index=None, columns=None, fill=0):
     """Safely reindex DataFrame with fill values"""
     if df is None or df.empty:
@@ -9,19 +11,13 @@ def safe_reindex(df: pd.DataFrame, index=None, columns=None, fill=0):
             return pd.DataFrame(fill, index=index, columns=columns)
         return pd.DataFrame()
     
-    out = df.copy()
-    
-    if index is not None:
-        if not isinstance(index, pd.Index):
-            index = pd.Index(index)
-        out = out.reindex(index=index, fill_value=fill)
+    if index is not None and not isinstance(index, pd.Index):
+        index = pd.Index(index)
+    if columns is not None and not isinstance(columns, pd.Index):
+        columns = pd.Index(columns)
     
-    if columns is not None:
-        if not isinstance(columns, pd.Index):
-            columns = pd.Index(columns)
-        out = out.reindex(columns=columns, fill_value=fill)
-    
-    return out
+    # reindex always returns a new frame (lazily copied under copy-on-write)
+    return df.reindex(index=index, columns=columns, fill_value=fill)
 
 
 def hor_stage1(events: pd.DataFrame, agents: pd.DataFrame, R: pd.DataFrame) -> Tuple[pd.DataFrame, pd.Series]:
@@ -46,19 +42,29 @@ def hor_stage1(events: pd.DataFrame, agents: pd.DataFrame, R: pd.DataFrame) -> T
         # Ensure R is aligned
         R = safe_reindex(R, index=sev.index, columns=occ.index, fill=0)
         
-        # Calculate weighted matrix
-        weighted = R.mul(sev, axis=0)
-        
-        # Calculate ARP
-        ARP = (weighted.sum(axis=0) * occ)
-        
-        return weighted, ARP
+        return _hor_weighted(R, sev, occ)
     
     except Exception as e:
         print(f"Error in hor_stage1: {e}")
         return pd.DataFrame(), pd.Series(dtype=float)
 
 
+def _hor_weighted(R: pd.DataFrame, sev: pd.Series, occ: pd.Series) -> Tuple[pd.DataFrame, pd.Series]:
+    """Weighted S×R and ARP from R already aligned to sev (rows) and occ (columns)"""
+    weighted = R.mul(sev, axis=0)
+    ARP = weighted.sum(axis=0) * occ
+    return weighted, ARP
+
+
+def _hor_detail(TE, difficulty, cost, manhours, index) -> pd.DataFrame:
+    """Stage 2 detail frame from per-action arrays in ``index`` order, sorted by ETD"""
+    detail = pd.DataFrame({'TE': TE, 'Difficulty': difficulty, 'Cost': cost, 'manhours': manhours},
+                          index=index)
+    detail['Difficulty'] = detail['Difficulty'].clip(lower=1e-9)
+    detail['ETD'] = detail['TE'] / detail['Difficulty']
+    return detail.sort_values('ETD', ascending=False)
+
+
 def hor_stage2(E, ARP, actions):
     import numpy as np
     import pandas as pd
@@ -75,42 +81,305 @@ def hor_stage2(E, ARP, actions):
     TE = E2.mul(ARP, axis=1).sum(axis=1)                        # kalikan per kolom (agen) → jumlahkan per baris (aksi)
     TE.name = 'TE'
 
-    # Pastikan kolom2 aksi tersedia (isi default bila tidak ada)
-    if 'difficulty' not in actions.columns: actions['difficulty'] = 1.0
-    if 'cost' not in actions.columns:       actions['cost'] = 0.0
-    if 'manhours' not in actions.columns:   actions['manhours'] = 0.0
+    # Kolom aksi yang tidak ada diisi default di sini saja; `actions` milik
+    # pemanggil (bisa frame cache yang dibagi antar sesi) tidak diubah
+    def col(name, default):
+        if name not in actions.columns:
+            return pd.Series(default, index=actions.index)
+        return pd.to_numeric(actions[name], errors='coerce').fillna(default)
 
-    # Susun detail ter-align ke index aksi
+    # Susun detail ter-align ke index aksi (posisional, index aksi boleh duplikat)
     idx_actions = actions.index
-    detail = pd.DataFrame(index=idx_actions)
-    detail['TE']        = TE.reindex(idx_actions).fillna(0)
-    detail['Difficulty']= pd.to_numeric(actions['difficulty'], errors='coerce').fillna(1.0).clip(lower=1e-9)
-    detail['Cost']      = pd.to_numeric(actions['cost'],       errors='coerce').fillna(0.0)
-    detail['manhours']  = pd.to_numeric(actions['manhours'],   errors='coerce').fillna(0.0)
+    return _hor_detail(TE.reindex(idx_actions).fillna(0).to_numpy(),
+                       col('difficulty', 1.0).to_numpy(),
+                       col('cost', 0.0).to_numpy(),
+                       col('manhours', 0.0).to_numpy(),
+                       idx_actions)
+
+
+def hor_batch(events: pd.DataFrame, agents: pd.DataFrame, R: pd.DataFrame,
+              E: pd.DataFrame, actions: pd.DataFrame,
+              severity=None, occurrence=None) -> Dict[str, pd.DataFrame]:
+    """
+    HOR Stage 1 + 2 for K (severity, occurrence) scenarios at once
+
+    Equivalent to K calls of hor_stage1 → hor_stage2, but every scenario
+    is a row of a matrix product against the aligned R and E:
+
+        ARP = (S @ R) * O          K × agents
+        TE  = ARP @ E.T            K × actions
+        ETD = TE / difficulty
+
+    Args:
+        severity: (K, n_events) array in events['event_id'] order, or a
+            1-D vector; None uses events['severity'] for every scenario
+        occurrence: (K, n_agents) array in agents['agent_id'] order, or a
+            1-D vector; None uses agents['occurrence']
+        A scenario axis of length 1 is broadcast against the other.
+
+    Returns:
+        Dict with 'ARP', 'TE' and 'ETD' DataFrames (rows = scenario 0..K-1,
+        columns = agent / action ids), 'Difficulty' per action and K.
+        Missing or empty templates give K rows with no columns, as
+        hor_stage1 / hor_stage2 return empty results for them.
+    """
+    if any(df is None or df.empty for df in (events, agents, R, E, actions)):
+        K = max([np.atleast_2d(np.asarray(v, dtype=float)).shape[0]
+                 for v in (severity, occurrence) if v is not None] or [1])
+        empty = pd.DataFrame(index=pd.RangeIndex(K), columns=pd.Index([]), dtype=float)
+        return {
+            'ARP': empty,
+            'TE': empty.copy(),
+            'ETD': empty.copy(),
+            'Difficulty': pd.Series(dtype=float, name='Difficulty'),
+            'K': K,
+        }
+
+    event_ids = events['event_id']
+    agent_ids = agents['agent_id']
+
+    S = np.atleast_2d(np.asarray(events['severity'] if severity is None else severity, dtype=float))
+    O = np.atleast_2d(np.asarray(agents['occurrence'] if occurrence is None else occurrence, dtype=float))
+    if S.shape[1] != len(event_ids) or O.shape[1] != len(agent_ids):
+        raise ValueError(f"severity must have {len(event_ids)} columns and occurrence {len(agent_ids)}, "
+                         f"got {S.shape[1]} and {O.shape[1]}")
+    if S.shape[0] != O.shape[0] and 1 not in (S.shape[0], O.shape[0]):
+        raise ValueError(f"scenario counts differ: {S.shape[0]} severity vs {O.shape[0]} occurrence rows")
+    K = max(S.shape[0], O.shape[0])
+
+    R_arr, E_arr, difficulty = _hor_arrays(events, agents, R, E, actions)
+    action_ids = actions.index
+
+    ARP = (S @ R_arr) * O
+    TE = ARP @ E_arr.T
+    ETD = TE / difficulty.to_numpy(float)
+
+    return {
+        'ARP': pd.DataFrame(ARP, columns=pd.Index(agent_ids)),
+        'TE': pd.DataFrame(TE, columns=action_ids),
+        'ETD': pd.DataFrame(ETD, columns=action_ids),
+        'Difficulty': difficulty.rename('Difficulty'),
+        'K': K,
+    }
+
+
+def _hor_arrays(events: pd.DataFrame, agents: pd.DataFrame, R: pd.DataFrame,
+                E: pd.DataFrame, actions: pd.DataFrame):
+    """
+    R (events × agents) and E (actions × agents) as float arrays, aligned
+    the same way hor_stage1 / hor_stage2 align them, plus the clipped
+    per-action difficulty Series
+    """
+    event_ids, agent_ids, action_ids = events['event_id'], agents['agent_id'], actions.index
+    R_arr = safe_reindex(R, index=event_ids, columns=agent_ids, fill=0).to_numpy(float)
+    E_arr = (E.reindex(columns=agent_ids, fill_value=0).reindex(index=action_ids)
+             .apply(pd.to_numeric, errors='coerce').fillna(0).to_numpy(float))
+    difficulty = (pd.to_numeric(actions['difficulty'], errors='coerce').fillna(1.0).clip(lower=1e-9)
+                  if 'difficulty' in actions.columns else pd.Series(1.0, index=action_ids))
+    return R_arr, E_arr, difficulty
+
+
+def aggregate_edges(edges: pd.DataFrame, respondents: pd.DataFrame,
+                    subs) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Aggregate DEMATEL edges into weighted score sums and weight counts
+    
+    from_sub/to_sub are integer-coded against ``subs`` and reduced with a
+    weighted bincount, so the cost is linear in the number of edge rows.
+    Self-influence and unknown sub_ids are skipped; respondents without a
+    weight count as 1.0.
+    
+    Returns:
+        Tuple of (A_sum, CNT) as n×n float arrays ordered like ``subs``
+    """
+    n = len(subs)
+    
+    if edges is None or edges.empty or n == 0:
+        return np.zeros((n, n)), np.zeros((n, n))
+    
+    return _edge_sums(*_edge_terms(edges, respondents, subs), n)
+
+
+def _edge_sums(flat: np.ndarray, sw: np.ndarray, w: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """(A_sum, CNT) n×n from _edge_cells' flat cells, weighted scores and weights"""
+    A_sum = np.bincount(flat, weights=sw, minlength=n * n).reshape(n, n)
+    CNT = np.bincount(flat, weights=w, minlength=n * n).reshape(n, n)
+    return A_sum, CNT
+
+
+def respondent_tensor(edges: pd.DataFrame, respondents: pd.DataFrame,
+                      subs) -> Tuple[pd.Index, np.ndarray, np.ndarray]:
+    """
+    Per-respondent DEMATEL score sums and weight counts
+    
+    Same coding and weighting as aggregate_edges, but kept apart per
+    respondent_id found in ``edges``; summing over the first axis gives
+    aggregate_edges' (A_sum, CNT).
+    
+    Returns:
+        Tuple of (respondent ids, A_sum, CNT); the arrays are k×n×n
+    """
+    n = len(subs)
+    if edges is None or edges.empty or n == 0:
+        return pd.Index([]), np.zeros((0, n, n)), np.zeros((0, n, n))
+    
+    codes, resp_ids = pd.factorize(edges['respondent_id'])
+    flat, sw, w, keep = _edge_terms(edges, respondents, subs, return_mask=True)
+    k = len(resp_ids)
+    flat = codes[keep] * (n * n) + flat
+    
+    A_sum = np.bincount(flat, weights=sw, minlength=k * n * n).reshape(k, n, n)
+    CNT = np.bincount(flat, weights=w, minlength=k * n * n).reshape(k, n, n)
+    return pd.Index(resp_ids), A_sum, CNT
+
+
+def _edge_terms(edges: pd.DataFrame, respondents: pd.DataFrame, subs, return_mask=False):
+    """Flat (from, to) cell, weighted score and weight of every usable edge row"""
+    sub_index = pd.Index(subs)
+    fi = sub_index.get_indexer(edges['from_sub'])
+    tj = sub_index.get_indexer(edges['to_sub'])
+    
+    if 'score' in edges.columns:
+        s = edges['score'].to_numpy(dtype=float)
+    else:
+        s = np.zeros(len(edges))
+    
+    # Respondent weights (last duplicate wins, unknown respondents -> 1.0)
+    if respondents is not None and 'weight' in respondents.columns:
+        wmap = pd.Series(
+            respondents['weight'].to_numpy(dtype=float),
+            index=respondents['respondent_id']
+        )
+        wmap = wmap[~wmap.index.duplicated(keep='last')]
+        rid = edges['respondent_id']
+        w = np.where(rid.isin(wmap.index).to_numpy(), rid.map(wmap).to_numpy(dtype=float), 1.0)
+    else:
+        w = np.ones(len(edges))
+    
+    return _edge_cells(fi, tj, s, w, len(sub_index), return_mask)
+
+
+def _edge_cells(fi: np.ndarray, tj: np.ndarray, s: np.ndarray, w: np.ndarray, n: int, return_mask=False):
+    """
+    Flat cell, weighted score and weight of the usable rows of coded edges
+    (from/to codes in 0..n-1; other codes and self-influence are skipped)
+    """
+    keep = (fi >= 0) & (fi < n) & (tj >= 0) & (tj < n) & (fi != tj)
+    out = (fi[keep].astype(np.int64) * n + tj[keep], s[keep] * w[keep], w[keep])
+    return out + (keep,) if return_mask else out
+
+
+def total_relation(X: np.ndarray, solver: str = 'solve', tol: float = 1e-12,
+                   max_iter: int = 32) -> Tuple[np.ndarray, np.ndarray, Dict]:
+    """
+    Total relation matrix T = X(I-X)^-1 without forming an explicit inverse
+    
+    solver:
+        'solve'   - factorize (I-X) once and solve for all columns of X
+        'neumann' - truncated series X + X² + … summed by repeated doubling,
+                    stops when the next term falls below ``tol`` (relative);
+                    falls back to 'solve' if it does not converge
+        'inverse' - legacy np.linalg.inv path
+    Singular systems fall back to the pseudo-inverse.
+    
+    (I-X)^-1 is recovered as I + T, so the condition number is reported
+    from the 1-norms of both without an extra O(n³) decomposition.
+    
+    Returns:
+        Tuple of (T, (I-X)^-1, info) where info has solver, cond, iterations
+    """
+    n = X.shape[0]
+    eye = np.eye(n)
+    ImX = eye - X
+    info = {'solver': solver, 'cond': np.nan, 'iterations': 0}
+    T, ImX_inv = None, None
+    
+    if solver == 'neumann':
+        T = X.copy()
+        P = X.copy()
+        scale = max(np.abs(T).max(), 1e-300)
+        for it in range(1, max_iter + 1):
+            step = P @ T
+            T = T + step
+            info['iterations'] = it
+            err = np.abs(step).max() / scale
+            if err < tol:
+                break
+            if not np.isfinite(err):
+                T = None
+                break
+            P = P @ P
+        else:
+            T = None
+        
+        if T is None:
+            # Diverging or too slow (spectral radius ~1) - solve directly
+            info['solver'] = 'neumann->solve'
+            solver = 'solve'
+    
+    if T is None:
+        try:
+            if solver == 'inverse':
+                ImX_inv = np.linalg.inv(ImX)
+                T = X @ ImX_inv
+            else:
+                # T(I-X) = X  <=>  (I-X)^T T^T = X^T
+                T = np.linalg.solve(ImX.T, X.T).T
+                if info['solver'] != 'neumann->solve':
+                    info['solver'] = 'solve'
+        except np.linalg.LinAlgError:
+            # Singular matrix - use pseudo-inverse
+            ImX_inv = np.linalg.pinv(ImX)
+            T = X @ ImX_inv
+            info['solver'] = 'pinv'
+    
+    if ImX_inv is None:
+        ImX_inv = eye + T
+    if info['solver'] == 'pinv':
+        info['cond'] = np.inf
+    else:
+        info['cond'] = float(np.abs(ImX).sum(axis=0).max() * np.abs(ImX_inv).sum(axis=0).max())
+    
+    return T, ImX_inv, info
+
+
+def total_relation_batch(X: np.ndarray) -> np.ndarray:
+    """
+    T = X(I-X)^-1 for a stack of matrices (…×n×n) in one batched solve
+    
+    Falls back to total_relation slice by slice when any slice is singular.
+    """
+    n = X.shape[-1]
+    if X.size == 0:
+        return X.copy()
+    try:
+        # T(I-X) = X  <=>  (I-X)^T T^T = X^T
+        ImX_T = np.swapaxes(np.eye(n) - X, -1, -2)
+        return np.swapaxes(np.linalg.solve(ImX_T, np.swapaxes(X, -1, -2)), -1, -2)
+    except np.linalg.LinAlgError:
+        flat = X.reshape(-1, n, n)
+        return np.stack([total_relation(x)[0] for x in flat]).reshape(X.shape)
 
-    detail['ETD'] = detail['TE'] / detail['Difficulty']
-    return detail.sort_values('ETD', ascending=False)
 
 def build_dematel(respondents: pd.DataFrame, subcriteria: pd.DataFrame, 
-                  edges: pd.DataFrame) -> Dict:
+                  edges: pd.DataFrame, solver: str = 'solve',
+                  tol: float = 1e-12, max_iter: int = 32) -> DematelResult:
     """
     Build DEMATEL matrices
     
+    Args:
+        solver: 'solve', 'neumann' or 'inverse' (see total_relation)
+        tol, max_iter: convergence controls for the Neumann series
+    
     Returns:
-        Dict with A, X, I, ImX, ImX_inv, T, r, c, alpha
+        results.DematelResult, a read-only mapping with A, X, I, ImX,
+        ImX_inv, T, r, c, alpha, solver (path that ran), cond (1-norm
+        condition number of I-X) and iterations (Neumann doubling steps,
+        0 otherwise). Only A and T are stored; the other matrices are
+        built on first access.
     """
     # Initialize empty result
-    empty_result = {
-        'A': pd.DataFrame(),
-        'X': pd.DataFrame(),
-        'I': pd.DataFrame(),
-        'ImX': pd.DataFrame(),
-        'ImX_inv': pd.DataFrame(),
-        'T': pd.DataFrame(),
-        'r': pd.Series(dtype=float),
-        'c': pd.Series(dtype=float),
-        'alpha': 1.0
-    }
+    empty_result = _empty_dematel()
     
     if subcriteria is None or subcriteria.empty:
         return empty_result
@@ -125,211 +394,375 @@ def build_dematel(respondents: pd.DataFrame, subcriteria: pd.DataFrame,
         # Get subcriteria list
         subs = subcriteria['sub_id'].tolist()
         
-        # Initialize matrices
-        A = pd.DataFrame(0.0, index=subs, columns=subs)
-        CNT = pd.DataFrame(0.0, index=subs, columns=subs)
-        
-        # Get respondent weights
-        wmap = dict(zip(
-            respondents['respondent_id'],
-            respondents.get('weight', 1.0)
-        ))
-        
-        # Build average influence matrix A
-        for _, r in edges.iterrows():
-            i, j = r['from_sub'], r['to_sub']
-            
-            # Skip self-influence and invalid indices
-            if i == j or i not in A.index or j not in A.columns:
-                continue
-            
-            s = float(r.get('score', 0))
-            w = float(wmap.get(r['respondent_id'], 1.0))
-            
-            A.at[i, j] += s * w
-            CNT.at[i, j] += w
-        
-        # Average by weight count
-        A = A.divide(CNT.replace(0, np.nan)).fillna(0.0)
+        # Build average influence matrix A (single vectorized pass)
+        A_sum, CNT = aggregate_edges(edges, respondents, subs)
+        return dematel_from_sums(A_sum, CNT, subs, solver=solver, tol=tol, max_iter=max_iter)
+    
+    except Exception as e:
+        print(f"Error in build_dematel: {e}")
+        return empty_result
+
+
+def dematel_from_sums(A_sum: np.ndarray, CNT: np.ndarray, subs, solver: str = 'solve',
+                      tol: float = 1e-12, max_iter: int = 32) -> DematelResult:
+    """
+    build_dematel from aggregate_edges' (A_sum, CNT), e.g. when the sums
+    were folded chunk by chunk (see streaming.stream_edges)
+    
+    Returns:
+        Same DematelResult as build_dematel
+    """
+    try:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            A_vals = A_sum / np.where(CNT != 0, CNT, np.nan)
+        A_vals[np.isnan(A_vals)] = 0.0
         
         # Normalize with alpha
-        row_max = A.sum(axis=1).max()
-        col_max = A.sum(axis=0).max()
-        max_val = max(row_max, col_max)
-        
+        max_val = max(A_vals.sum(axis=1).max(), A_vals.sum(axis=0).max()) if A_vals.size else 0.0
         alpha = 1.0 / max_val if max_val > 0 else 1.0
         
-        X = A * alpha
-        
-        # Identity matrix
-        n = X.shape[0]
-        I = pd.DataFrame(np.eye(n), index=X.index, columns=X.columns)
-        
-        # (I - X)
-        ImX = I - X
-        
-        # (I - X)^-1
-        try:
-            ImX_inv = pd.DataFrame(
-                np.linalg.inv(ImX.values),
-                index=X.index,
-                columns=X.columns
-            )
-        except np.linalg.LinAlgError:
-            # Singular matrix - use pseudo-inverse
-            ImX_inv = pd.DataFrame(
-                np.linalg.pinv(ImX.values),
-                index=X.index,
-                columns=X.columns
-            )
-        
         # Total relation matrix T = X(I-X)^-1
-        T = X @ ImX_inv
-        
-        # Calculate r and c
-        r = T.sum(axis=1)
-        c = T.sum(axis=0)
+        T_vals, inv_vals, info = total_relation(
+            A_vals * alpha, solver=solver, tol=tol, max_iter=max_iter
+        )
+        # (I-X)^-1 is kept only when it is not simply I + T
+        explicit = info['solver'] in ('inverse', 'pinv')
         
-        return {
-            'A': A,
-            'X': X,
-            'I': I,
-            'ImX': ImX,
-            'ImX_inv': ImX_inv,
-            'T': T,
-            'r': r,
-            'c': c,
-            'alpha': alpha
-        }
+        return DematelResult(subs, A_vals, alpha, T_vals, inv_vals if explicit else None,
+                             solver=info['solver'], cond=info['cond'], iterations=info['iterations'])
     
     except Exception as e:
         print(f"Error in build_dematel: {e}")
-        return empty_result
+        return _empty_dematel()
 
 
-def danp_from_T(subcriteria: pd.DataFrame, criteria: pd.DataFrame, 
-                T: pd.DataFrame) -> Dict:
+def _empty_dematel() -> DematelResult:
+    return DematelResult.empty()
+
+
+def respondent_dematel(respondents: pd.DataFrame, subcriteria: pd.DataFrame,
+                       edges: pd.DataFrame) -> Dict:
     """
-    Calculate DANP weights from DEMATEL total relation matrix
+    Per-respondent DEMATEL matrices and panel consensus diagnostics
+    
+    A_r (respondent's own average direct-influence matrix) comes from one
+    scatter of the edges into a respondents × subs × subs tensor; each A_r
+    is alpha-normalized on its own and all T_r are solved in one batch.
+    
+    Consensus (respondents in order of first appearance in edges):
+        gap_ratio      - average gap ratio after each respondent p:
+                         mean over rated cells of |Ā_p - Ā_(p-1)| / Ā_p,
+                         where Ā_p is the weighted mean of the first p
+                         respondents (< 5% is the usual "enough experts")
+        deviation      - per respondent: n_ratings, mad (mean |A_r - Ā_-r|
+                         over the cells they rated, Ā_-r = leave-one-out
+                         group mean), rel_dev (mad / mean Ā_-r on those
+                         cells) and t_dev (‖T_r - T‖ / ‖T‖, Frobenius,
+                         against the group T)
+        cell_std       - weighted standard deviation of the ratings per cell
     
     Returns:
-        Dict with T_alpha_c, W_un, Td, T_alpha_d, W_alpha, W_limit, gw
+        Dict with respondents (Index), subs, A, T (k×n×n arrays), alpha (k),
+        gap_ratio (Series indexed by panel size), average_gap_ratio,
+        deviation (DataFrame by respondent_id) and cell_std (DataFrame)
     """
-    # Initialize empty result
-    empty_result = {
-        'T_alpha_c': pd.DataFrame(),
-        'W_un': pd.DataFrame(),
-        'Td': pd.DataFrame(),
-        'T_alpha_d': pd.DataFrame(),
-        'W_alpha': pd.DataFrame(),
-        'W_limit': pd.DataFrame(),
-        'gw': pd.Series(dtype=float)
+    subs = subcriteria['sub_id'].tolist() if subcriteria is not None and not subcriteria.empty else []
+    n = len(subs)
+    resp_ids, A_sum, CNT = respondent_tensor(edges, respondents, subs)
+    k = len(resp_ids)
+    
+    result = {
+        'respondents': resp_ids,
+        'subs': subs,
+        'A': np.zeros((k, n, n)),
+        'T': np.zeros((k, n, n)),
+        'alpha': np.ones(k),
+        'gap_ratio': pd.Series(dtype=float),
+        'average_gap_ratio': np.nan,
+        'deviation': pd.DataFrame(columns=['n_ratings', 'mad', 'rel_dev', 't_dev']),
+        'cell_std': pd.DataFrame(),
     }
+    if k == 0 or n == 0:
+        return result
+    
+    def ratio(num, den):
+        return np.divide(num, den, out=np.zeros(np.broadcast(num, den).shape), where=den != 0)
+    
+    # Individual matrices and their total relation
+    A = ratio(A_sum, CNT)
+    max_val = np.maximum(A.sum(axis=2).max(axis=1), A.sum(axis=1).max(axis=1))
+    alpha = 1.0 / np.where(max_val > 0, max_val, 1.0)
+    T = total_relation_batch(A * alpha[:, None, None])
+    
+    # Group matrix (same as build_dematel) and its T
+    S_tot, C_tot = A_sum.sum(axis=0), CNT.sum(axis=0)
+    A_grp = ratio(S_tot, C_tot)
+    g_max = max(A_grp.sum(axis=1).max(), A_grp.sum(axis=0).max())
+    T_grp = total_relation(A_grp * (1.0 / g_max if g_max > 0 else 1.0))[0]
+    
+    # Average gap ratio along the growing panel
+    A_p = ratio(np.cumsum(A_sum, axis=0), np.cumsum(CNT, axis=0))
+    rated = A_p[1:] > 0
+    gaps = ratio(np.abs(A_p[1:] - A_p[:-1]), A_p[1:])
+    n_rated = rated.sum(axis=(1, 2))
+    agr = ratio((gaps * rated).sum(axis=(1, 2)), n_rated)
+    agr[n_rated == 0] = np.nan
+    gap_ratio = pd.Series(agr, index=pd.RangeIndex(2, k + 1, name='panel_size'), name='gap_ratio')
+    
+    # Leave-one-out deviation on each respondent's rated cells
+    mine = CNT > 0
+    loo_cnt = C_tot[None] - CNT
+    A_loo = ratio(S_tot[None] - A_sum, loo_cnt)
+    cmp_cells = mine & (loo_cnt > 0)
+    n_cmp = cmp_cells.sum(axis=(1, 2))
+    abs_dev = (np.abs(A - A_loo) * cmp_cells).sum(axis=(1, 2))
+    loo_level = (A_loo * cmp_cells).sum(axis=(1, 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mad = np.where(n_cmp > 0, abs_dev / n_cmp, np.nan)
+        rel_dev = np.where(loo_level > 0, abs_dev / loo_level, np.nan)
+    t_norm = np.linalg.norm(T_grp)
+    t_dev = np.linalg.norm(T - T_grp[None], axis=(1, 2)) / (t_norm if t_norm > 0 else 1.0)
+    deviation = pd.DataFrame({
+        'n_ratings': mine.sum(axis=(1, 2)),
+        'mad': mad,
+        'rel_dev': rel_dev,
+        't_dev': t_dev,
+    }, index=pd.Index(resp_ids, name='respondent_id'))
+    
+    # Weighted spread of the ratings per cell
+    var = ratio((CNT * (A - A_grp[None]) ** 2).sum(axis=0), C_tot)
+    
+    result.update({
+        'A': A,
+        'T': T,
+        'alpha': alpha,
+        'gap_ratio': gap_ratio,
+        'average_gap_ratio': float(agr[-1]) if len(agr) else np.nan,
+        'deviation': deviation,
+        'cell_std': pd.DataFrame(np.sqrt(var), index=subs, columns=subs),
+    })
+    return result
+
+
+def criterion_codes(subcriteria: pd.DataFrame, crits, ids) -> np.ndarray:
+    """
+    Position of each id's criterion within ``crits`` (-1 if unknown)
+    
+    Computed once per DANP run so block reductions can replace repeated
+    ``subcriteria.loc[...]`` lookups.
+    """
+    sub_to_crit = pd.Series(
+        subcriteria['criterion_id'].values,
+        index=subcriteria['sub_id'].values
+    )
+    sub_to_crit = sub_to_crit[~sub_to_crit.index.duplicated(keep='last')]
+    crit_of = pd.Index(ids).map(sub_to_crit)
+    return pd.Index(crits).get_indexer(crit_of)
+
+
+def _membership(codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """One-hot membership matrix (len(codes) × n_groups); -1 rows stay zero"""
+    M = np.zeros((len(codes), n_groups))
+    ok = codes >= 0
+    M[np.flatnonzero(ok), codes[ok]] = 1.0
+    return M
+
+
+def limit_supermatrix(W: np.ndarray, tol: float = 1e-12,
+                      max_iter: int = 64) -> Tuple[np.ndarray, Dict]:
+    """
+    Limit supermatrix of a column-stochastic W
+    
+    Primitive W (irreducible, aperiodic) has W^∞ = π·1ᵀ, where π is the
+    unique stationary vector; π is found with one linear solve of
+    (W - I)π = 0, Σπ = 1. Periodic, reducible or substochastic matrices
+    (zero columns) have no plain power limit, so they fall back to the
+    Cesàro average (W + W² + … + W^N)/N, doubled N until it settles.
+    
+    Returns:
+        Tuple of (W_limit, info) where info has method ('linear' or
+        'cesaro'), iterations, residual (max |W·L - L|), converged,
+        periodic and reducible
+    """
+    n = W.shape[0]
+    info = {'method': None, 'iterations': 0, 'residual': np.nan,
+            'converged': False, 'periodic': False, 'reducible': False}
+    if n == 0:
+        return W.copy(), info
+    
+    stochastic = np.allclose(W.sum(axis=0), 1.0, atol=1e-9)
+    if stochastic:
+        # Spectrum on the unit circle: λ=1 multiplicity and other |λ|≈1
+        lam = np.linalg.eigvals(W)
+        on_circle = np.abs(np.abs(lam) - 1.0) < 1e-8
+        at_one = on_circle & (np.abs(lam - 1.0) < 1e-8)
+        info['reducible'] = bool(at_one.sum() > 1)
+        info['periodic'] = bool((on_circle & ~at_one).any())
+    else:
+        info['reducible'] = True
     
+    if stochastic and not info['reducible'] and not info['periodic']:
+        A = W - np.eye(n)
+        A[-1, :] = 1.0
+        b = np.zeros(n)
+        b[-1] = 1.0
+        try:
+            pi = np.linalg.solve(A, b)
+            L = np.outer(pi, np.ones(n))
+            info['method'] = 'linear'
+            info['residual'] = float(np.abs(W @ pi - pi).max())
+            info['converged'] = info['residual'] < max(tol, 1e-9)
+            if info['converged']:
+                return L, info
+        except np.linalg.LinAlgError:
+            pass
+    
+    # Cesàro averaging by doubling: C_2m = (C_m + W^m C_m) / 2
+    L = W.copy()
+    P = W.copy()
+    info['method'] = 'cesaro'
+    delta = np.inf
+    for it in range(1, max_iter + 1):
+        L_new = 0.5 * (L + P @ L)
+        P = P @ P
+        if stochastic:
+            # Squaring compounds round-off in the column sums; pin them to 1
+            P /= P.sum(axis=0)
+            L_new /= L_new.sum(axis=0)
+        delta = np.abs(L_new - L).max()
+        L = L_new
+        info['iterations'] = it
+        if delta < tol:
+            break
+    info['residual'] = float(np.abs(W @ L - L).max())
+    info['converged'] = bool(delta < tol)
+    
+    return L, info
+
+
+def danp_from_T(subcriteria: pd.DataFrame, criteria: pd.DataFrame, 
+                T: pd.DataFrame, limit_tol: float = 1e-12) -> DanpResult:
+    """
+    Calculate DANP weights from DEMATEL total relation matrix
+    
+    Returns:
+        results.DanpResult, a read-only mapping with T_alpha_c, W_un, Td,
+        T_alpha_d, W_alpha, W_limit, gw and limit diagnostics
+        (limit_method, limit_iterations, limit_residual, limit_converged).
+        Only gw, the C×C block means and the limit vector are stored
+        (T is referenced, not copied); the n×n matrices are rebuilt on
+        first access.
+    """
     if T is None or T.empty:
-        return empty_result
+        return DanpResult.empty()
     
     if subcriteria is None or subcriteria.empty:
-        return empty_result
+        return DanpResult.empty()
     
     if criteria is None or criteria.empty:
-        return empty_result
+        return DanpResult.empty()
     
     try:
-        subs = subcriteria['sub_id'].tolist()
         crits = criteria['criterion_id'].tolist()
         
-        # T_alpha_c: normalize T by row sums within criteria
-        T_alpha_c = T.copy()
+        # Group-index representation: criterion position per row/column of T
+        g_row = criterion_codes(subcriteria, crits, T.index)
+        g_col = criterion_codes(subcriteria, crits, T.columns)
+        C = len(crits)
+        Tv = np.asarray(T.values, dtype=float)
         
-        for crit in crits:
-            rows = subcriteria.loc[
-                subcriteria['criterion_id'] == crit, 'sub_id'
-            ].tolist()
-            
-            if rows:
-                row_sum = T.loc[rows, :].sum(axis=1).replace(0, 1.0)
-                T_alpha_c.loc[rows, :] = T.loc[rows, :].div(row_sum, axis=0)
+        # T_alpha_c: normalize T by row sums for rows belonging to a criterion
+        Tac = DanpResult.T_alpha_c_values(Tv, g_row)
         
-        # W_un: transpose of T_alpha_c
-        W_un = T_alpha_c.T.copy()
+        # Td: block means of T over criterion-membership matrices
+        M_row = _membership(g_row, C)
+        M_col = _membership(g_col, C)
+        block_sum = M_row.T @ Tv @ M_col
+        block_cnt = np.outer(M_row.sum(axis=0), M_col.sum(axis=0))
+        Td_vals = np.divide(block_sum, block_cnt,
+                            out=np.zeros((C, C)), where=block_cnt > 0)
         
-        # Td: aggregate T to criteria level
-        Td = pd.DataFrame(0.0, index=crits, columns=crits)
-        
-        for a in crits:
-            rows = subcriteria.loc[
-                subcriteria['criterion_id'] == a, 'sub_id'
-            ].tolist()
-            
-            for b in crits:
-                cols = subcriteria.loc[
-                    subcriteria['criterion_id'] == b, 'sub_id'
-                ].tolist()
-                
-                if rows and cols:
-                    Td.at[a, b] = float(T.loc[rows, cols].mean().mean())
-        
-        # T_alpha_d: normalize Td by rows
-        row_sum = Td.sum(axis=1).replace(0, 1.0)
-        T_alpha_d = Td.div(row_sum, axis=0)
-        
-        # W_alpha: adjust W_un by criteria influences
-        W_alpha = W_un.copy()
-        sub_to_crit = dict(zip(subcriteria['sub_id'], subcriteria['criterion_id']))
-        
-        for col in W_alpha.columns:
-            cj = sub_to_crit.get(col)
-            if cj is None:
-                continue
-            
-            for ci in crits:
-                rows = subcriteria.loc[
-                    subcriteria['criterion_id'] == ci, 'sub_id'
-                ].tolist()
-                
-                if rows:
-                    W_alpha.loc[rows, col] = W_alpha.loc[rows, col] * T_alpha_d.at[ci, cj]
-        
-        # Normalize W_alpha by columns
-        col_sum = W_alpha.sum(axis=0).replace(0, np.nan)
-        W_alpha = W_alpha.divide(col_sum, axis=1).fillna(0.0)
-        
-        # W_limit: power method to find limiting weights
-        M = W_alpha.values.copy()
-        
-        for iteration in range(120):
-            M2 = M @ M
-            
-            if np.max(np.abs(M2 - M)) < 1e-12:
-                M = M2
-                break
-            
-            M = M2
+        # W_alpha: W_un = T_alpha_cᵀ scaled blockwise by T_alpha_d (Td
+        # normalized by rows), then normalized by columns
+        W_alpha = DanpResult.W_alpha_values(Tac, DanpResult.T_alpha_d_values(Td_vals), g_row, g_col)
+        del Tac
         
-        W_limit = pd.DataFrame(M, index=W_alpha.index, columns=W_alpha.columns)
+        # W_limit: stationary distribution of the column-stochastic W_alpha
+        M, limit_info = limit_supermatrix(W_alpha, tol=limit_tol)
+        del W_alpha
         
         # Global weights: average of rows in W_limit
-        gw = W_limit.mean(axis=1)
+        gw = pd.DataFrame(M, index=T.columns, columns=T.index).mean(axis=1)
         
         # Normalize to sum to 1
         gw_sum = gw.sum()
         if gw_sum > 0:
             gw = gw / gw_sum
         
-        return {
-            'T_alpha_c': T_alpha_c,
-            'W_un': W_un,
-            'Td': Td,
-            'T_alpha_d': T_alpha_d,
-            'W_alpha': W_alpha,
-            'W_limit': W_limit,
-            'gw': gw
-        }
+        return DanpResult(T.index, T.columns, crits, Tv, g_row, g_col, Td_vals, M, gw, limit_info)
     
     except Exception as e:
         print(f"Error in danp_from_T: {e}")
-        return empty_result
+        return DanpResult.empty()
+
+
+def respondent_weights(respondents: pd.DataFrame) -> pd.Series:
+    """Respondent weights normalized to sum 1 (equal weights if unusable)"""
+    rw = respondents.set_index('respondent_id')['weight'].astype(float)
+    if not np.isfinite(rw).all() or rw.sum() <= 0:
+        rw = pd.Series(1.0, index=respondents['respondent_id'])   # fallback bobot sama rata
+    return rw / rw.sum()
+
+
+def filter_mask(values, spec) -> Optional[np.ndarray]:
+    """
+    Boolean mask of ``values`` matching a supplier filter spec
+    
+    spec:
+        'ALL', None, '' or []     - no filter (returns None)
+        scalar                    - equality
+        list / tuple / set        - any of the values (multi-select)
+        {'from': a, 'to': b}      - inclusive range, either end optional
+                                    (e.g. a time_period window)
+    """
+    vals = pd.Series(values) if not isinstance(values, pd.Series) else values
+    if isinstance(spec, dict):
+        lo, hi = spec.get('from'), spec.get('to')
+        if lo is None and hi is None:
+            return None
+        # Not in place: under copy-on-write to_numpy() views are read-only
+        m = vals.notna().to_numpy()
+        if lo is not None:
+            m = m & (vals >= lo).to_numpy()
+        if hi is not None:
+            m = m & (vals <= hi).to_numpy()
+        return m
+    if isinstance(spec, (list, tuple, set, np.ndarray, pd.Index, pd.Series)):
+        spec = list(spec)
+        if not spec or 'ALL' in spec:
+            return None
+        return vals.isin(spec).to_numpy()
+    if not spec or spec == 'ALL':
+        return None
+    return (vals == spec).to_numpy()
+
+
+def ranking_frame(scores: pd.Series, suppliers: pd.DataFrame) -> pd.DataFrame:
+    """Supplier ranking (sorted score Series indexed by supplier_id) joined to supplier master data"""
+    ranking = scores.to_frame('score')
+    
+    if suppliers is not None and not suppliers.empty:
+        ranking = ranking.merge(
+            suppliers,
+            left_index=True,
+            right_on='supplier_id',
+            how='left'
+        )
+    else:
+        ranking = ranking.reset_index()
+        ranking.columns = ['supplier_id', 'score']
+    
+    return ranking
 
 
 def supplier_scores(ratings: pd.DataFrame, respondents: pd.DataFrame,
@@ -338,6 +771,9 @@ def supplier_scores(ratings: pd.DataFrame, respondents: pd.DataFrame,
     """
     Calculate supplier scores based on ratings and DANP weights
     
+    filters maps a ratings column to a filter spec (see filter_mask).
+    For repeated filtering of the same ratings use ratings_cube.RatingsCube.
+    
     Returns:
         Tuple of (ranking DataFrame, aggregated ratings DataFrame)
     """
@@ -355,20 +791,19 @@ def supplier_scores(ratings: pd.DataFrame, respondents: pd.DataFrame,
     
     try:
         # Get respondent weights
-        rw = respondents.set_index('respondent_id')['weight'].astype(float)
-        if not np.isfinite(rw).all() or rw.sum() <= 0:
-            rw = pd.Series(1.0, index=respondents['respondent_id'])   # fallback bobot sama rata
-        rw = rw / rw.sum()
-
+        rw = respondent_weights(respondents)
         
-        # Copy ratings
-        r = ratings.copy()
+        # Filtering and the columns added below build new frames; ratings
+        # itself is never written to
+        r = ratings
         
         # Apply filters
         if filters:
             for k, v in filters.items():
-                if v and v != 'ALL' and k in r.columns:
-                    r = r[r[k] == v]
+                if k in r.columns:
+                    m = filter_mask(r[k], v)
+                    if m is not None:
+                        r = r[m]
         
         # Check if any ratings remain after filtering
         if len(r) == 0:
@@ -376,49 +811,166 @@ def supplier_scores(ratings: pd.DataFrame, respondents: pd.DataFrame,
                 return suppliers.assign(score=0.0)[['supplier_id', 'score']], pd.DataFrame()
             return pd.DataFrame(columns=['supplier_id', 'score']), pd.DataFrame()
         
-        # Clip ratings to valid range
-        r['rating'] = r['rating'].clip(1, 5)
-        
-        # Merge with respondent weights
-        r = r.merge(
-            rw.rename('r_weight'),
-            left_on='respondent_id',
-            right_index=True,
-            how='left'
-        )
-        
-        # Calculate weighted ratings
-        r['weighted'] = r['rating'] * r['r_weight']
-        
-        # Aggregate by supplier and subcriteria
-        agg = r.groupby(['supplier_id', 'sub_id'])['weighted'].sum().unstack(fill_value=0)
+        # Code the remaining rows (sorted, as groupby would order them);
+        # duplicate respondent_ids add up their weights
+        sup, sup_ids = pd.factorize(r['supplier_id'], sort=True)
+        sub, sub_ids = pd.factorize(r['sub_id'], sort=True)
+        share = r['respondent_id'].map(rw.groupby(level=0).sum()).to_numpy(float)
         
-        # Normalize to 0-1 scale (ratings are 1-5)
-        agg = agg / 5.0
-        
-        # Reindex to match global weights
-        agg = agg.reindex(columns=gw.index, fill_value=0)
-        
-        # Calculate scores
-        scores = agg.mul(gw, axis=1).sum(axis=1).sort_values(ascending=False)
-        
-        # Build ranking DataFrame
-        ranking = scores.to_frame('score')
-        
-        if suppliers is not None and not suppliers.empty:
-            ranking = ranking.merge(
-                suppliers,
-                left_index=True,
-                right_on='supplier_id',
-                how='left'
-            )
-        else:
-            ranking = ranking.reset_index()
-            ranking.columns = ['supplier_id', 'score']
-        
-        return ranking, agg
+        return _score_frames(sup, sub, share, r['rating'].to_numpy(float), np.asarray(sup_ids),
+                             len(sub_ids), pd.Index(sub_ids).get_indexer(gw.index), gw, suppliers)
     
     except Exception as e:
         print(f"Error in supplier_scores: {e}")
         empty_ranking = pd.DataFrame(columns=['supplier_id', 'score'])
-        return empty_ranking, pd.DataFrame()
\ No newline at end of file
+        return empty_ranking, pd.DataFrame()
+
+
+def _score_frames(sup: np.ndarray, sub: np.ndarray, share: np.ndarray, rating: np.ndarray,
+                  sup_labels: np.ndarray, n_sub: int, cols: np.ndarray, gw: pd.Series,
+                  suppliers: pd.DataFrame) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Ranking and supplier × sub_id aggregate from integer-coded rating rows
+    
+    sup / sub are codes into sup_labels / n_sub sub_ids (-1 = missing, row
+    skipped), share the normalized weight of each row's respondent (NaN
+    for unknown respondents: adds nothing but the supplier is still
+    present) and cols the sub code of every gw entry (-1 = not rated).
+    Suppliers are ordered by label, then by score.
+    """
+    S = len(sup_labels)
+    ok = (sup >= 0) & (sub >= 0)
+    val = np.nan_to_num(np.clip(rating, 1, 5) * share)[ok]
+    flat = sup[ok].astype(np.int64) * n_sub + sub[ok]
+    A = np.bincount(flat, weights=val, minlength=S * n_sub).reshape(S, n_sub)
+    present = np.flatnonzero(np.bincount(sup[ok], minlength=S) > 0)
+    present = present[np.argsort(sup_labels[present], kind='stable')]
+    
+    # Normalize to 0-1 scale (ratings are 1-5), columns follow gw
+    agg = pd.DataFrame(np.where(cols >= 0, A[present][:, cols], 0.0) / 5.0,
+                       index=pd.Index(sup_labels[present], name='supplier_id'), columns=gw.index)
+    scores = agg.mul(gw, axis=1).sum(axis=1).sort_values(ascending=False)
+    return ranking_frame(scores, suppliers), agg
+
+
+def batch_scores(agg: pd.DataFrame, weights) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Supplier scores for K weight vectors at once
+    
+    agg is the supplier × sub_id matrix returned by supplier_scores (or
+    RatingsCube.aggregate); weights is a gw Series or a DataFrame indexed
+    by sub_id with one column per weight vector. All K scores come from a
+    single matrix product, so a what-if grid costs no more aggregation
+    than one ranking.
+    
+    Returns:
+        Tuple of (scores, ranks), both supplier_id × K DataFrames with the
+        weight columns; rank 1 is the best supplier, ties ranked by
+        supplier_id order
+    """
+    W = weights.to_frame() if isinstance(weights, pd.Series) else weights
+    if agg is None or agg.empty or W is None or W.empty:
+        empty = pd.DataFrame(columns=W.columns if W is not None else None)
+        return empty, empty.copy()
+    
+    W = W.astype(float).fillna(0.0)
+    A = agg.reindex(columns=W.index, fill_value=0).to_numpy(float)
+    S = A @ W.to_numpy()
+    
+    order = np.argsort(-S, axis=0, kind='stable')
+    R = np.empty(S.shape, dtype=np.int64)
+    np.put_along_axis(R, order, np.arange(1, len(S) + 1)[:, None], axis=0)
+    
+    scores = pd.DataFrame(S, index=agg.index, columns=W.columns)
+    ranks = pd.DataFrame(R, index=agg.index, columns=W.columns)
+    return scores, ranks
+
+
+def dataset_hor(ds) -> Tuple[pd.DataFrame, pd.Series, pd.DataFrame]:
+    """
+    hor_stage1 + hor_stage2 on a dataset.Dataset
+    
+    R and E are already placed on the interned event/agent/action codes,
+    so no label alignment is needed; the weighted/ARP and detail steps are
+    the ones hor_stage1 / hor_stage2 use.
+    
+    Returns:
+        Tuple of (weighted matrix, ARP series, detail) as the two stages
+        return them
+    """
+    empty_detail = pd.DataFrame(columns=['TE', 'Difficulty', 'Cost', 'manhours', 'ETD'])
+    ev, ag, act = ds.ids['event'], ds.ids['agent'], ds.ids['action']
+    if (ds.R is None or not ev.n_master or not ag.n_master
+            or 'severity' not in ds.events.columns or 'occurrence' not in ds.agents.columns):
+        return pd.DataFrame(), pd.Series(dtype=float), empty_detail
+    
+    try:
+        event_ids = pd.Index(ev.labels[:ev.n_master], name='event_id')
+        agent_ids = pd.Index(ag.labels[:ag.n_master], name='agent_id')
+        weighted, ARP = _hor_weighted(pd.DataFrame(ds.R, index=event_ids, columns=agent_ids),
+                                      pd.Series(ds.severity, index=event_ids),
+                                      pd.Series(ds.occurrence, index=agent_ids))
+    except Exception as e:
+        print(f"Error in dataset_hor: {e}")
+        return pd.DataFrame(), pd.Series(dtype=float), empty_detail
+    if ds.E is None or not act.n_master:
+        return weighted, ARP, empty_detail
+    
+    try:
+        detail = _hor_detail(ds.E @ np.nan_to_num(ARP.to_numpy()), ds.difficulty, ds.cost, ds.manhours,
+                             pd.Index(act.labels[:act.n_master], name=ds.actions.index.name))
+    except Exception as e:
+        print(f"Error in dataset_hor: {e}")
+        return weighted, ARP, empty_detail
+    return weighted, ARP, detail
+
+
+def dataset_dematel(ds, solver: str = 'solve', tol: float = 1e-12, max_iter: int = 32) -> Dict:
+    """
+    build_dematel on a dataset.Dataset
+    
+    Edges are already integer-coded against the sub_id domain, so they go
+    straight to the cell sums aggregate_edges builds, with no string
+    lookups.
+    """
+    if (ds.subcriteria is None or ds.subcriteria.empty or ds.respondents is None
+            or ds.respondents.empty or ds.n_edges == 0):
+        return _empty_dematel()
+    
+    subs = ds.ids['sub']
+    n = subs.n_master
+    rid = ds.edge_resp
+    w = np.where(rid >= 0, ds.resp_weight[rid], 1.0)
+    A_sum, CNT = _edge_sums(*_edge_cells(ds.edge_from, ds.edge_to, ds.edge_score, w, n), n)
+    return dematel_from_sums(A_sum, CNT, list(subs.labels[:n]), solver=solver, tol=tol, max_iter=max_iter)
+
+
+def dataset_scores(ds, gw: pd.Series, filters: Optional[Dict] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    supplier_scores on a dataset.Dataset
+    
+    Ratings are held as int32 supplier/sub/respondent codes, so the
+    respondent weights are an array lookup and the rows go straight to
+    the aggregation supplier_scores uses.
+    
+    Returns:
+        Tuple of (ranking DataFrame, aggregated ratings DataFrame)
+    """
+    empty_ranking = pd.DataFrame(columns=['supplier_id', 'score'])
+    if (ds.n_ratings == 0 or ds.respondents is None or ds.respondents.empty
+            or not ds.has_weights or gw is None or gw.empty):
+        return empty_ranking, pd.DataFrame()
+    
+    sup, sub, rid, rating = ds.rating_supplier, ds.rating_sub, ds.rating_resp, ds.rating
+    mask = ds.rating_mask(filters)
+    if mask is not None:
+        sup, sub, rid, rating = sup[mask], sub[mask], rid[mask], rating[mask]
+    if len(sup) == 0:
+        if ds.suppliers is not None and not ds.suppliers.empty:
+            return ds.suppliers.assign(score=0.0)[['supplier_id', 'score']], pd.DataFrame()
+        return empty_ranking, pd.DataFrame()
+    
+    sup_ids, sub_ids = ds.ids['supplier'], ds.ids['sub']
+    share = np.where(rid >= 0, ds.resp_share[rid], np.nan)
+    return _score_frames(sup, sub, share, rating, sup_ids.labels, len(sub_ids),
+                         sub_ids.codes(gw.index), gw, ds.suppliers)
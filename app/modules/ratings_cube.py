@@ -0,0 +1,170 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .processing import batch_scores, filter_mask, ranking_frame, respondent_weights
+
+CUBE_DIMS = ('cheese_type', 'plant_id', 'time_period')
+
+
+class RatingsCube:
+    """
+    Weighted rating sums per (supplier, sub_id, cheese_type, plant_id,
+    time_period), built once per ratings/respondents pair
+
+    Every rating row is reduced at build time to
+    clip(rating, 1, 5) * normalized respondent weight, exactly as in
+    supplier_scores, and summed per cell. Cells are stored sorted by their
+    filter combination (CSR-style segments), so a query touches only the
+    segments of the selected combinations; when most of the cube is
+    selected the unselected part is subtracted from the precomputed
+    totals instead.
+
+    scores() returns the same (ranking, agg) pair as supplier_scores for
+    any filter spec accepted by processing.filter_mask (single values,
+    multi-value lists, {'from', 'to'} ranges).
+    """
+
+    def __init__(self, ratings: pd.DataFrame, respondents: pd.DataFrame, dims=CUBE_DIMS):
+        self.valid = not (ratings is None or ratings.empty or respondents is None or respondents.empty)
+        self.dims = [d for d in dims if self.valid and d in ratings.columns]
+        self.n_rows = 0 if ratings is None else len(ratings)
+        self.categories: Dict[str, pd.Index] = {}
+        if self.valid:
+            self._build(self.cells(ratings, respondents, self.dims))
+
+    @classmethod
+    def from_cells(cls, cells: pd.DataFrame, dims, n_rows: int) -> 'RatingsCube':
+        """Cube from a cell table (see cells), e.g. folded chunk by chunk by streaming.stream_ratings"""
+        cube = cls.__new__(cls)
+        cube.valid = cells is not None and not cells.empty
+        cube.dims = list(dims) if cube.valid else []
+        cube.n_rows = int(n_rows)
+        cube.categories = {}
+        if cube.valid:
+            cube._build(cells)
+        return cube
+
+    @staticmethod
+    def cells(ratings: pd.DataFrame, respondents: pd.DataFrame, dims) -> pd.DataFrame:
+        """
+        Weighted rating sum ('val') and row count ('n') per (supplier_id,
+        sub_id, *dims) of a ratings frame or chunk; cell tables of several
+        chunks can be concatenated and re-summed per key
+        """
+        rw = respondent_weights(respondents)
+        # Duplicate respondent_ids match every weight row in supplier_scores' merge
+        rw = rw.groupby(level=0).sum()
+        keys = ['supplier_id', 'sub_id'] + list(dims)
+        w = ratings['respondent_id'].map(rw).to_numpy(float)
+        val = pd.to_numeric(ratings['rating'], errors='coerce').clip(1, 5).to_numpy(float) * w
+        # groupby drops rows with a missing supplier or sub_id; unknown respondents
+        # add nothing to the sum but still make the supplier present
+        frame = ratings[keys].assign(val=val, n=1)
+        frame = frame[frame['supplier_id'].notna() & frame['sub_id'].notna()]
+        return (frame.groupby(keys, sort=False, dropna=False, observed=True)[['val', 'n']]
+                     .sum().reset_index())
+
+    def _build(self, cells: pd.DataFrame):
+        sup, self.supplier_ids = pd.factorize(cells['supplier_id'], sort=True)
+        sub, self.sub_ids = pd.factorize(cells['sub_id'], sort=True)
+        S, U = len(self.supplier_ids), len(self.sub_ids)
+
+        self.categories, codes, shape = {}, [], []
+        for d in self.dims:
+            c, cats = pd.factorize(cells[d], sort=True, use_na_sentinel=False)
+            self.categories[d] = pd.Index(cats)
+            codes.append(c)
+            shape.append(max(len(cats), 1))
+        self.shape = tuple(shape)
+        K = int(np.prod(shape)) if shape else 1
+        combo = np.ravel_multi_index(codes, shape) if codes else np.zeros(len(cells), dtype=np.int64)
+
+        key = (combo.astype(np.int64) * S + sup) * U + sub
+        order = np.argsort(key, kind='stable')
+        key = key[order]
+        self.cell_val = cells['val'].to_numpy(float)[order]
+        self.cell_n = cells['n'].to_numpy(float)[order]
+        self.cell_su = key % (S * U)
+        self.ptr = np.searchsorted(key // (S * U), np.arange(K + 1))
+        self.combo_codes = np.unravel_index(np.arange(K), shape) if codes else ()
+
+        self.total_val = np.bincount(self.cell_su, weights=self.cell_val, minlength=S * U)
+        self.total_n = np.bincount(self.cell_su // U, weights=self.cell_n, minlength=S)
+
+    # ------------------------------------------------------------------
+    def query(self, filters: Optional[Dict] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Weighted rating sums (suppliers × subs) and row counts per supplier
+        for a filter combination
+        """
+        S, U = len(self.supplier_ids), len(self.sub_ids)
+        combo_mask = None
+        for d, spec in (filters or {}).items():
+            if d not in self.categories:
+                continue
+            sel = filter_mask(self.categories[d], spec)
+            if sel is None:
+                continue
+            m = sel[self.combo_codes[self.dims.index(d)]]
+            combo_mask = m if combo_mask is None else combo_mask & m
+        if combo_mask is None or combo_mask.all():
+            return self.total_val.reshape(S, U), self.total_n
+
+        sizes = np.diff(self.ptr)
+        picked = int(sizes[combo_mask].sum())
+        if picked * 2 <= len(self.cell_val):
+            idx = self._segments(np.flatnonzero(combo_mask))
+            val = np.bincount(self.cell_su[idx], weights=self.cell_val[idx], minlength=S * U)
+            n = np.bincount(self.cell_su[idx] // U, weights=self.cell_n[idx], minlength=S)
+        else:
+            idx = self._segments(np.flatnonzero(~combo_mask))
+            val = self.total_val - np.bincount(self.cell_su[idx], weights=self.cell_val[idx], minlength=S * U)
+            n = self.total_n - np.bincount(self.cell_su[idx] // U, weights=self.cell_n[idx], minlength=S)
+        return val.reshape(S, U), n
+
+    def _segments(self, combos: np.ndarray) -> np.ndarray:
+        """Cell positions of the given combinations' segments, concatenated"""
+        start, stop = self.ptr[combos], self.ptr[combos + 1]
+        lengths = stop - start
+        total = int(lengths.sum())
+        if total == 0:
+            return np.zeros(0, dtype=np.int64)
+        offsets = np.repeat(start - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return offsets + np.arange(total)
+
+    def aggregate(self, filters: Optional[Dict] = None) -> pd.DataFrame:
+        """
+        Supplier × sub_id matrix of weighted ratings / 5 for a filter
+        combination (suppliers without matching rows are left out), i.e.
+        supplier_scores' agg before reindexing to gw
+        """
+        if not self.valid:
+            return pd.DataFrame()
+        val, n = self.query(filters)
+        present = n > 0
+        return pd.DataFrame(val[present] / 5.0,
+                            index=pd.Index(self.supplier_ids[present], name='supplier_id'),
+                            columns=pd.Index(self.sub_ids, name='sub_id'))
+
+    def scores(self, gw: pd.Series, suppliers: pd.DataFrame,
+               filters: Optional[Dict] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Same (ranking, aggregated ratings) as supplier_scores for these filters"""
+        empty_ranking = pd.DataFrame(columns=['supplier_id', 'score'])
+        if not self.valid or gw is None or gw.empty:
+            return empty_ranking, pd.DataFrame()
+
+        agg = self.aggregate(filters)
+        if agg.empty:
+            if suppliers is not None and not suppliers.empty:
+                return suppliers.assign(score=0.0)[['supplier_id', 'score']], pd.DataFrame()
+            return empty_ranking, pd.DataFrame()
+
+        agg = agg.reindex(columns=gw.index, fill_value=0)
+        scores = agg.mul(gw, axis=1).sum(axis=1).sort_values(ascending=False)
+        return ranking_frame(scores, suppliers), agg
+
+    def batch_scores(self, weights, filters: Optional[Dict] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """processing.batch_scores on this cube's aggregate: (scores, ranks), supplier_id × K"""
+        return batch_scores(self.aggregate(filters), weights)
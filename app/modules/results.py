@@ -0,0 +1,241 @@
+from collections.abc import Mapping
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+
+class _LazyResult(Mapping):
+    """
+    Read-only mapping over a few stored arrays
+
+    Subclasses list their essential fields in ``__slots__`` and the keys
+    they expose in KEYS; keys without a field of their own are built by
+    ``_make_<key>`` on first access and kept in ``_cache``, so
+    result['T'] is the same object on every read. Works wherever the old
+    result dicts did ([], get, in, keys/items, dict(result)). Pickling
+    keeps only the essential fields, not the materialized frames.
+    """
+
+    __slots__ = ('_cache',)
+    KEYS = ()
+
+    def __getitem__(self, key):
+        if key not in self.KEYS:
+            raise KeyError(key)
+        try:
+            return self._cache[key]
+        except KeyError:
+            make = getattr(self, f'_make_{key}', None)
+            if make is None:
+                return getattr(self, key)              # stored scalar / Series field
+            value = self._cache[key] = make()
+            return value
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __contains__(self, key):
+        return key in self.KEYS
+
+    def as_dict(self) -> Dict:
+        """Plain dict with every key materialized"""
+        return {k: self[k] for k in self.KEYS}
+
+    def materialized(self):
+        """Keys built so far"""
+        return tuple(self._cache)
+
+    def __getstate__(self):
+        return {s: getattr(self, s) for s in self._fields()}
+
+    def __setstate__(self, state):
+        for s, v in state.items():
+            object.__setattr__(self, s, v)
+        self._cache = {}
+
+    @classmethod
+    def _fields(cls):
+        return [s for c in cls.__mro__ for s in getattr(c, '__slots__', ()) if s != '_cache']
+
+    def __repr__(self):
+        return f"{type(self).__name__}({', '.join(self.KEYS)}; materialized: {', '.join(self._cache) or '-'})"
+
+
+class DematelResult(_LazyResult):
+    """
+    build_dematel result: the averaged matrix A, alpha and T, plus (I-X)^-1
+    only when it did not come out as I + T (explicit or pseudo-inverse)
+
+    X, I, I-X, r and c, and every DataFrame, are derived on access.
+    subs=None is the empty result.
+    """
+
+    __slots__ = ('subs', 'A_vals', 'alpha', 'T_vals', 'inv_vals', 'solver', 'cond', 'iterations')
+    KEYS = ('A', 'X', 'I', 'ImX', 'ImX_inv', 'T', 'r', 'c', 'alpha', 'solver', 'cond', 'iterations')
+
+    def __init__(self, subs=None, A: Optional[np.ndarray] = None, alpha: float = 1.0,
+                 T: Optional[np.ndarray] = None, inv: Optional[np.ndarray] = None,
+                 solver: Optional[str] = None, cond: float = np.nan, iterations: int = 0):
+        self._cache = {}
+        self.subs = None if subs is None else pd.Index(subs)
+        self.A_vals, self.alpha, self.T_vals, self.inv_vals = A, alpha, T, inv
+        self.solver, self.cond, self.iterations = solver, cond, iterations
+
+    @classmethod
+    def empty(cls) -> 'DematelResult':
+        return cls()
+
+    def _frame(self, values) -> pd.DataFrame:
+        return pd.DataFrame() if self.subs is None else pd.DataFrame(values, index=self.subs, columns=self.subs)
+
+    def _eye(self):
+        return np.eye(len(self.subs)) if self.subs is not None else None
+
+    def _make_A(self):
+        return self._frame(self.A_vals)
+
+    def _make_X(self):
+        return self._frame(None if self.subs is None else self.A_vals * self.alpha)
+
+    def _make_I(self):
+        return self._frame(self._eye())
+
+    def _make_ImX(self):
+        return self._frame(None if self.subs is None else self._eye() - self.A_vals * self.alpha)
+
+    def _make_ImX_inv(self):
+        if self.subs is None:
+            return pd.DataFrame()
+        if self.inv_vals is not None:
+            return self._frame(self.inv_vals)
+        return self._frame(self._eye() + self.T_vals)
+
+    def _make_T(self):
+        if self.subs is not None and self.T_vals is None:
+            return self._frame(self.inv_vals - self._eye())
+        return self._frame(self.T_vals)
+
+    def _make_r(self):
+        return pd.Series(dtype=float) if self.subs is None else self['T'].sum(axis=1)
+
+    def _make_c(self):
+        return pd.Series(dtype=float) if self.subs is None else self['T'].sum(axis=0)
+
+
+class DanpResult(_LazyResult):
+    """
+    danp_from_T result: gw, the limit-supermatrix diagnostics and what is
+    needed to rebuild the intermediate matrices (T itself - shared, not
+    copied - its criterion codes, the C×C block means Td and the
+    stationary vector, or the full limit when it came from Cesàro
+    averaging). T_alpha_c, W_un, Td, T_alpha_d, W_alpha and W_limit are
+    derived on access. index=None is the empty result.
+    """
+
+    __slots__ = ('index', 'columns', 'crits', 'T_vals', 'g_row', 'g_col', 'Td_vals', 'pi', 'L_vals',
+                 'gw', 'limit_method', 'limit_iterations', 'limit_residual', 'limit_converged')
+    KEYS = ('T_alpha_c', 'W_un', 'Td', 'T_alpha_d', 'W_alpha', 'W_limit', 'gw',
+            'limit_method', 'limit_iterations', 'limit_residual', 'limit_converged')
+
+    def __init__(self, index=None, columns=None, crits=None, T: Optional[np.ndarray] = None,
+                 g_row=None, g_col=None, Td: Optional[np.ndarray] = None, limit: Optional[np.ndarray] = None,
+                 gw: Optional[pd.Series] = None, limit_info: Optional[Dict] = None):
+        self._cache = {}
+        self.index, self.columns, self.crits = index, columns, crits
+        self.T_vals, self.g_row, self.g_col, self.Td_vals = T, g_row, g_col, Td
+        self.pi = self.L_vals = None
+        if limit is not None:
+            # The linear method returns π·1ᵀ: keep π only
+            if (limit_info or {}).get('method') == 'linear':
+                self.pi = limit[:, 0].copy()
+            else:
+                self.L_vals = limit
+        self.gw = pd.Series(dtype=float) if gw is None else gw
+        info = limit_info or {}
+        self.limit_method = info.get('method')
+        self.limit_iterations = info.get('iterations', 0)
+        self.limit_residual = info.get('residual', np.nan)
+        self.limit_converged = info.get('converged', False)
+
+    @classmethod
+    def empty(cls) -> 'DanpResult':
+        return cls()
+
+    # Matrix values shared by danp_from_T and the lazy frames
+    @staticmethod
+    def T_alpha_c_values(Tv: np.ndarray, g_row: np.ndarray) -> np.ndarray:
+        """T normalized by row sums on rows that belong to a criterion"""
+        row_sum = Tv.sum(axis=1)
+        row_sum[row_sum == 0] = 1.0
+        in_row = g_row >= 0
+        Tac = Tv.copy()
+        Tac[in_row] = Tv[in_row] / row_sum[in_row, None]
+        return Tac
+
+    @staticmethod
+    def T_alpha_d_values(Td: np.ndarray) -> np.ndarray:
+        row_sum = np.nansum(Td, axis=1)
+        row_sum[row_sum == 0] = 1.0
+        return Td / row_sum[:, None]
+
+    @staticmethod
+    def W_alpha_values(Tac: np.ndarray, Tad: np.ndarray, g_row: np.ndarray, g_col: np.ndarray) -> np.ndarray:
+        """
+        Each (criterion_i, criterion_j) block of W_un = T_alpha_cᵀ scaled
+        by T_alpha_d[ci, cj], then normalized by columns (zero columns
+        stay 0); W_un rows follow T columns and vice versa
+        """
+        # Built transposed (rows of Wt = columns of W) so the column sums
+        # run over contiguous memory, as pandas sums them
+        factor = np.ones(Tac.shape)
+        ok_i, ok_j = g_row >= 0, g_col >= 0
+        factor[np.ix_(ok_i, ok_j)] = Tad[np.ix_(g_col[ok_j], g_row[ok_i])].T
+        Wt = Tac * factor
+        col_sum = np.nansum(Wt, axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            Wt = Wt / np.where(col_sum == 0, np.nan, col_sum)[:, None]
+        Wt[np.isnan(Wt)] = 0.0
+        return Wt.T
+
+    def _values(self, key):
+        """Arrays behind the frames, cached under a leading underscore"""
+        k = f'_{key}'
+        if k not in self._cache:
+            if key == 'Tac':
+                v = self.T_alpha_c_values(self.T_vals, self.g_row)
+            elif key == 'Tad':
+                v = self.T_alpha_d_values(self.Td_vals)
+            else:
+                v = self.W_alpha_values(self._values('Tac'), self._values('Tad'), self.g_row, self.g_col)
+            self._cache[k] = v
+        return self._cache[k]
+
+    def materialized(self):
+        return tuple(k for k in self._cache if not k.startswith('_'))
+
+    def _frame(self, values, index, columns) -> pd.DataFrame:
+        return pd.DataFrame() if self.index is None else pd.DataFrame(values(), index=index, columns=columns)
+
+    def _make_T_alpha_c(self):
+        return self._frame(lambda: self._values('Tac'), self.index, self.columns)
+
+    def _make_W_un(self):
+        return self._frame(lambda: self._values('Tac').T.copy(), self.columns, self.index)
+
+    def _make_Td(self):
+        return self._frame(lambda: self.Td_vals, self.crits, self.crits)
+
+    def _make_T_alpha_d(self):
+        return self._frame(lambda: self._values('Tad'), self.crits, self.crits)
+
+    def _make_W_alpha(self):
+        return self._frame(lambda: self._values('W'), self.columns, self.index)
+
+    def _make_W_limit(self):
+        if self.pi is not None:
+            return self._frame(lambda: np.outer(self.pi, np.ones(len(self.pi))), self.columns, self.index)
+        return self._frame(lambda: self.L_vals, self.columns, self.index)
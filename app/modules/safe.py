@@ -9,13 +9,8 @@ def safe_reindex(df: pd.DataFrame, index=None, columns=None, fill=0):
     # If df is empty, build from scratch
     if df is None or df.empty:
         return pd.DataFrame(fill, index=index if index is not None else [], columns=columns if columns is not None else [])
-    # Reindex with fill
-    out = df.copy()
-    if index is not None:
-        out = out.reindex(index=index, fill_value=fill)
-    if columns is not None:
-        out = out.reindex(columns=columns, fill_value=fill)
-    return out
+    # Reindex with fill (always a new frame, lazily copied under copy-on-write)
+    return df.reindex(index=index, columns=columns, fill_value=fill)
 
 def is_empty_df(df):
     return (df is None) or (isinstance(df, pd.DataFrame) and (df.shape[0]==0 or df.shape[1]==0))
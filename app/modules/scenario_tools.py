@@ -2,9 +2,10 @@
 import json
 from pathlib import Path
 import pandas as pd
-from .what_if import tweak_weights
+from .what_if import tweak_weights, tweak_weights_batch
 from .allocation_enhanced import optimize_allocation_enhanced
 from .processing import supplier_scores
+from .ratings_cube import RatingsCube
 
 def capture_state(danp_gw, filters, optimizer_args, alloc_args):
     return {
@@ -32,12 +33,16 @@ def _compute_kpis(alloc_df: pd.DataFrame, suppliers_df: pd.DataFrame, ranking_df
         avg_quality = float((a['Qn'] * a['quantity']).sum() / denom)
     return {"total_cost": total_cost, "avg_quality": avg_quality, "total_emission": total_emission}
 
-def simulate_ranking_alloc(state, ratings, respondents, suppliers, plants_df, suppliers_df):
+def simulate_ranking_alloc(state, ratings, respondents, suppliers, plants_df, suppliers_df, cube=None):
+    """cube: optional RatingsCube of (ratings, respondents) so the ratings aggregation is not redone per scenario"""
     gw_base = pd.Series(state.get("gw_base", {}), dtype=float)
     subs = state.get("what_if", {}).get("subs", [])
     factor = float(state.get("what_if", {}).get("factor", 1.0))
     gw_new = tweak_weights(gw_base, subs, factor) if gw_base.size>0 else gw_base
-    ranking, _ = supplier_scores(ratings, respondents, gw_new, suppliers, filters=state.get("filters", {}))
+    if cube is not None:
+        ranking, _ = cube.scores(gw_new, suppliers, filters=state.get("filters", {}))
+    else:
+        ranking, _ = supplier_scores(ratings, respondents, gw_new, suppliers, filters=state.get("filters", {}))
     a = state.get("allocation", {})
     defaults = dict(qwt=1.0, cwt=0.2, rwt=0.5, preferred_regions=[], max_share_supplier=1.0, max_share_per_plant_supplier=1.0,
                     min_total_supplier=0.0, excluded_suppliers=[], min_quality_norm=0.0, region_min_shares={}, region_max_shares={},
@@ -47,6 +52,32 @@ def simulate_ranking_alloc(state, ratings, respondents, suppliers, plants_df, su
     kpis = _compute_kpis(alloc, suppliers_df, ranking)
     return gw_new, ranking, alloc, kpis
 
+def simulate_rankings(states, ratings, respondents, cube=None):
+    """
+    Scores and ranks for many scenario states at once (dict name -> state, or a list).
+    States sharing filters share one cube slice and one matrix product over their weight vectors.
+    Returns (weights sub_id × K, scores supplier_id × K, ranks supplier_id × K); suppliers without
+    ratings under a scenario's filters get NaN there.
+    """
+    items = list(states.items()) if isinstance(states, dict) else list(enumerate(states))
+    if cube is None: cube = RatingsCube(ratings, respondents)
+    groups, cols = {}, []
+    for name, state in items:
+        gw_base = pd.Series(state.get("gw_base", {}), dtype=float)
+        wi = state.get("what_if", {})
+        w = tweak_weights_batch(gw_base, {name: (wi.get("subs", []), float(wi.get("factor", 1.0)))})
+        key = json.dumps(state.get("filters", {}) or {}, sort_keys=True, default=str)
+        groups.setdefault(key, []).append(w)
+        cols.append(name)
+    if not cols: return pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
+    W_all, S_all, R_all = [], [], []
+    for key, ws in groups.items():
+        W = pd.concat(ws, axis=1).fillna(0.0)
+        S, R = cube.batch_scores(W, filters=json.loads(key))
+        W_all.append(W); S_all.append(S); R_all.append(R)
+    W = pd.concat(W_all, axis=1).fillna(0.0)[cols]
+    return W, pd.concat(S_all, axis=1).reindex(columns=cols), pd.concat(R_all, axis=1).reindex(columns=cols)
+
 def save_json(path: Path, payload: dict):
     path.parent.mkdir(parents=True, exist_ok=True)
     with open(path, "w") as f: json.dump(payload, f, indent=2)
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import os
+import shutil
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+
+
+def snapshot_key(fingerprint) -> str:
+    """Directory name of the snapshot for a template fingerprint"""
+    blob = json.dumps([FORMAT_VERSION, fingerprint], default=str).encode()
+    return hashlib.blake2b(blob, digest_size=12).hexdigest()
+
+
+def save_snapshot(root: Path, key: str, frames: Dict[str, pd.DataFrame],
+                  messages: Optional[List] = None) -> Path:
+    """
+    Write frames as a binary columnar snapshot under root/key
+
+    Every column (and any non-default index) is one .npy file; object
+    columns are stored as int32 codes into label lists kept in ids.json
+    (-1 = missing). meta.json holds the layout and the loader messages to
+    replay. The directory is written under a temporary name and renamed,
+    and older snapshots in root are removed afterwards.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    final = root / key
+    if final.exists():
+        return final
+    tmp = root / f".{key}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    try:
+        meta, ids = {'version': FORMAT_VERSION, 'frames': {}, 'messages': list(messages or [])}, {}
+        for name, df in frames.items():
+            layout = {
+                'columns': [_label(c) for c in df.columns],
+                'columns_name': _label(df.columns.name),
+                'index': None,
+                'coded': [],
+            }
+            arrays = [df.iloc[:, i] for i in range(df.shape[1])]
+            if not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1):
+                layout['index'] = {'name': _label(df.index.name)}
+                arrays.append(df.index.to_series())
+            for i, col in enumerate(arrays):
+                fname = f"{name}.{i}.npy"
+                values = col.to_numpy()
+                if values.dtype == object:
+                    codes, labels = pd.factorize(col)
+                    ids[fname] = [_label(v) for v in labels]
+                    values = codes.astype(np.int32)
+                    layout['coded'].append(i)
+                np.save(tmp / fname, np.ascontiguousarray(values), allow_pickle=False)
+            meta['frames'][name] = layout
+        with open(tmp / 'ids.json', 'w') as f:
+            json.dump(ids, f)
+        with open(tmp / 'meta.json', 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp, final)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    for old in root.iterdir():
+        if old.is_dir() and old.name != key and not old.name.startswith('.'):
+            shutil.rmtree(old, ignore_errors=True)
+    return final
+
+
+def load_snapshot(root: Path, key: str) -> Optional[Tuple[Dict[str, pd.DataFrame], List]]:
+    """
+    Frames and loader messages of the snapshot root/key, or None if absent
+
+    Numeric columns are memory-mapped copy-on-write (mmap_mode='c'): pages
+    are read on first touch, and in-place edits stay private to the
+    process. Object columns are rebuilt from their codes and labels.
+    """
+    path = Path(root) / key
+    meta_p = path / 'meta.json'
+    if not meta_p.exists():
+        return None
+    with open(meta_p) as f:
+        meta = json.load(f)
+    if meta.get('version') != FORMAT_VERSION:
+        return None
+    with open(path / 'ids.json') as f:
+        ids = json.load(f)
+
+    frames = {}
+    for name, layout in meta['frames'].items():
+        n_cols = len(layout['columns'])
+        coded = set(layout['coded'])
+        arrays = []
+        for i in range(n_cols + (layout['index'] is not None)):
+            fname = f"{name}.{i}.npy"
+            values = np.load(path / fname, mmap_mode='c', allow_pickle=False)
+            if i in coded:
+                labels = np.array(ids[fname] + [np.nan], dtype=object)
+                values = labels[values]            # code -1 picks the trailing NaN
+            arrays.append(values)
+        index = None
+        if layout['index'] is not None:
+            index = pd.Index(arrays.pop(), name=layout['index']['name'])
+        df = pd.DataFrame(dict(enumerate(arrays)), index=index, copy=False)
+        df.columns = pd.Index(layout['columns'], name=layout['columns_name'])
+        frames[name] = df
+    return frames, meta.get('messages', [])
+
+
+def _label(v):
+    """Plain Python value for JSON (NumPy scalars unwrapped)"""
+    return v.item() if isinstance(v, np.generic) else v
@@ -0,0 +1,112 @@
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def rank_stability(agg: pd.DataFrame, gw: pd.Series, top_k: int = 5,
+                   factor_range: Tuple[float, float] = (0.5, 2.0)) -> Dict:
+    """
+    Factor range per subcriterion that keeps the top-k supplier order of
+    supplier_scores unchanged under what_if.tweak_weights
+
+    Scaling sub_id j by f and renormalizing gives
+        score_s(f) = (b_s + (f-1)·g_j·a_sj) / Z(f),   Z(f) > 0 for f > 0
+    with b the base scores and a = agg, so the order only depends on the
+    numerator, which is linear in f. Suppliers s above t swap at
+        f* = 1 - (b_s - b_t) / (g_j·(a_sj - a_tj))
+    Moving f away from 1, the first swap inside the top k is between
+    neighbours in the base order, and the set changes when anyone below
+    overtakes rank k. The stable interval therefore comes from the k-1
+    adjacent top-k pairs plus (rank k, every lower supplier).
+
+    Returns:
+        Dict with
+            'intervals' - DataFrame indexed by sub_id: weight, f_low,
+                          f_high (0 / inf when no reversal exists), the
+                          renormalized weight at both ends and the pair
+                          that swaps there ('A↔B')
+            'flips'     - every pairwise reversal with a top-k supplier
+                          inside factor_range: sub_id, factor, supplier_id,
+                          rank, overtaken_by, overtaker_rank (base ranks)
+            'top'       - base top-k supplier_ids in order
+    """
+    empty = {
+        'intervals': pd.DataFrame(columns=['weight', 'f_low', 'f_high', 'weight_low', 'weight_high',
+                                           'pair_low', 'pair_high']),
+        'flips': pd.DataFrame(columns=['sub_id', 'factor', 'supplier_id', 'rank', 'overtaken_by', 'overtaker_rank']),
+        'top': [],
+    }
+    if agg is None or agg.empty or gw is None or gw.empty:
+        return empty
+
+    subs = gw.index
+    g = gw.to_numpy(float)
+    A = agg.reindex(columns=subs, fill_value=0).to_numpy(float)
+    ids = agg.index.to_numpy()
+    N = len(A)
+    b = A @ g
+    order = np.argsort(-b, kind='stable')
+    rank = np.empty(N, dtype=np.int64)
+    rank[order] = np.arange(1, N + 1)
+    k = max(1, min(int(top_k), N))
+    f_min, f_max = factor_range
+
+    # Adjacent top-k pairs, then rank k against everyone below it
+    hi = np.concatenate([order[:k - 1], np.full(N - k, order[k - 1])])
+    lo = np.concatenate([order[1:k], order[k:]])
+    m = len(hi)
+    f_star, slope = _crossings(b[hi] - b[lo], A[hi] - A[lo], g)
+
+    up = np.where(slope < 0, f_star, np.inf)             # swaps when f grows
+    down = np.where(slope > 0, f_star, -np.inf)          # swaps when f shrinks
+    r_hi = up.argmin(axis=0) if m else np.zeros(len(g), dtype=np.int64)
+    r_lo = down.argmax(axis=0) if m else np.zeros(len(g), dtype=np.int64)
+    cols = np.arange(len(g))
+    f_high = up[r_hi, cols] if m else np.full(len(g), np.inf)
+    f_low = np.maximum(down[r_lo, cols], 0.0) if m else np.zeros(len(g))
+
+    def pair(r, ok):
+        return np.where(ok, np.char.add(np.char.add(ids[hi[r]].astype(str), '↔'), ids[lo[r]].astype(str)), '') if m else ''
+
+    total = g.sum()
+
+    def share(f):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            Z = total + (f - 1) * g
+            w = np.where(np.isfinite(f), f * g / np.where(Z != 0, Z, 1.0), 1.0)
+        return np.where(g > 0, w, 0.0)
+
+    intervals = pd.DataFrame({
+        'weight': g,
+        'f_low': f_low,
+        'f_high': f_high,
+        'weight_low': share(f_low),
+        'weight_high': share(f_high),
+        'pair_low': pair(r_lo, f_low > 0),
+        'pair_high': pair(r_hi, np.isfinite(f_high)),
+    }, index=pd.Index(subs, name='sub_id'))
+
+    # All pairs (top-k supplier, anyone ranked below it)
+    p_hi = np.concatenate([np.full(N - 1 - p, order[p]) for p in range(k)]) if N > 1 else np.zeros(0, dtype=np.int64)
+    p_lo = np.concatenate([order[p + 1:] for p in range(k)]) if N > 1 else np.zeros(0, dtype=np.int64)
+    f_all, _ = _crossings(b[p_hi] - b[p_lo], A[p_hi] - A[p_lo], g)
+    pi, sj = np.nonzero((f_all >= f_min) & (f_all <= f_max))
+    flips = pd.DataFrame({
+        'sub_id': subs.to_numpy()[sj],
+        'factor': f_all[pi, sj],
+        'supplier_id': ids[p_hi[pi]],
+        'rank': rank[p_hi[pi]],
+        'overtaken_by': ids[p_lo[pi]],
+        'overtaker_rank': rank[p_lo[pi]],
+    }).sort_values(['sub_id', 'factor', 'rank'], kind='stable').reset_index(drop=True)
+
+    return {'intervals': intervals, 'flips': flips, 'top': ids[order[:k]].tolist()}
+
+
+def _crossings(db: np.ndarray, da: np.ndarray, g: np.ndarray):
+    """Factor f* where each pair's score difference db + (f-1)·g·da hits zero (NaN if parallel)"""
+    slope = da * g[None, :]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f_star = np.where(slope != 0, 1.0 - db[:, None] / slope, np.nan)
+    return f_star, slope
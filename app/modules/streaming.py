@@ -0,0 +1,155 @@
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from .loader import EDGES_COLUMNS, RATINGS_COLUMNS
+from .processing import _empty_dematel, aggregate_edges, dematel_from_sums
+from .ratings_cube import CUBE_DIMS, RatingsCube
+
+# Explicit dtypes (English names) for the row-level files; IDs are read as
+# categories, so a chunk holds each distinct ID string once
+RATINGS_DTYPES = {
+    'supplier_id': 'category',
+    'sub_id': 'category',
+    'respondent_id': 'category',
+    'rating': 'float32',
+    'cheese_type': 'category',
+    'plant_id': 'category',
+    'time_period': 'category',
+}
+
+EDGES_DTYPES = {
+    'respondent_id': 'category',
+    'from_sub': 'category',
+    'to_sub': 'category',
+    'score': 'float32',
+    'influence': 'category',
+}
+
+CHUNK_ROWS = 500_000
+
+
+def iter_csv(path: Path, dtypes: Dict[str, str], rename: Optional[Dict[str, str]] = None,
+             chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV in chunks of ``chunksize`` rows with explicit dtypes
+
+    Only the columns named in ``dtypes`` are parsed. Headers are mapped
+    through ``rename`` (e.g. loader.RATINGS_COLUMNS) first, so Indonesian
+    and English templates give the same chunk columns.
+    """
+    rename = rename or {}
+    header = pd.read_csv(path, nrows=0).columns
+    raw = {c: rename.get(c, c) for c in header if rename.get(c, c) in dtypes}
+    reader = pd.read_csv(path, usecols=list(raw), dtype={c: dtypes[e] for c, e in raw.items()},
+                         chunksize=int(chunksize))
+    for chunk in reader:
+        yield chunk.rename(columns=raw)
+
+
+def iter_ratings(path: Path, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    return iter_csv(path, RATINGS_DTYPES, RATINGS_COLUMNS, chunksize)
+
+
+def iter_edges(path: Path, chunksize: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    return iter_csv(path, EDGES_DTYPES, EDGES_COLUMNS, chunksize)
+
+
+def stream_edges(path: Path, respondents: pd.DataFrame, subs,
+                 chunksize: int = CHUNK_ROWS) -> Dict:
+    """
+    aggregate_edges over dematel_edges.csv without loading it whole
+
+    Each chunk is reduced to its n×n weighted score sums and weight
+    counts, which are added up, so memory is one chunk plus two n×n
+    arrays.
+
+    Returns:
+        Dict with A_sum, CNT (as aggregate_edges) and rows (rows read)
+    """
+    n = len(subs)
+    A_sum, CNT, rows = np.zeros((n, n)), np.zeros((n, n)), 0
+    for chunk in iter_edges(path, chunksize):
+        rows += len(chunk)
+        dS, dC = aggregate_edges(chunk, respondents, subs)
+        A_sum += dS
+        CNT += dC
+    return {'A_sum': A_sum, 'CNT': CNT, 'rows': rows}
+
+
+def stream_dematel(path: Path, respondents: pd.DataFrame, subcriteria: pd.DataFrame,
+                   chunksize: int = CHUNK_ROWS, **kwargs) -> Dict:
+    """build_dematel over dematel_edges.csv, folded chunk by chunk"""
+    subs = subcriteria['sub_id'].tolist()
+    agg = stream_edges(path, respondents, subs, chunksize)
+    if agg['rows'] == 0 or respondents is None or respondents.empty or not subs:
+        return _empty_dematel()
+    return dematel_from_sums(agg['A_sum'], agg['CNT'], subs, **kwargs)
+
+
+def stream_ratings(path: Path, respondents: pd.DataFrame, dims=CUBE_DIMS,
+                   chunksize: int = CHUNK_ROWS, max_cells: int = 2_000_000) -> RatingsCube:
+    """
+    RatingsCube over supplier_ratings.csv without loading it whole
+
+    Every chunk is reduced to RatingsCube.cells with its ID columns
+    replaced by integer codes into file-wide label tables; the partial
+    cell tables are re-summed whenever they exceed ``max_cells`` rows.
+    Memory is therefore bounded by one chunk plus the number of distinct
+    (supplier, sub_id, cheese_type, plant_id, time_period) cells rather
+    than the file size. IDs are read as strings. cube.aggregate() gives
+    the supplier × sub_id weighted rating sums (/5) that supplier_scores
+    would compute.
+    """
+    if respondents is None or respondents.empty:
+        return RatingsCube(None, respondents)
+
+    parts, held, rows, keys, labels = [], 0, 0, None, {}
+    for chunk in iter_ratings(path, chunksize):
+        if keys is None:
+            keys = ['supplier_id', 'sub_id'] + [d for d in dims if d in chunk.columns]
+            labels = {k: _Labels() for k in keys}
+        rows += len(chunk)
+        chunk = chunk.assign(**{k: labels[k].codes(chunk[k]) for k in keys})
+        # cells() drops missing supplier/sub_id rows by NaN; codes mark them -1
+        chunk = chunk[(chunk['supplier_id'] >= 0) & (chunk['sub_id'] >= 0)]
+        parts.append(RatingsCube.cells(chunk, respondents, keys[2:]))
+        held += len(parts[-1])
+        if held > max_cells and len(parts) > 1:
+            parts = [_merge_cells(parts, keys)]
+            held = len(parts[0])
+
+    if not parts:
+        return RatingsCube(None, respondents)
+    cells = _merge_cells(parts, keys)
+    cells = cells.assign(**{k: labels[k].decode(cells[k].to_numpy()) for k in keys})
+    return RatingsCube.from_cells(cells, keys[2:], rows)
+
+
+class _Labels:
+    """File-wide label → int32 code table for one categorical column (-1 = missing)"""
+
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+        self.labels = []
+
+    def codes(self, col: pd.Series) -> np.ndarray:
+        cats = col.cat.categories
+        for c in cats:
+            if c not in self.index:
+                self.index[c] = len(self.labels)
+                self.labels.append(c)
+        lookup = np.array([self.index[c] for c in cats] + [-1], dtype=np.int32)
+        return lookup[col.cat.codes.to_numpy()]        # code -1 picks the trailing -1
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        out = np.array(self.labels + [np.nan], dtype=object)
+        return out[codes]
+
+
+def _merge_cells(parts, keys) -> pd.DataFrame:
+    """Concatenate coded cell tables and re-sum per key"""
+    frame = pd.concat(parts, ignore_index=True)
+    return frame.groupby(keys, sort=False)[['val', 'n']].sum().reset_index()
@@ -1,22 +1,65 @@
 
 import pandas as pd, numpy as np
-from .processing import hor_stage1, hor_stage2
-def tornado_OAT(events, agents, R, E, actions, perturb=0.1):
-    import pandas as pd
+from .processing import hor_stage1, hor_stage2, _hor_arrays
+
+
+def tornado_OAT(events, agents, R, E, actions, perturb=0.1, mode='analytic'):
+    """
+    One-at-a-time sensitivity of total TE to each severity and occurrence
+
+    perturb is a relative change (0.1 = +10%) or a list of them, e.g.
+    [-0.2, -0.1, -0.05, 0.05, 0.1, 0.2]; with a list the result gets a
+    'perturb' column and one row per (parameter, level).
+
+    mode:
+        'analytic' - total TE is linear in every severity and occurrence,
+                     so all deltas come from one base pass:
+                       severity i:   p * s_i * sum_a R[i,a] * o_a * e_a
+                       occurrence a: p * o_a * e_a * sum_i s_i * R[i,a]
+                     with e_a the column sum of E over the actions
+        'rerun'    - rerun hor_stage1 → hor_stage2 per parameter and level
+    """
+    multi = np.ndim(perturb) > 0
+    levels = [float(p) for p in np.atleast_1d(perturb)]
+    cols = ['parameter'] + (['perturb'] if multi else []) + ['base','new','delta']
     if events is None or agents is None or R is None or E is None or actions is None or events.empty or agents.empty or R.empty or E.empty or actions.empty:
-        return pd.DataFrame(columns=['parameter','base','new','delta'])
-
-    base_w, base_ARP = hor_stage1(events, agents, R)
-    base_detail = hor_stage2(E, base_ARP, actions)
-    base_score = float(base_detail['TE'].sum())
-    rows = []
-    for e in events['event_id']:
-        e_df = events.copy(); e_df.loc[e_df['event_id']==e, 'severity'] *= (1+perturb)
-        w, a = hor_stage1(e_df, agents, R); d2 = hor_stage2(E, a, actions)
-        rows.append(dict(parameter=f"severity:{e}", base=base_score, new=float(d2['TE'].sum())))
-    for a in agents['agent_id']:
-        ag_df = agents.copy(); ag_df.loc[ag_df['agent_id']==a, 'occurrence'] *= (1+perturb)
-        w, a2 = hor_stage1(events, ag_df, R); d2 = hor_stage2(E, a2, actions)
-        rows.append(dict(parameter=f"occurrence:{a}", base=base_score, new=float(d2['TE'].sum())))
-    df = pd.DataFrame(rows); df['delta'] = (df['new'] - df['base']).abs()
-    return df.sort_values('delta', ascending=False)
+        return pd.DataFrame(columns=cols)
+    if mode not in ('analytic', 'rerun'):
+        raise ValueError(f"mode must be 'analytic' or 'rerun', got {mode!r}")
+
+    params = ([f"severity:{e}" for e in events['event_id']] +
+              [f"occurrence:{a}" for a in agents['agent_id']])
+
+    if mode == 'analytic':
+        R_arr, E_arr, _ = _hor_arrays(events, agents, R, E, actions)
+        s = events['severity'].to_numpy(float)
+        o = agents['occurrence'].to_numpy(float)
+        e = E_arr.sum(axis=0)
+        g = s @ R_arr
+        base_score = float((g * o) @ e)
+        contrib = np.concatenate([s * (R_arr @ (o * e)), o * e * g])
+        new = base_score + np.outer(levels, contrib)
+    else:
+        events = events.astype({'severity': float}); agents = agents.astype({'occurrence': float})
+        base_w, base_ARP = hor_stage1(events, agents, R)
+        base_score = float(hor_stage2(E, base_ARP, actions)['TE'].sum())
+        new = np.empty((len(levels), len(params)))
+        for k, p in enumerate(levels):
+            col = 0
+            for e in events['event_id']:
+                e_df = events.copy(); e_df.loc[e_df['event_id']==e, 'severity'] *= (1+p)
+                w, a = hor_stage1(e_df, agents, R); d2 = hor_stage2(E, a, actions)
+                new[k, col] = float(d2['TE'].sum()); col += 1
+            for a in agents['agent_id']:
+                ag_df = agents.copy(); ag_df.loc[ag_df['agent_id']==a, 'occurrence'] *= (1+p)
+                w, a2 = hor_stage1(events, ag_df, R); d2 = hor_stage2(E, a2, actions)
+                new[k, col] = float(d2['TE'].sum()); col += 1
+
+    df = pd.DataFrame({
+        'parameter': np.tile(params, len(levels)),
+        'perturb': np.repeat(levels, len(params)),
+        'base': base_score,
+        'new': new.ravel(),
+    })
+    df['delta'] = (df['new'] - df['base']).abs()
+    return df[cols].sort_values('delta', ascending=False)
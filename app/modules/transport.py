@@ -0,0 +1,152 @@
+from collections import deque
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+
+def transportation_simplex(supply, demand, cost, tol: float = 1e-9,
+                           max_iter: Optional[int] = None) -> Tuple[np.ndarray, Dict]:
+    """
+    Balanced transportation problem by the transportation simplex (MODI)
+
+        min  sum(cost * X)
+        s.t. X.sum(axis=1) == supply,  X.sum(axis=0) == demand,  X >= 0
+
+    Starts from a least-cost basis and pivots on the most negative reduced
+    cost. The basis is kept as a spanning tree of S + P - 1 cells, and the
+    reduced costs of all cells are one NumPy broadcast per pivot.
+
+    Args:
+        supply: shape (S,), non-negative
+        demand: shape (P,), non-negative, demand.sum() == supply.sum()
+        cost: shape (S, P)
+        tol: reduced-cost optimality tolerance
+        max_iter: pivot limit (default 50 * (S + P))
+
+    Returns:
+        (X, info) with info keys status ('Optimal' / 'Not Solved'),
+        iterations and objective
+    """
+    a = np.asarray(supply, dtype=float).copy()
+    b = np.asarray(demand, dtype=float).copy()
+    C = np.asarray(cost, dtype=float)
+    S, P = C.shape
+    if abs(a.sum() - b.sum()) > 1e-9 * max(1.0, a.sum()):
+        raise ValueError("transportation_simplex needs a balanced problem (supply.sum() == demand.sum())")
+    if max_iter is None:
+        max_iter = 50 * (S + P)
+
+    X, basic = _least_cost_basis(a, b, C)
+
+    # Basis tree adjacency: rows are nodes 0..S-1, columns S..S+P-1
+    adj = [set() for _ in range(S + P)]
+    for i, j in basic:
+        adj[i].add(S + j)
+        adj[S + j].add(i)
+
+    it, status = 0, 'Not Solved'
+    while it < max_iter:
+        u, v = _potentials(adj, C, S, P)
+        red = C - u[:, None] - v[None, :]
+        k = int(np.argmin(red))
+        if red.flat[k] >= -tol:
+            status = 'Optimal'
+            break
+        i, j = divmod(k, P)
+
+        # Cycle: entering cell (+) then the tree path col j → row i,
+        # alternating signs along the way
+        path = _tree_path(adj, S + j, i)
+        cells = [(i, j)]
+        for n1, n2 in zip(path[:-1], path[1:]):
+            cells.append((n1, n2 - S) if n1 < S else (n2, n1 - S))
+        minus = cells[1::2]
+        vals = np.array([X[c] for c in minus])
+        m = int(np.argmin(vals))
+        theta = vals[m]
+        for c in cells[0::2]:
+            X[c] += theta
+        for c in minus:
+            X[c] -= theta
+        li, lj = minus[m]
+        X[li, lj] = 0.0
+
+        adj[li].discard(S + lj)
+        adj[S + lj].discard(li)
+        adj[i].add(S + j)
+        adj[S + j].add(i)
+        it += 1
+
+    np.maximum(X, 0.0, out=X)
+    return X, {'status': status, 'iterations': it, 'objective': float((C * X).sum())}
+
+
+def _least_cost_basis(a: np.ndarray, b: np.ndarray, C: np.ndarray):
+    """
+    Least-cost initial basic feasible solution
+
+    Each allocation crosses out exactly one row or column (both only on
+    the final cell), so the basis always has S + P - 1 cells and forms a
+    spanning tree even when the problem is degenerate.
+    """
+    S, P = C.shape
+    X = np.zeros((S, P))
+    row_open, col_open = np.ones(S, dtype=bool), np.ones(P, dtype=bool)
+    rows_left, cols_left = S, P
+    basic = []
+    for k in np.argsort(C, axis=None, kind='stable').tolist():
+        i, j = divmod(k, P)
+        if not (row_open[i] and col_open[j]):
+            continue
+        q = min(a[i], b[j])
+        X[i, j] = q
+        a[i] -= q
+        b[j] -= q
+        basic.append((i, j))
+        if rows_left == 1 and cols_left == 1:
+            break
+        if (a[i] <= b[j] and rows_left > 1) or cols_left == 1:
+            row_open[i] = False
+            rows_left -= 1
+        else:
+            col_open[j] = False
+            cols_left -= 1
+    return X, basic
+
+
+def _potentials(adj, C: np.ndarray, S: int, P: int):
+    """u_i + v_j = c_ij on every basic cell, with u_0 = 0"""
+    u, v = np.zeros(S), np.zeros(P)
+    seen = np.zeros(S + P, dtype=bool)
+    seen[0] = True
+    queue = deque([0])
+    while queue:
+        n = queue.popleft()
+        for m in adj[n]:
+            if seen[m]:
+                continue
+            seen[m] = True
+            if n < S:
+                v[m - S] = C[n, m - S] - u[n]
+            else:
+                u[m] = C[m, n - S] - v[n - S]
+            queue.append(m)
+    return u, v
+
+
+def _tree_path(adj, start: int, goal: int):
+    """Node path start → goal in the basis tree"""
+    parent = {start: None}
+    queue = deque([start])
+    while queue:
+        n = queue.popleft()
+        if n == goal:
+            break
+        for m in adj[n]:
+            if m not in parent:
+                parent[m] = n
+                queue.append(m)
+    path = [goal]
+    while parent[path[-1]] is not None:
+        path.append(parent[path[-1]])
+    return path[::-1]
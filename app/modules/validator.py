@@ -1,6 +1,8 @@
 
 import pandas as pd, numpy as np
 from pathlib import Path
+from .dataset import IdDomain
+from .streaming import iter_edges, iter_ratings
 
 def _ok(file, msg): return dict(file=file, level="OK", message=msg)
 def _warn(file, msg): return dict(file=file, level="WARN", message=msg)
@@ -16,14 +18,22 @@ def validate_all(tpl: Path):
             return pd.read_csv(p, **kw), []
         except Exception as e:
             return None, [_err(name, f"read error: {e}")]
+    # row-level files are only checked for presence here and scanned in chunks below
+    def hd(name):
+        p = tpl/name
+        if not p.exists(): return None, [_err(name, "missing file")]
+        try:
+            pd.read_csv(p, nrows=0); return p, []
+        except Exception as e:
+            return None, [_err(name, f"read error: {e}")]
     # load
     events, r1 = rd("hor_events.csv"); agents, r2 = rd("hor_agents.csv")
     R, r3 = rd("hor_R.csv", index_col=0); actions, r4 = rd("hor_actions.csv")
     if actions is not None: actions = actions.set_index("action_id")
     E, r5 = rd("hor_effectiveness.csv", index_col=0)
     respondents, r6 = rd("respondents.csv"); criteria, r7 = rd("criteria.csv")
-    subcriteria, r8 = rd("subcriteria.csv"); edges, r9 = rd("dematel_edges.csv")
-    suppliers, r10 = rd("suppliers.csv"); ratings, r11 = rd("supplier_ratings.csv")
+    subcriteria, r8 = rd("subcriteria.csv"); edges, r9 = hd("dematel_edges.csv")
+    suppliers, r10 = rd("suppliers.csv"); ratings, r11 = hd("supplier_ratings.csv")
     for r in [r1,r2,r3,r4,r5,r6,r7,r8,r9,r10,r11]: rep += r
 
     # if major missing, return early
@@ -64,9 +74,14 @@ def validate_all(tpl: Path):
             bad = actions[actions["manhours"]<0]; rep.append(_err("hor_actions.csv", f"manhours < 0: {len(bad)}") if len(bad) else _ok("hor_actions.csv", "manhours >= 0"))
     if respondents is not None and "weight" in respondents.columns:
         bad = respondents[respondents["weight"]<=0]; rep.append(_err("respondents.csv","weight must be > 0") if len(bad) else _ok("respondents.csv","weight > 0"))
-    if edges is not None and "score" in edges.columns:
-        bad = edges[~edges["score"].between(0,4, inclusive="both")]
-        rep.append(_err("dematel_edges.csv", f"score out of [0..4]: {len(bad)}") if len(bad) else _ok("dematel_edges.csv", "score in [0..4]"))
+    ids = lambda df, col: IdDomain(col, df[col]) if df is not None and col in df.columns else None
+    fk_edges = dict(respondent_id=ids(respondents, "respondent_id"), from_sub=ids(subcriteria, "sub_id"), to_sub=ids(subcriteria, "sub_id"))
+    fk_ratings = dict(supplier_id=ids(suppliers, "supplier_id"), sub_id=ids(subcriteria, "sub_id"), respondent_id=ids(respondents, "respondent_id"))
+    edges = _scan(edges, iter_edges, fk_edges, {"score": (0, 4)}, rep, "dematel_edges.csv") if edges is not None else None
+    ratings = _scan(ratings, iter_ratings, fk_ratings, {}, rep, "supplier_ratings.csv") if ratings is not None else None
+    if edges is not None and "score" in edges["columns"]:
+        bad = edges["bad"]["score"]
+        rep.append(_err("dematel_edges.csv", f"score out of [0..4]: {bad}") if bad else _ok("dematel_edges.csv", "score in [0..4]"))
     # matrix ranges
     if R is not None:
         try:
@@ -86,15 +101,17 @@ def validate_all(tpl: Path):
     # referential integrity
     # R: rows=events, cols=agents
     if R is not None and events is not None and agents is not None:
-        miss_rows = [i for i in R.index if i not in events["event_id"].tolist()]
-        miss_cols = [c for c in R.columns if c not in agents["agent_id"].tolist()]
+        ev, ag = ids(events, "event_id"), ids(agents, "agent_id")
+        miss_rows = R.index[~ev.known(R.index)].tolist() if ev else R.index.tolist()
+        miss_cols = R.columns[~ag.known(R.columns)].tolist() if ag else R.columns.tolist()
         if miss_rows: rep.append(_err("hor_R.csv", f"row IDs not in events: {miss_rows[:5]}"))
         if miss_cols: rep.append(_err("hor_R.csv", f"column IDs not in agents: {miss_cols[:5]}"))
         if not miss_rows and not miss_cols: rep.append(_ok("hor_R.csv", "IDs aligned with events×agents"))
     # E: rows=agents, cols=actions
     if E is not None and agents is not None and actions is not None:
-        miss_rows = [i for i in E.index if i not in agents["agent_id"].tolist()]
-        miss_cols = [c for c in E.columns if c not in actions.index.tolist()]
+        ag, act = ids(agents, "agent_id"), IdDomain("action_id", actions.index)
+        miss_rows = E.index[~ag.known(E.index)].tolist() if ag else E.index.tolist()
+        miss_cols = E.columns[~act.known(E.columns)].tolist()
         if miss_rows: rep.append(_err("hor_effectiveness.csv", f"row IDs not in agents: {miss_rows[:5]}"))
         if miss_cols: rep.append(_err("hor_effectiveness.csv", f"column IDs not in actions: {miss_cols[:5]}"))
         if not miss_rows and not miss_cols: rep.append(_ok("hor_effectiveness.csv", "IDs aligned with agents×actions"))
@@ -104,29 +121,43 @@ def validate_all(tpl: Path):
         rep.append(_err("subcriteria.csv", f"criterion_id not found: {len(bad)}") if len(bad) else _ok("subcriteria.csv", "criterion_id OK"))
     # dematel_edges respondent/sub ids exist
     if edges is not None and respondents is not None and subcriteria is not None:
-        bad_r = edges[~edges["respondent_id"].isin(respondents["respondent_id"])]
-        bad_s1 = edges[~edges["from_sub"].isin(subcriteria["sub_id"])]
-        bad_s2 = edges[~edges["to_sub"].isin(subcriteria["sub_id"])]
-        if len(bad_r): rep.append(_err("dematel_edges.csv", f"respondent_id not found: {len(bad_r)}"))
-        if len(bad_s1): rep.append(_err("dematel_edges.csv", f"from_sub not found: {len(bad_s1)}"))
-        if len(bad_s2): rep.append(_err("dematel_edges.csv", f"to_sub not found: {len(bad_s2)}"))
-        if len(bad_r)==0 and len(bad_s1)==0 and len(bad_s2)==0: rep.append(_ok("dematel_edges.csv", "IDs OK"))
+        bad_r, bad_s1, bad_s2 = (edges["bad"].get(c, 0) for c in ("respondent_id", "from_sub", "to_sub"))
+        if bad_r: rep.append(_err("dematel_edges.csv", f"respondent_id not found: {bad_r}"))
+        if bad_s1: rep.append(_err("dematel_edges.csv", f"from_sub not found: {bad_s1}"))
+        if bad_s2: rep.append(_err("dematel_edges.csv", f"to_sub not found: {bad_s2}"))
+        if bad_r==0 and bad_s1==0 and bad_s2==0: rep.append(_ok("dematel_edges.csv", "IDs OK"))
     # supplier_ratings FK checks
     if ratings is not None and suppliers is not None and subcriteria is not None and respondents is not None:
-        bad1 = ratings[~ratings["supplier_id"].isin(suppliers["supplier_id"])]
-        bad2 = ratings[~ratings["sub_id"].isin(subcriteria["sub_id"])]
-        bad3 = ratings[~ratings["respondent_id"].isin(respondents["respondent_id"])]
-        if len(bad1): rep.append(_err("supplier_ratings.csv", f"supplier_id not found: {len(bad1)}"))
-        if len(bad2): rep.append(_err("supplier_ratings.csv", f"sub_id not found: {len(bad2)}"))
-        if len(bad3): rep.append(_err("supplier_ratings.csv", f"respondent_id not found: {len(bad3)}"))
-        if len(bad1)==0 and len(bad2)==0 and len(bad3)==0: rep.append(_ok("supplier_ratings.csv", "FK OK"))
+        bad1, bad2, bad3 = (ratings["bad"].get(c, 0) for c in ("supplier_id", "sub_id", "respondent_id"))
+        if bad1: rep.append(_err("supplier_ratings.csv", f"supplier_id not found: {bad1}"))
+        if bad2: rep.append(_err("supplier_ratings.csv", f"sub_id not found: {bad2}"))
+        if bad3: rep.append(_err("supplier_ratings.csv", f"respondent_id not found: {bad3}"))
+        if bad1==0 and bad2==0 and bad3==0: rep.append(_ok("supplier_ratings.csv", "FK OK"))
 
     # warn if any empty tables
     targets = [("hor_events.csv", events),("hor_agents.csv", agents),("hor_R.csv", R),("hor_actions.csv", actions),
                ("hor_effectiveness.csv", E),("respondents.csv", respondents),("criteria.csv", criteria),
                ("subcriteria.csv", subcriteria),("dematel_edges.csv", edges),("suppliers.csv", suppliers),("supplier_ratings.csv", ratings)]
     for fname, df in targets:
-        if df is None or (hasattr(df, "empty") and df.empty):
+        if df is None or (hasattr(df, "empty") and df.empty) or (isinstance(df, dict) and df["rows"]==0):
             rep.append(_warn(fname, "file is empty"))
 
     return pd.DataFrame(rep)
+
+def _scan(path: Path, chunks, fk, ranges, rep, file):
+    """Row count, columns and bad-row counts of a row-level file, read chunk by chunk
+    (fk: column -> dataset.IdDomain of valid IDs, None to skip; ranges: column -> inclusive (lo, hi))"""
+    out = dict(rows=0, columns=[], bad={})
+    try:
+        for chunk in chunks(path):
+            out["rows"] += len(chunk); out["columns"] = list(chunk.columns)
+            for c, valid in fk.items():
+                if valid is not None and c in chunk.columns:
+                    out["bad"][c] = out["bad"].get(c, 0) + int((~valid.known(chunk[c])).sum())
+            for c, (lo, hi) in ranges.items():
+                if c in chunk.columns:
+                    out["bad"][c] = out["bad"].get(c, 0) + int((~chunk[c].between(lo, hi, inclusive="both")).sum())
+    except Exception as e:
+        rep.append(_err(file, f"read error: {e}"))
+        return None
+    return out
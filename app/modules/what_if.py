@@ -1,14 +1,27 @@
 
-import streamlit as st, pandas as pd
+import streamlit as st, pandas as pd, numpy as np
 
 def tweak_weights(gw: pd.Series, sub_ids: list, factor: float):
     if gw is None or gw.size==0: return gw
-    w = gw.copy().astype(float)
+    w = gw.astype(float)
     if sub_ids:
         w.loc[sub_ids] = w.loc[sub_ids] * float(factor)
     w = w / (w.sum() if w.sum()!=0 else 1.0)
     return w
 
+def tweak_weights_batch(gw: pd.Series, scenarios) -> pd.DataFrame:
+    """tweak_weights for many (sub_ids, factor) pairs: dict name -> pair, or a list of pairs.
+    Returns sub_id × K weights, one renormalized column per scenario (unknown sub_ids ignored)."""
+    items = list(scenarios.items()) if isinstance(scenarios, dict) else list(enumerate(scenarios))
+    if gw is None or gw.size==0 or not items: return pd.DataFrame(index=gw.index if gw is not None else None)
+    F = np.ones((gw.size, len(items)))
+    for k, (_, (subs, factor)) in enumerate(items):
+        if subs: F[gw.index.isin(list(subs)), k] = float(factor)
+    W = gw.astype(float).to_numpy()[:, None] * F
+    tot = W.sum(axis=0)
+    W = W / np.where(tot!=0, tot, 1.0)
+    return pd.DataFrame(W, index=gw.index, columns=[name for name, _ in items])
+
 def compare_rankings(ranking_base: pd.DataFrame, ranking_new: pd.DataFrame):
     if ranking_base is None or ranking_new is None or len(ranking_base)==0 or len(ranking_new)==0:
         st.info("Ranking tidak tersedia untuk komparasi.")
@@ -6,6 +6,13 @@ import plotly.io as pio
 from pathlib import Path
 import traceback
 
+# Copy-on-write: PIPE (st.cache_resource) hands the same stage results to
+# every session; frames derived from them share data until one is written
+# to, so the stages need no defensive copies. (_load_all is st.cache_data,
+# which returns a fresh unpickled copy per call, so loaded frames are not
+# shared between sessions.)
+pd.set_option("mode.copy_on_write", True)
+
 # Import modules dengan error handling
 try:
     from modules.themes import inject as inject_theme
@@ -13,8 +20,10 @@ try:
     from modules.viz import heatmap, barh, bars, cause_effect_scatter, radar_weights, sankey_criteria
     from modules.supplier_profile import supplier_profile_view
     from modules.what_if import tweak_weights, compare_rankings
+    from modules.stability import rank_stability
     from modules.scenarios import save_scenario, list_scenarios, load_scenario, delete_scenario
-    from modules.processing import hor_stage1, hor_stage2, build_dematel, danp_from_T, supplier_scores
+    from modules.pipeline import PipelineCache
+    from modules.loader import load_row_level, load_templates, read_template_csv, template_fingerprint
     from modules.optimizer import weighted_sum_selection, epsilon_constraint_TE
     from modules.allocation import optimize_allocation
     from modules.data_wizard import wizard as data_wizard
@@ -55,252 +64,68 @@ OUT.mkdir(parents=True, exist_ok=True)
 TPL.mkdir(parents=True, exist_ok=True)
 
 # ============================================================================
-# HELPER FUNCTIONS - INDONESIAN COLUMN ALIASES
+# DATA LOADING
 # ============================================================================
-def _rename_if_present(df, mapping):
-    """Rename columns safely without errors"""
-    if df is None or not isinstance(df, pd.DataFrame):
-        return df
-    ren = {src: dst for src, dst in mapping.items() if src in df.columns}
-    return df.rename(columns=ren) if ren else df
+def _st_notify(level, msg):
+    """Route loader messages to st.warning / st.info / st.caption"""
+    getattr(st, level)(msg)
 
 
-def _normalize_all_to_english(events, agents, actions, respondents,
-                              criteria, subcriteria, edges,
-                              suppliers, ratings):
-    """Normalize Indonesian column names to English"""
-    # Events
-    events = _rename_if_present(events, {
-        'id_kejadian': 'event_id',
-        'nama_kejadian': 'event_name',
-        'tingkat_keparahan': 'severity'
-    })
-    
-    # Agents
-    agents = _rename_if_present(agents, {
-        'id_agen': 'agent_id',
-        'nama_agen': 'agent_name',
-        'frekuensi': 'occurrence'
-    })
-    
-    # Actions
-    actions = _rename_if_present(actions, {
-        'id_aksi': 'action_id',
-        'nama_aksi': 'action_name',
-        'biaya': 'cost',
-        'jam_kerja': 'manhours',
-        'tingkat_kesulitan': 'difficulty',
-        'gunakan_manual': 'use_manual'
-    })
-    
-    # Respondents
-    respondents = _rename_if_present(respondents, {
-        'id_responden': 'respondent_id',
-        'nama_responden': 'respondent_name',
-        'bobot': 'weight'
-    })
-    
-    # Criteria & Subcriteria
-    criteria = _rename_if_present(criteria, {
-        'id_kriteria': 'criterion_id',
-        'nama_kriteria': 'criterion_name'
-    })
-    
-    subcriteria = _rename_if_present(subcriteria, {
-        'id_subkriteria': 'sub_id',
-        'nama_subkriteria': 'sub_name',
-        'id_kriteria': 'criterion_id'
-    })
-    
-    # DEMATEL edges
-    edges = _rename_if_present(edges, {
-        'id_responden': 'respondent_id',
-        'dari_sub': 'from_sub',
-        'ke_sub': 'to_sub',
-        'skor': 'score',
-        'pengaruh': 'influence'
-    })
-    
-    # Suppliers
-    suppliers = _rename_if_present(suppliers, {
-        'id_pemasok': 'supplier_id',
-        'nama_pemasok': 'supplier_name',
-        'wilayah': 'region'
-    })
+@st.cache_data(max_entries=2)
+def _load_all(fingerprint):
+    """
+    Load all CSV files with error handling and caching
     
-    # Ratings
-    ratings = _rename_if_present(ratings, {
-        'id_pemasok': 'supplier_id',
-        'id_subkriteria': 'sub_id',
-        'penilaian': 'rating',
-        'id_responden': 'respondent_id',
-        'jenis_keju': 'cheese_type',
-        'id_pabrik': 'plant_id',
-        'periode_waktu': 'time_period'
-    })
-    
-    return (events, agents, actions, respondents,
-            criteria, subcriteria, edges, suppliers, ratings)
-
-
-def _norm_ids(x):
-    # seragamkan ID: string, trim spasi, hilangkan BOM, huruf besar-kecil disamakan
-    return (x.astype(str)
-              .str.replace('\ufeff', '', regex=False)
-              .str.strip())
-
-def align_effectiveness(E, actions, agents, *, fill=0.0):
-    """Selaraskan E (rows=action_id, cols=agent_id) ke master.
-       Auto-detect transpose, buang ID nyasar, isi yang hilang."""
-    if E is None or E.empty or actions is None or actions.empty or agents is None or agents.empty:
-        return pd.DataFrame()
-
-    # master ids
-    if 'action_id' in actions.columns:
-        act_ids = _norm_ids(actions['action_id'])
-    else:
-        act_ids = _norm_ids(actions.index.to_series())
-    agt_ids = _norm_ids(agents['agent_id'])
-
-    # normalisasi E
-    E = E.copy()
-    # kalau masih ada kolom 'action_id' di E (format long/terekspor Excel)
-    if 'action_id' in E.columns:
-        E = E.set_index('action_id')
-    E.index   = _norm_ids(E.index.to_series())
-    E.columns = _norm_ids(pd.Index(E.columns))
-
-    # --- Heuristik orientasi (apakah E kebalik?) ---
-    hits_row_act = len(set(E.index)   & set(act_ids))
-    hits_col_ag  = len(set(E.columns) & set(agt_ids))
-    hits_row_ag  = len(set(E.index)   & set(agt_ids))
-    hits_col_act = len(set(E.columns) & set(act_ids))
-    if hits_row_ag > hits_row_act and hits_col_act > hits_col_ag:
-        # kemungkinan besar E = agents x actions -> balikkan
-        E = E.T
-        # normalisasi ulang kolom/index pasca-transpose
-        E.index   = _norm_ids(E.index.to_series())
-        E.columns = _norm_ids(pd.Index(E.columns))
-
-    # --- Hitung mismatch SEBELUM perbaikan (sekadar info) ---
-    before_miss_rows  = sorted(set(act_ids) - set(E.index))
-    before_miss_cols  = sorted(set(agt_ids) - set(E.columns))
-    before_extra_rows = sorted(set(E.index)   - set(act_ids))
-    before_extra_cols = sorted(set(E.columns) - set(agt_ids))
-
-    # Tambah baris/kolom yang hilang
-    if before_miss_rows:
-        E = pd.concat([E, pd.DataFrame(fill, index=before_miss_rows, columns=E.columns)], axis=0)
-    for c in before_miss_cols:
-        if c not in E.columns:
-            E[c] = fill
-
-    # Buang yang tidak dikenal & reindex ke urutan master
-    E = E.loc[act_ids.unique(), [c for c in agt_ids.unique() if c in E.columns]]
+    Cached per template fingerprint (size + mtime of every file), so the
+    templates are parsed again exactly when one of them changes. A fresh
+    process memory-maps the binary snapshot in data/templates.snapshot
+    instead of re-parsing unchanged CSVs. The row-level files (edges,
+    ratings) are not loaded here and come back as None; see _dematel,
+    _ratings_cube and _row_level.
+    """
+    try:
+        # Load, normalize and align CSV files
+        return load_templates(TPL, notify=_st_notify, snapshot=True, row_level=False)
+        
+    except Exception as e:
+        st.error(f"❌ Failed to load templates: {e}")
+        st.info("💡 Tip: Upload CSV files via Data Wizard or generate dummy data")
+        
+        # Return empty dataframes as fallback
+        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
+                pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
+                pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
 
-    # Pastikan numerik
-    E = E.apply(pd.to_numeric, errors='coerce').fillna(fill)
 
-    # --- Cek mismatch SESUDAH perbaikan; warning hanya kalau masih ada ---
-    after_miss_rows = sorted(set(act_ids) - set(E.index))
-    after_miss_cols = sorted(set(agt_ids) - set(E.columns))
-    if after_miss_rows or after_miss_cols:
-        st.warning(
-            f"E masih tidak selaras setelah perbaikan. "
-            f"Missing actions(row): {len(after_miss_rows)}, missing agents(col): {len(after_miss_cols)}"
-        )
-        # Tampilkan contoh ID yang hilang (maks 5) agar mudah koreksi CSV
-        if after_miss_rows:
-            st.caption("Contoh action_id yang hilang: " + ", ".join(after_miss_rows[:5]))
-        if after_miss_cols:
-            st.caption("Contoh agent_id yang hilang: " + ", ".join(after_miss_cols[:5]))
-    else:
-        # Kalau ingin tahu kondisi awalnya, tampilkan sebagai info sekali
-        if before_miss_rows or before_miss_cols or before_extra_rows or before_extra_cols:
-            st.info(
-                f"E awalnya tidak selaras "
-                f"(missing rows {len(before_miss_rows)}, missing cols {len(before_miss_cols)}, "
-                f"extra rows {len(before_extra_rows)}, extra cols {len(before_extra_cols)}) — "
-                f"sudah diperbaiki otomatis."
-            )
+@st.cache_resource
+def _pipeline_cache():
+    """Process-wide, content-keyed cache for the analytics stages"""
+    return PipelineCache(maxsize=64)
 
-    return E
 
-def align_R(R, events, agents, *, fill=0):
-    """Selaraskan R (rows=event_id, cols=agent_id). Auto-transpose bila perlu."""
-    if R is None or R.empty or events is None or events.empty or agents is None or agents.empty:
-        return pd.DataFrame()
+PIPE = _pipeline_cache()
 
-    ev_ids = _norm_ids(events['event_id'] if 'event_id' in events.columns else events.index.to_series())
-    ag_ids = _norm_ids(agents['agent_id'])
+EDGES_CSV = TPL / 'dematel_edges.csv'
+RATINGS_CSV = TPL / 'supplier_ratings.csv'
 
-    R = R.copy()
-    R.index   = _norm_ids(R.index.to_series())
-    R.columns = _norm_ids(pd.Index(R.columns))
 
-    # Heuristik orientasi
-    hit_row_ev = len(set(R.index)   & set(ev_ids))
-    hit_col_ag = len(set(R.columns) & set(ag_ids))
-    hit_row_ag = len(set(R.index)   & set(ag_ids))
-    hit_col_ev = len(set(R.columns) & set(ev_ids))
-    if hit_row_ag > hit_row_ev and hit_col_ev > hit_col_ag:
-        R = R.T
-        R.index   = _norm_ids(R.index.to_series())
-        R.columns = _norm_ids(pd.Index(R.columns))
+def _dematel():
+    """DEMATEL from dematel_edges.csv folded chunk by chunk (cached in PIPE)"""
+    return PIPE.stream_dematel(EDGES_CSV, respondents, subcriteria)
 
-    # Reindex aman
-    R = R.reindex(index=ev_ids.unique()).reindex(columns=ag_ids.unique()).fillna(fill)
-    R = R.apply(pd.to_numeric, errors='coerce').fillna(fill)
-    return R
 
-# ============================================================================
-# DATA LOADING
-# ============================================================================
-@st.cache_data(ttl=300)
-def _load_all():
-    """Load all CSV files with error handling and caching"""
-    try:
-        # Ensure minimal templates exist
-        ensure_minimal_templates(TPL)
-        
-        # Load CSV files
-        events = pd.read_csv(TPL / 'hor_events.csv')
-        agents = pd.read_csv(TPL / 'hor_agents.csv')
-        R = pd.read_csv(TPL / 'hor_R.csv', index_col=0)
-        actions = pd.read_csv(TPL / 'hor_actions.csv')
-        E = pd.read_csv(TPL/'hor_effectiveness.csv', index_col=0)
-        respondents = pd.read_csv(TPL / 'respondents.csv')
-        criteria = pd.read_csv(TPL / 'criteria.csv')
-        subcriteria = pd.read_csv(TPL / 'subcriteria.csv')
-        edges = pd.read_csv(TPL / 'dematel_edges.csv')
-        suppliers = pd.read_csv(TPL / 'suppliers.csv')
-        ratings = pd.read_csv(TPL / 'supplier_ratings.csv')
-        
-        # Normalize column names
-        (events, agents, actions, respondents,
-         criteria, subcriteria, edges, suppliers, ratings) = _normalize_all_to_english(
-            events, agents, actions, respondents, criteria, subcriteria, edges, suppliers, ratings
-        )
-        
-        # Set index for actions safely
-        if 'action_id' in actions.columns:
-            actions = actions.set_index('action_id')
+def _ratings_cube():
+    """RatingsCube from supplier_ratings.csv folded chunk by chunk (cached in PIPE)"""
+    return PIPE.stream_ratings(RATINGS_CSV, respondents)
 
-        else:
-            st.warning("⚠️ 'action_id' column not found in hor_actions.csv")
 
-        R = align_R(R, events, agents, fill=0)
-        E = align_effectiveness(E, actions, agents, fill=0.0)
-        return events, agents, R, actions, E, respondents, criteria, subcriteria, edges, suppliers, ratings
-        
-    except Exception as e:
-        st.error(f"❌ Failed to load templates: {e}")
-        st.info("💡 Tip: Upload CSV files via Data Wizard or generate dummy data")
-        
-        # Return empty dataframes as fallback
-        return (pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
-                pd.DataFrame(), pd.DataFrame(), pd.DataFrame(), pd.DataFrame(),
-                pd.DataFrame(), pd.DataFrame(), pd.DataFrame())
+@st.cache_resource(max_entries=2)
+def _row_level(name, fingerprint):
+    """
+    One row-level template read whole, only for the views that need the
+    rows (panel consensus, rating trend); shared read-only like PIPE results
+    """
+    return load_row_level(TPL, name)
 
 
 # ============================================================================
@@ -330,8 +155,16 @@ hero(
 # ============================================================================
 # LOAD DATA
 # ============================================================================
+# Ensure minimal templates exist (before fingerprinting, so creating them
+# does not force a second load)
+try:
+    ensure_minimal_templates(TPL)
+except Exception as e:
+    st.error(f"❌ Failed to create templates: {e}")
+
+FINGERPRINT = template_fingerprint(TPL)
 (events, agents, R, actions, E, respondents,
- criteria, subcriteria, edges, suppliers, ratings) = _load_all()
+ criteria, subcriteria, _, suppliers, _) = _load_all(FINGERPRINT)
 
 # Sanity checks (opsional tapi membantu)
 # R: index = event_id, columns = agent_id
@@ -393,8 +226,8 @@ with home:
     
     # Quick KPIs
     try:
-        weighted, ARP = hor_stage1(events, agents, R)
-        detail = hor_stage2(E, ARP, actions)
+        weighted, ARP = PIPE.hor_stage1(events, agents, R)
+        detail = PIPE.hor_stage2(E, ARP, actions)
         
         col = st.columns(3)
         if detail is not None and not detail.empty:
@@ -414,6 +247,12 @@ with home:
             )
     except Exception as e:
         st.error(f"Error computing KPIs: {e}")
+    
+    # Pipeline cache counters (cumulative across reruns)
+    with st.expander("⚡ Compute cache"):
+        _cs = PIPE.stats()
+        st.caption(f"Hits: {int(_cs['hits'].sum())} • Misses: {int(_cs['misses'].sum())} • Entries: {int(_cs['entries'].sum())}/{PIPE.maxsize}")
+        st.dataframe(_cs, use_container_width=True)
 
 # ============================================================================
 # DATA WIZARD TAB
@@ -478,7 +317,7 @@ with tab1:
     st.subheader("📊 HOR – Stage 1")
     
     try:
-        weighted, ARP = hor_stage1(events, agents, R)
+        weighted, ARP = PIPE.hor_stage1(events, agents, R)
         
         if weighted is not None and not weighted.empty:
             st.plotly_chart(
@@ -507,10 +346,10 @@ with tab2:
     st.subheader("🛡️ HOR – Stage 2 (TE & ETD)")
     
     try:
-        weighted, ARP = hor_stage1(events, agents, R)
-        detail = hor_stage2(E, ARP, actions)
-        dem = build_dematel(respondents, subcriteria, edges)
-        danp = danp_from_T(subcriteria, criteria, dem.get('T', pd.DataFrame()))
+        weighted, ARP = PIPE.hor_stage1(events, agents, R)
+        detail = PIPE.hor_stage2(E, ARP, actions)
+        dem = _dematel()
+        danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T', pd.DataFrame()))
         
         if detail is not None and not detail.empty:
             st.plotly_chart(
@@ -531,10 +370,13 @@ with tab3:
     st.subheader("🔗 DEMATEL")
     
     try:
-        dem = build_dematel(respondents, subcriteria, edges)
+        dem = _dematel()
         
         if dem and 'alpha' in dem:
-            st.caption(f"α = {dem.get('alpha', 1.0):.6f}")
+            st.caption(
+                f"α = {dem.get('alpha', 1.0):.6f} • solver = {dem.get('solver') or 'n/a'} "
+                f"• cond(I−X) = {dem.get('cond', float('nan')):.3g}"
+            )
         
         if dem and dem.get('T') is not None and not dem['T'].empty:
             st.plotly_chart(
@@ -555,6 +397,32 @@ with tab3:
                 cause_effect_scatter(dem['r'], dem['c']),
                 use_container_width=True
             )
+            
+            with st.expander("👥 Panel consensus"):
+                # Per-respondent matrices need the edge rows; read them only on request
+                if st.toggle("Compute per-respondent DEMATEL", value=False, key='dematel_panel'):
+                    edges = _row_level('dematel_edges.csv', FINGERPRINT)
+                    panel = PIPE.respondent_dematel(respondents, subcriteria, edges)
+                    if len(panel['respondents']) > 1:
+                        agr = panel['average_gap_ratio']
+                        st.caption(
+                            f"Respondents: {len(panel['respondents'])} • average gap ratio = {agr:.2%} "
+                            f"{'(consensus reached, < 5%)' if agr < 0.05 else '(below consensus threshold, ≥ 5%)'}"
+                        )
+                        st.line_chart(panel['gap_ratio'])
+                        st.dataframe(
+                            panel['deviation'].sort_values('t_dev', ascending=False),
+                            use_container_width=True
+                        )
+                        who = st.selectbox("Respondent T matrix", list(panel['respondents']), key='dematel_resp_T')
+                        k = list(panel['respondents']).index(who)
+                        st.plotly_chart(
+                            heatmap(pd.DataFrame(panel['T'][k], index=panel['subs'], columns=panel['subs']),
+                                    f"Total Relation Matrix T – {who}"),
+                            use_container_width=True
+                        )
+                    else:
+                        st.info('ℹ️ Consensus needs at least two respondents')
         else:
             st.info('ℹ️ DEMATEL matrix T is empty')
             
@@ -569,8 +437,15 @@ with tab4:
     st.subheader("⚖️ DANP")
     
     try:
-        dem = build_dematel(respondents, subcriteria, edges)
-        danp = danp_from_T(subcriteria, criteria, dem.get('T'))
+        dem = _dematel()
+        danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T'))
+        
+        if danp and danp.get('limit_method'):
+            st.caption(
+                f"W_limit: {danp['limit_method']} • iterations = {danp.get('limit_iterations', 0)} "
+                f"• residual = {danp.get('limit_residual', float('nan')):.2e}"
+                + ("" if danp.get('limit_converged') else " • ⚠️ not converged")
+            )
         
         if danp and danp.get('gw') is not None and len(danp['gw']) > 0:
             st.plotly_chart(
@@ -613,35 +488,35 @@ with tab5:
         # Filters
         cols = st.columns(3)
         
-        types = ['ALL']
-        if 'cheese_type' in ratings.columns:
-            types += sorted(ratings['cheese_type'].dropna().unique().tolist())
-        
-        plants = ['ALL']
-        if 'plant_id' in ratings.columns:
-            plants += sorted(ratings['plant_id'].dropna().unique().tolist())
-        
-        periods = ['ALL']
-        if 'time_period' in ratings.columns:
-            periods += sorted(ratings['time_period'].dropna().unique().tolist())
+        # Options from the cube's (sorted) dimension labels, missing values dropped
+        cube = _ratings_cube()
+        types, plants, periods = (
+            [v for v in cube.categories.get(d, []) if pd.notna(v)]
+            for d in ('cheese_type', 'plant_id', 'time_period')
+        )
         
-        f_type = cols[0].selectbox("Cheese Type", types, index=0)
-        f_plant = cols[1].selectbox("Plant", plants, index=0)
-        f_period = cols[2].selectbox("Period", periods, index=0)
+        # Empty multiselect = ALL
+        f_type = cols[0].multiselect("Cheese Type", types, default=[])
+        f_plant = cols[1].multiselect("Plant", plants, default=[])
+        f_period = 'ALL'
+        if len(periods) > 1:
+            lo, hi = cols[2].select_slider("Period", options=periods, value=(periods[0], periods[-1]))
+            if (lo, hi) != (periods[0], periods[-1]):
+                f_period = {'from': lo, 'to': hi}
+        elif periods:
+            cols[2].caption(f"Period: {periods[0]}")
         
         filters = {
-            'cheese_type': f_type,
-            'plant_id': f_plant,
+            'cheese_type': f_type or 'ALL',
+            'plant_id': f_plant or 'ALL',
             'time_period': f_period
         }
         
-        # Compute scores
-        dem = build_dematel(respondents, subcriteria, edges)
-        danp = danp_from_T(subcriteria, criteria, dem.get('T'))
+        # Compute scores (cube built once per dataset, filters only slice it)
+        dem = _dematel()
+        danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T'))
         
-        ranking, agg = supplier_scores(
-            ratings, respondents, danp.get('gw'), suppliers, filters=filters
-        )
+        ranking, agg = cube.scores(danp.get('gw'), suppliers, filters=filters)
         
         # Display KPIs
         c1, c2, c3 = st.columns(3)
@@ -674,15 +549,18 @@ with profile:
     
     try:
         # Recompute unfiltered rankings
-        dem = build_dematel(respondents, subcriteria, edges)
-        danp = danp_from_T(subcriteria, criteria, dem.get('T'))
-        ranking_all, agg_all = supplier_scores(
-            ratings, respondents, danp.get('gw'), suppliers
-        )
+        dem = _dematel()
+        danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T'))
+        ranking_all, agg_all = _ratings_cube().scores(danp.get('gw'), suppliers)
+        
+        # The rating trend needs the rating rows; read them only on request
+        trend_rows = None
+        if st.toggle("📈 Rating trend over time", value=False, key='profile_trend'):
+            trend_rows = _row_level('supplier_ratings.csv', FINGERPRINT)
         
         supplier_profile_view(
             ranking_all, agg_all, danp.get('gw'),
-            suppliers, ratings, subcriteria, criteria
+            suppliers, trend_rows, subcriteria, criteria
         )
         
     except Exception as e:
@@ -696,8 +574,8 @@ with labs:
     
     try:
         # Get global weights
-        dem = build_dematel(respondents, subcriteria, edges)
-        danp = danp_from_T(subcriteria, criteria, dem.get('T'))
+        dem = _dematel()
+        danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T'))
         gw_series = danp.get('gw') if danp else None
         
         subs = gw_series.index.tolist() if gw_series is not None and len(gw_series) > 0 else []
@@ -705,16 +583,41 @@ with labs:
         sel_subs = st.multiselect("Select Subcriteria to Adjust", subs)
         factor = st.slider("Adjustment Factor", 0.5, 2.0, 1.2, 0.05)
         
-        # Base ranking
-        ranking_base, _ = supplier_scores(ratings, respondents, gw_series, suppliers)
-        
-        # What-if ranking
+        # What-if ranking: base and tweaked weights scored in one product
         if len(sel_subs) > 0:
+            cube = _ratings_cube()
             gw_new = tweak_weights(gw_series, sel_subs, factor)
-            ranking_new, _ = supplier_scores(ratings, respondents, gw_new, suppliers)
+            scores, ranks = cube.batch_scores(pd.DataFrame({'base': gw_series, 'new': gw_new}))
+            
+            ranking_base = scores['base'].rename('score').reset_index()
+            ranking_new = scores['new'].rename('score').reset_index()
             
             st.markdown("**📊 Delta Ranking (new − base)**")
             compare_rankings(ranking_base, ranking_new)
+            
+            shift = (ranks['base'] - ranks['new']).rename('rank_shift')
+            moved = shift[shift != 0]
+            if len(moved) > 0:
+                st.caption(f"{len(moved)} supplier(s) change rank")
+                st.dataframe(
+                    pd.concat([ranks, shift], axis=1).loc[moved.index].sort_values('new'),
+                    use_container_width=True
+                )
+        
+        # Rank stability (closed form, no slider reruns)
+        with st.expander("📐 Rank stability per subcriterion", expanded=False):
+            top_k = st.number_input("Top-k to keep", min_value=1, max_value=50, value=5, key='stab_topk')
+            stab = rank_stability(
+                _ratings_cube().aggregate(), gw_series,
+                top_k=int(top_k), factor_range=(0.5, 2.0)
+            )
+            if len(stab['top']) > 0:
+                st.caption("Top-k order stays unchanged for factors in [f_low, f_high]: " + " › ".join(map(str, stab['top'])))
+                st.dataframe(stab['intervals'], use_container_width=True)
+                st.markdown("**Rank reversals within factor 0.5 – 2.0**")
+                st.dataframe(stab['flips'], use_container_width=True)
+            else:
+                st.info("ℹ️ No supplier scores for stability analysis")
         
         st.markdown('---')
         st.markdown("**💾 Scenarios** – Save & load What-If configurations")
@@ -746,8 +649,8 @@ with tab6:
     
     try:
         # Get action details
-        weighted, ARP = hor_stage1(events, agents, R)
-        detail = hor_stage2(E, ARP, actions)
+        weighted, ARP = PIPE.hor_stage1(events, agents, R)
+        detail = PIPE.hor_stage2(E, ARP, actions)
         
         if detail is None or detail.empty:
             st.info("ℹ️ No actions available for optimization")
@@ -819,7 +722,7 @@ with tab6:
         
         # Plants
         if alloc_plants.exists():
-            plants_df = pd.read_csv(alloc_plants)
+            plants_df = read_template_csv(alloc_plants)
         else:
             plants_df = pd.DataFrame({
                 "plant_id": ["PlantA", "PlantB"],
@@ -829,7 +732,7 @@ with tab6:
         
         # Suppliers
         if alloc_suppliers.exists():
-            suppliers_df = pd.read_csv(alloc_suppliers)
+            suppliers_df = read_template_csv(alloc_suppliers)
         else:
             n = min(4, len(suppliers)) if not suppliers.empty else 1
             if n == 0:
@@ -908,9 +811,9 @@ with tab6:
                 dfc = pd.DataFrame(columns=['region', 'min_pct', 'max_pct'])
         
         # Run allocation
-        dem = build_dematel(respondents, subcriteria, edges)
-        danp = danp_from_T(subcriteria, criteria, dem.get('T'))
-        ranking_all, _ = supplier_scores(ratings, respondents, danp.get('gw'), suppliers)
+        dem = _dematel()
+        danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T'))
+        ranking_all, _ = _ratings_cube().scores(danp.get('gw'), suppliers)
         
         if ranking_all is None or len(ranking_all) == 0:
             st.info('ℹ️ Allocation skipped: no supplier rankings available')
@@ -992,11 +895,11 @@ with tab7:
         try:
             with pd.ExcelWriter(OUT / 'dashboard_exports.xlsx', engine='xlsxwriter') as w:
                 # Recompute all data
-                weighted, ARP = hor_stage1(events, agents, R)
-                detail = hor_stage2(E, ARP, actions)
-                dem = build_dematel(respondents, subcriteria, edges)
-                danp = danp_from_T(subcriteria, criteria, dem.get('T'))
-                ranking_all, _ = supplier_scores(ratings, respondents, danp.get('gw'), suppliers)
+                weighted, ARP = PIPE.hor_stage1(events, agents, R)
+                detail = PIPE.hor_stage2(E, ARP, actions)
+                dem = _dematel()
+                danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T'))
+                ranking_all, _ = _ratings_cube().scores(danp.get('gw'), suppliers)
                 
                 # Write sheets
                 if not weighted.empty:
@@ -1042,11 +945,11 @@ with tab7:
     if st.button('📝 Create Narrative PDF (with KPIs)'):
         try:
             # Recompute data
-            weighted, ARP = hor_stage1(events, agents, R)
-            detail = hor_stage2(E, ARP, actions)
-            dem = build_dematel(respondents, subcriteria, edges)
-            danp = danp_from_T(subcriteria, criteria, dem.get('T'))
-            ranking_all, _ = supplier_scores(ratings, respondents, danp.get('gw'), suppliers)
+            weighted, ARP = PIPE.hor_stage1(events, agents, R)
+            detail = PIPE.hor_stage2(E, ARP, actions)
+            dem = _dematel()
+            danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T'))
+            ranking_all, _ = _ratings_cube().scores(danp.get('gw'), suppliers)
             
             # Calculate KPIs
             kpis = {
@@ -1093,11 +996,11 @@ with tab7:
     if st.button('📊 Create Charts PDF Report'):
         try:
             # Recompute all data
-            weighted, ARP = hor_stage1(events, agents, R)
-            detail = hor_stage2(E, ARP, actions)
-            dem = build_dematel(respondents, subcriteria, edges)
-            danp = danp_from_T(subcriteria, criteria, dem.get('T'))
-            ranking_all, _ = supplier_scores(ratings, respondents, danp.get('gw'), suppliers)
+            weighted, ARP = PIPE.hor_stage1(events, agents, R)
+            detail = PIPE.hor_stage2(E, ARP, actions)
+            dem = _dematel()
+            danp = PIPE.danp_from_T(subcriteria, criteria, dem.get('T'))
+            ranking_all, _ = _ratings_cube().scores(danp.get('gw'), suppliers)
             
             img_paths = {}
             